@@ -0,0 +1,490 @@
+"""
+Offline stand-ins for every remote service the bots talk to.
+
+Each service is a Backend with its own latency / jitter / error rate, and
+counts every call it receives. install() swaps the fakes in before any bot
+module is imported:
+
+  ee, yfinance, GoogleNews, google.generativeai  -> fake modules
+  requests (NSE, Telegram, EE thumbnails, GitHub) -> fake HTTP transport
+  os.system / subprocess.run (git)                -> counted no-op
+"""
+import io
+import os
+import sys
+import json
+import time
+import types
+import random
+import subprocess
+import base64
+import hashlib
+import urllib.parse
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import requests
+
+# 1x1 baseline JPEG, used when Pillow is not around to draw a real frame
+TINY_JPEG = base64.b64decode(
+    "/9j/4AAQSkZJRgABAQEASABIAAD/2wBDAP////////////////////////////////////////////"
+    "//////////////////////////////////////////wgALCAABAAEBAREA/8QAFBABAAAAAAAAAAAA"
+    "AAAAAAAAAP/aAAgBAQABPxA="
+)
+FAKE_PDF = b"%PDF-1.4\n% fake filing\n" + b"0" * 4096 + b"\n%%EOF\n"
+
+RUMOR_PHRASES = ["reportedly", "in talks", "sources say", "likely to", "mulling", "exclusive"]
+PLAIN_PHRASES = ["shares rise", "posts results", "announces plan", "expands unit", "signs pact"]
+NSE_CATEGORIES = ["Dividend", "Appointment", "Resignation", "Press Release", "Outcome of Board Meeting",
+                  "Acquisition", "Trading Window", "Updates", "Order", "Shareholders meeting"]
+
+
+class BackendError(Exception):
+    pass
+
+
+class Backend:
+    """A fake remote service: sleeps for its latency, fails at its error rate, counts calls"""
+    def __init__(self, name, latency=0.0, jitter=0.0, error_rate=0.0, per_item=0.0, seed=0):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.per_item = per_item
+        self.rng = random.Random(f"{name}-{seed}")
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.errors = 0
+        self.busy = 0.0
+
+    def hit(self, items=1):
+        self.calls += 1
+        delay = self.latency + self.per_item * max(items - 1, 0)
+        if self.jitter: delay += self.rng.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+            self.busy += delay
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            raise BackendError(f"{self.name}: injected failure")
+
+
+# Rough shape of the real services (seconds). Override from the CLI.
+DEFAULT_PROFILE = {
+    "ee": {"latency": 0.25, "jitter": 0.15},
+    "yfinance": {"latency": 0.15, "jitter": 0.05, "per_item": 0.002},
+    "googlenews": {"latency": 0.30, "jitter": 0.20},
+    "nse": {"latency": 0.20, "jitter": 0.10},
+    "telegram": {"latency": 0.10, "jitter": 0.05},
+    "gemini": {"latency": 0.60, "jitter": 0.40},
+    "github": {"latency": 0.05},
+    "git": {},
+    "other": {},
+}
+
+BACKENDS = {}
+
+
+def configure(profile=None, seed=0):
+    merged = {name: dict(opts) for name, opts in DEFAULT_PROFILE.items()}
+    for name, opts in (profile or {}).items():
+        merged.setdefault(name, {}).update(opts)
+    BACKENDS.clear()
+    for name, opts in merged.items():
+        BACKENDS[name] = Backend(name, seed=seed, **opts)
+    return BACKENDS
+
+
+def reset_stats():
+    for b in BACKENDS.values(): b.reset()
+
+
+def stats():
+    return {name: {"calls": b.calls, "errors": b.errors, "busy_s": round(b.busy, 3)}
+            for name, b in BACKENDS.items() if b.calls}
+
+
+def _rng(*parts):
+    seed = hashlib.md5("|".join(map(str, parts)).encode()).hexdigest()
+    return random.Random(seed)
+
+
+def _jpeg(width, height, seed):
+    try:
+        from PIL import Image
+    except ImportError:
+        return TINY_JPEG
+    rng = np.random.default_rng(int(hashlib.md5(str(seed).encode()).hexdigest()[:8], 16))
+    pixels = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format="JPEG", quality=70)
+    return buf.getvalue()
+
+
+# ==========================================
+# EARTH ENGINE
+# ==========================================
+class FakeComputed:
+    """Lazy stand-in for ee objects: chains freely, only getInfo()/getThumbURL() hit the backend"""
+    def __init__(self, ops=()):
+        self._ops = tuple(ops)
+
+    def __call__(self, *args, **kwargs):
+        return FakeComputed(self._ops + (("__call__", args, kwargs),))
+
+    def __getattr__(self, name):
+        if name.startswith("__"): raise AttributeError(name)
+        def method(*args, **kwargs):
+            return FakeComputed(self._ops + ((name, args, kwargs),))
+        return method
+
+    def _scene_ids(self):
+        rng = _rng("scenes", self._ops[:3])
+        day = datetime.now().date()
+        ids = []
+        for _ in range(rng.randint(6, 12)):
+            day -= timedelta(days=5)
+            ids.append(f"{day:%Y%m%d}T050659_{day:%Y%m%d}T051234_T43QFF")
+        return ids
+
+    def getInfo(self):
+        BACKENDS["ee"].hit()
+        names = [op[0] for op in self._ops]
+        ids = self._scene_ids()
+        limit = next((op[1][0] for op in reversed(self._ops) if op[0] == "limit" and op[1]), None)
+        if limit: ids = ids[:limit]
+        if "size" in names: return len(ids)
+        if "aggregate_array" in names: return ids
+        if "get" in names: return ids[0]
+        return {}
+
+    def getThumbURL(self, params=None):
+        BACKENDS["ee"].hit()
+        params = params or {}
+        dims = params.get("dimensions", 700)
+        region = params.get("region")
+        # Same region + bands -> same pixels, like an unchanged site between runs
+        key = repr((getattr(region, "_ops", region), params.get("bands"), dims))
+        return f"https://earthengine.googleapis.com/v1/thumbnails/fake-{hashlib.md5(key.encode()).hexdigest()[:12]}:getPixels?dimensions={dims}"
+
+
+def _make_ee():
+    ee = types.ModuleType("ee")
+    ee.Initialize = lambda *a, **k: None
+    for name in ["Geometry", "ImageCollection", "Image", "Filter", "Date", "Number", "List", "Reducer"]:
+        setattr(ee, name, FakeComputed(((name, (), {}),)))
+    ee.data = FakeComputed((("data", (), {}),))
+    return ee
+
+
+# ==========================================
+# YFINANCE
+# ==========================================
+_PERIOD_DAYS = {"1d": 1, "5d": 5, "1mo": 30, "3mo": 90, "6mo": 182, "1y": 365, "2y": 730, "5y": 1825}
+_INTERVAL_MIN = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30, "60m": 60, "1h": 60}
+
+
+def _bar_index(period=None, start=None, interval="1d"):
+    end = datetime.now()
+    if start is not None:
+        begin = pd.Timestamp(start).to_pydatetime()
+    else:
+        begin = end - timedelta(days=_PERIOD_DAYS.get(period or "1mo", 30))
+    if interval in _INTERVAL_MIN:
+        step = _INTERVAL_MIN[interval]
+        begin = max(begin, end - timedelta(days=5))
+        idx = pd.date_range(begin, end, freq=f"{step}min").floor(f"{step}min")
+        # Market hours only: 09:15 - 15:30
+        minutes = idx.hour * 60 + idx.minute
+        return idx[(minutes >= 555) & (minutes <= 930) & (idx.dayofweek < 5)]
+    return pd.bdate_range(begin.date(), end.date())
+
+
+def _ohlcv(ticker, index):
+    rng = np.random.default_rng(int(hashlib.md5(ticker.encode()).hexdigest()[:8], 16))
+    base = rng.uniform(50, 3000)
+    # Walk anchored on the latest bar, so overlapping windows agree on prices
+    steps = rng.normal(0, 0.015, size=5000)[-len(index):] if len(index) else np.array([])
+    close = base * np.exp(-(np.cumsum(steps[::-1])[::-1] - steps))
+    frame = pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.003, len(index))),
+        "High": close * 1.01, "Low": close * 0.99, "Close": close,
+        "Volume": rng.integers(1e4, 1e6, len(index)).astype(float),
+    }, index=index)
+    return frame
+
+
+def _fake_download(tickers, period=None, interval="1d", start=None, end=None, progress=True, **kwargs):
+    names = tickers.split() if isinstance(tickers, str) else list(tickers)
+    BACKENDS["yfinance"].hit(items=len(names))
+    index = _bar_index(period, start, interval)
+    if isinstance(tickers, str) and len(names) == 1:
+        return _ohlcv(names[0], index)
+    frames = {t: _ohlcv(t, index) for t in names}
+    combined = pd.concat(frames, axis=1)  # (Ticker, Price)
+    return combined.swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+
+class _FakeTicker:
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    @property
+    def info(self):
+        BACKENDS["yfinance"].hit()
+        rng = _rng("info", self.ticker)
+        hist = _ohlcv(self.ticker, _bar_index("1mo"))
+        return {"currentPrice": float(hist["Close"].iloc[-1]), "trailingPE": rng.uniform(5, 60),
+                "symbol": self.ticker}
+
+    def history(self, period="1mo", interval="1d", **kwargs):
+        BACKENDS["yfinance"].hit()
+        return _ohlcv(self.ticker, _bar_index(period, interval=interval))
+
+
+def _make_yfinance():
+    yf = types.ModuleType("yfinance")
+    yf.download = _fake_download
+    yf.Ticker = _FakeTicker
+    return yf
+
+
+# ==========================================
+# GOOGLE NEWS
+# ==========================================
+class FakeGoogleNews:
+    def __init__(self, lang="en", region="", period="", **kwargs):
+        self._results = []
+
+    def set_lang(self, lang): pass
+    def set_encode(self, enc): pass
+    def set_period(self, period): pass
+
+    def search(self, query):
+        BACKENDS["googlenews"].hit()
+        rng = _rng("news", query, datetime.now().strftime("%Y%m%d%H"))
+        for i in range(rng.randint(4, 10)):
+            phrase = rng.choice(RUMOR_PHRASES if rng.random() < 0.35 else PLAIN_PHRASES)
+            self._results.append({
+                "title": f"{query.split(' ', 1)[-1]} {phrase} {rng.choice(['deal', 'stake', 'capacity', 'growth'])} {i}",
+                "link": f"./articles/{hashlib.md5(f'{query}{i}'.encode()).hexdigest()[:12]}",
+                "date": f"{rng.randint(1, 59)} mins ago",
+                "media": rng.choice(["Mint", "ET", "Reuters", "BS", "Moneycontrol"]),
+            })
+            if rng.random() < 0.5:  # Data releases quote a figure
+                self._results[-1]["title"] += f" at {rng.uniform(0.5, 12):.2f}{rng.choice(['%', ' lakh crore', ' bn'])}"
+
+    def result(self):
+        return list(self._results)
+
+    def results(self):
+        return self.result()
+
+    def clear(self):
+        self._results = []
+
+
+def _make_googlenews():
+    mod = types.ModuleType("GoogleNews")
+    mod.GoogleNews = FakeGoogleNews
+    return mod
+
+
+# ==========================================
+# GEMINI
+# ==========================================
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        BACKENDS["gemini"].hit()
+        rng = _rng("gemini", prompt)
+        verdict = rng.choice(["BULLISH", "BEARISH", "NEUTRAL"])
+        if generation_config and "json" in str(generation_config.get("response_mime_type", "")):
+            return _FakeResponse(json.dumps({"trend": verdict, "report": f"🌍 **MACRO REGIME:** {verdict} (bench)"}))
+        if "IMPACT" in prompt:
+            return _FakeResponse(f"IMPACT: {verdict}\nINSIGHT: Benchmark insight.")
+        if "SENTIMENT" in prompt:
+            sentiment = {"BULLISH": "POSITIVE", "BEARISH": "NEGATIVE"}.get(verdict, "NEUTRAL")
+            return _FakeResponse(f"SENTIMENT: {sentiment}\nCOMMENT: Benchmark commentary.")
+        return _FakeResponse(f"CREDIBILITY: Speculation. IF TRUE, IMPACT: {verdict.title()}.")
+
+
+def _make_genai():
+    genai = types.ModuleType("google.generativeai")
+    genai.configure = lambda *a, **k: None
+    genai.GenerativeModel = FakeGenerativeModel
+    return genai
+
+
+def _make_service_account():
+    mod = types.ModuleType("google.oauth2.service_account")
+    class Credentials:
+        @classmethod
+        def from_service_account_info(cls, info, scopes=None): return cls()
+    mod.Credentials = Credentials
+    return mod
+
+
+# ==========================================
+# HTTP (NSE, TELEGRAM, EE THUMBNAILS, GITHUB)
+# ==========================================
+def nse_announcements(count=40):
+    now = datetime.now()
+    rng = _rng("nse", now.strftime("%Y%m%d%H%M"))
+    items = []
+    for i in range(count):
+        symbol = rng.choice(["RELIANCE", "HINDALCO", "TATASTEEL", "NMDC", "COALINDIA", "INFY", "ZOMATO", "PAYTM"])
+        category = rng.choice(NSE_CATEGORIES)
+        stamp = now - timedelta(minutes=rng.randint(0, 30))
+        items.append({
+            "symbol": symbol, "desc": category,
+            "attchmntText": f"{symbol}_{stamp:%d%m%Y%H%M%S}_{i}.pdf",
+            "an_dt": stamp.strftime("%d-%b-%Y %H:%M:%S"),
+            "series": rng.choice(["EQ", "EQ", "EQ", "SM"]),
+            "subject": f"{category} - {symbol} intimation {i}",
+        })
+    return items
+
+
+NSE_ANNOUNCEMENT_COUNT = 40
+FILING_PAGES = 4
+
+
+def _filing_pdf(name):
+    """A small multi-page filing with extractable text (falls back to FAKE_PDF without fpdf)"""
+    try:
+        from fpdf import FPDF
+    except ImportError:
+        return FAKE_PDF
+    symbol = name.split("_", 1)[0]
+    rng = _rng("pdf", name)
+    pdf = FPDF()
+    pdf.set_font("Arial", size=10)
+    for page in range(FILING_PAGES):
+        pdf.add_page()
+        pdf.multi_cell(0, 5, f"{symbol} Limited - intimation under Regulation 30 (page {page + 1}).\n\n"
+                             f"The Board approved an order worth Rs {rng.randint(10, 5000)} crore, "
+                             f"a change of {rng.uniform(-20, 20):.1f}% over last year.\n\n"
+                             + "This is boilerplate disclosure text repeated for length. " * 20)
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def _response(url, status=200, body=b"", content_type="application/octet-stream"):
+    r = requests.models.Response()
+    r.status_code = status
+    r.url = url
+    r._content = body
+    r._content_consumed = True
+    r.headers["Content-Type"] = content_type
+    r.encoding = "utf-8"
+    return r
+
+
+def _route(method, url, **kwargs):
+    parsed = urllib.parse.urlparse(url)
+    host = parsed.netloc
+
+    if host == "api.telegram.org":
+        BACKENDS["telegram"].hit()
+        return _response(url, body=json.dumps({"ok": True, "result": {"message_id": BACKENDS["telegram"].calls}}).encode(),
+                         content_type="application/json")
+    if host == "earthengine.googleapis.com":
+        BACKENDS["ee"].hit()
+        dims = int(urllib.parse.parse_qs(parsed.query).get("dimensions", ["700"])[0].split("x")[0])
+        side = max(16, min(dims, 1024))
+        return _response(url, body=_jpeg(side, side, parsed.path), content_type="image/jpeg")
+    if host.endswith("nseindia.com"):
+        BACKENDS["nse"].hit()
+        if "/api/corporate-announcements" in parsed.path:
+            return _response(url, body=json.dumps(nse_announcements(NSE_ANNOUNCEMENT_COUNT)).encode(),
+                             content_type="application/json")
+        if parsed.path.endswith(".pdf"):
+            return _response(url, body=_filing_pdf(os.path.basename(parsed.path)), content_type="application/pdf")
+        if parsed.path.endswith(".csv"):
+            rows = "\n".join(f"SYM{i},Company {i},EQ" for i in range(2000))
+            return _response(url, body=f"SYMBOL,NAME OF COMPANY,SERIES\n{rows}\n".encode(), content_type="text/csv")
+        return _response(url, body=b"<html>nse</html>", content_type="text/html")
+    if host == "raw.githubusercontent.com":
+        BACKENDS["github"].hit()
+        if os.path.exists("market_memory.json"):
+            with open("market_memory.json", "rb") as f:
+                return _response(url, body=f.read(), content_type="application/json")
+        return _response(url, status=404)
+
+    BACKENDS["other"].hit()
+    return _response(url, status=404)
+
+
+def _fake_session_request(self, method, url, **kwargs):
+    try:
+        return _route(method, url, **kwargs)
+    except BackendError as e:
+        # Injected failures look like a connection that never came up
+        raise requests.ConnectTimeout(str(e))
+
+
+def _fake_system(command):
+    if command.strip().startswith("git"):
+        BACKENDS["git"].hit()
+        return 0
+    return _real_system(command)
+
+
+def _fake_run(args, *a, **kwargs):
+    if args and args[0] == "git":
+        BACKENDS["git"].hit()
+        return subprocess.CompletedProcess(args, 0, stdout="", stderr="")
+    return _real_run(args, *a, **kwargs)
+
+
+_real_system = os.system
+_real_run = subprocess.run
+_real_session_request = requests.sessions.Session.request
+
+
+def install(profile=None, seed=0):
+    """Swaps every remote dependency for its fake. Must run before importing the bots."""
+    configure(profile, seed)
+    if "google" not in sys.modules:
+        try:
+            import google  # noqa: F401 (namespace package from google-auth / protobuf)
+        except ImportError:
+            pkg = types.ModuleType("google")
+            pkg.__path__ = []
+            sys.modules["google"] = pkg
+    google = sys.modules["google"]
+    oauth2 = types.ModuleType("google.oauth2")
+    oauth2.__path__ = []
+    oauth2.service_account = _make_service_account()
+
+    fakes = {
+        "ee": _make_ee(),
+        "yfinance": _make_yfinance(),
+        "GoogleNews": _make_googlenews(),
+        "google.generativeai": _make_genai(),
+        "google.oauth2": oauth2,
+        "google.oauth2.service_account": oauth2.service_account,
+    }
+    sys.modules.update(fakes)
+    google.generativeai = fakes["google.generativeai"]
+    google.oauth2 = oauth2
+
+    requests.sessions.Session.request = _fake_session_request
+    os.system = _fake_system
+    subprocess.run = _fake_run
+
+
+def uninstall():
+    requests.sessions.Session.request = _real_session_request
+    os.system = _real_system
+    subprocess.run = _real_run
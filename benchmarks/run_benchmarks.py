@@ -0,0 +1,213 @@
+"""
+Offline end-to-end benchmarks for the bots.
+
+Runs each bot against the fakes in benchmarks/fakes.py inside a scratch
+directory and records wall time, calls per backend and peak Python memory.
+
+  python -m benchmarks.run_benchmarks                       # all scenarios
+  python -m benchmarks.run_benchmarks -s news gossip        # a subset
+  python -m benchmarks.run_benchmarks --latency gemini=1.5 --errors telegram=0.1
+  python -m benchmarks.run_benchmarks --warm --repeat 3              # caches kept between runs
+  python -m benchmarks.run_benchmarks --save benchmarks/baseline.json
+  python -m benchmarks.run_benchmarks --compare benchmarks/baseline.json
+
+Needs the local libraries the bots use (pandas, numpy, requests, fpdf,
+pillow); every remote service is faked.
+"""
+import io
+import os
+import sys
+import json
+import time
+import runpy
+import shutil
+import argparse
+import tempfile
+import importlib
+import statistics
+import tracemalloc
+import contextlib
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path: sys.path.insert(0, REPO_ROOT)
+
+from benchmarks import fakes
+
+BOT_MODULES = ["main", "sniper_bot", "news_bot", "gossip_bot", "macro_bot",
+               "market_memory", "watchlist_manager", "paper_trader", "universe", "sentiment_model", "story_index"]
+STATE_FILES = ["market_memory.json", "sites.json"]
+
+BENCH_ENV = {
+    "TELEGRAM_TOKEN": "bench-token",
+    "TELEGRAM_CHAT_ID": "bench-chat",
+    "GEMINI_API_KEY": "bench-key",
+    "REPO_OWNER": "bench-owner",
+    "REPO_NAME": "bench-repo",
+    "EE_KEY": "",
+}
+
+
+def fresh_import(name):
+    """Bots read secrets at import time, so every scenario gets a clean import"""
+    for mod in BOT_MODULES:
+        sys.modules.pop(mod, None)
+    return importlib.import_module(name)
+
+
+SCENARIOS = {
+    "main": lambda: runpy.run_path(os.path.join(REPO_ROOT, "main.py"), run_name="__main__"),
+    "sniper": lambda: fresh_import("sniper_bot").scan_market(),
+    "universe": lambda: fresh_import("sniper_bot").run_universe_scan(),
+    "news": lambda: fresh_import("news_bot").check_for_fresh_news(),
+    "gossip": lambda: fresh_import("gossip_bot").hunt_for_gossip(),
+    "macro": lambda: fresh_import("macro_bot").run_omni_scanner(),
+}
+
+
+def make_scratch(name):
+    scratch = tempfile.mkdtemp(prefix=f"bench-{name}-")
+    for fname in STATE_FILES:
+        src = os.path.join(REPO_ROOT, fname)
+        if os.path.exists(src): shutil.copy(src, scratch)
+    return scratch
+
+
+def run_once(name, verbose=False, scratch=None):
+    keep = scratch is not None
+    scratch = scratch or make_scratch(name)
+    cwd = os.getcwd()
+    fakes.reset_stats()
+    if "http_client" in sys.modules: sys.modules["http_client"].reset_stats()
+    status = "ok"
+    out = io.StringIO()
+    os.chdir(scratch)
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(sys.stdout if verbose else out):
+            SCENARIOS[name]()
+    except SystemExit:
+        pass
+    except Exception as e:
+        status = f"error: {type(e).__name__}: {e}"
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Bots flush their trace at interpreter exit; here we flush per scenario
+    trace = None
+    tracing = sys.modules.get("tracing")
+    if tracing and tracing._run["bot"]:
+        trace = tracing.summarize()
+        with contextlib.redirect_stdout(sys.stdout if verbose else out):
+            tracing.finish_run()
+    os.chdir(cwd)
+    if not keep: shutil.rmtree(scratch, ignore_errors=True)
+
+    return {"wall_s": round(wall, 3), "peak_mb": round(peak / 2 ** 20, 2),
+            "backends": fakes.stats(), "trace": trace, "status": status}
+
+
+def run_scenario(name, repeat=1, verbose=False, warm=False):
+    """warm=True reuses one scratch dir, so caches from the first (cold) run feed the rest"""
+    if warm:
+        scratch = make_scratch(name)
+        cold = run_once(name, verbose, scratch)
+        runs = [run_once(name, verbose, scratch) for _ in range(repeat)]
+        shutil.rmtree(scratch, ignore_errors=True)
+    else:
+        cold = None
+        runs = [run_once(name, verbose) for _ in range(repeat)]
+    result = dict(runs[-1])
+    if cold: result["cold_wall_s"] = cold["wall_s"]
+    result["wall_s"] = round(statistics.median(r["wall_s"] for r in runs), 3)
+    result["peak_mb"] = max(r["peak_mb"] for r in runs)
+    result["runs"] = repeat
+    return result
+
+
+def parse_overrides(pairs, field):
+    profile = {}
+    for pair in pairs or []:
+        backend, _, value = pair.partition("=")
+        profile.setdefault(backend, {})[field] = float(value)
+    return profile
+
+
+def print_table(results, baseline=None):
+    print(f"\n{'scenario':<10} {'wall s':>9} {'peak MB':>9}  backends (calls/errors)")
+    print("-" * 78)
+    for name, r in results.items():
+        calls = ", ".join(f"{b} {s['calls']}/{s['errors']}" for b, s in sorted(r["backends"].items()))
+        line = f"{name:<10} {r['wall_s']:>9.2f} {r['peak_mb']:>9.2f}  {calls}"
+        if r.get("cold_wall_s") is not None: line += f"  (cold {r['cold_wall_s']:.2f}s)"
+        if baseline and name in baseline.get("results", {}):
+            base = baseline["results"][name]
+            if base["wall_s"]:
+                line += f"  [wall {(r['wall_s'] - base['wall_s']) / base['wall_s'] * 100:+.0f}%"
+                line += f", mem {r['peak_mb'] - base['peak_mb']:+.2f} MB]"
+        print(line)
+        if r["status"] != "ok": print(f"{'':<10} ⚠️ {r['status']}")
+        if r.get("trace"):
+            slow = ", ".join(f"{b} p50 {t['p50_ms']:.0f}/p95 {t['p95_ms']:.0f} ms"
+                             for b, t in list(r["trace"]["backends"].items())[:3])
+            print(f"{'':<10}   slowest backends: {slow}")
+        if baseline and name in baseline.get("results", {}):
+            base_calls = baseline["results"][name]["backends"]
+            for b in sorted(set(base_calls) | set(r["backends"])):
+                before = base_calls.get(b, {}).get("calls", 0)
+                after = r["backends"].get(b, {}).get("calls", 0)
+                if before != after: print(f"{'':<10}   {b}: {before} -> {after} calls")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline bot benchmarks")
+    parser.add_argument("-s", "--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--latency", action="append", metavar="BACKEND=SECONDS")
+    parser.add_argument("--jitter", action="append", metavar="BACKEND=SECONDS")
+    parser.add_argument("--errors", action="append", metavar="BACKEND=RATE")
+    parser.add_argument("--nse-items", type=int, default=fakes.NSE_ANNOUNCEMENT_COUNT)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warm", action="store_true", help="one cold run first, then measure with caches kept")
+    parser.add_argument("--save", metavar="PATH", help="write results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="diff against a saved baseline")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show bot output")
+    args = parser.parse_args(argv)
+
+    profile = {}
+    for field, pairs in [("latency", args.latency), ("jitter", args.jitter), ("error_rate", args.errors)]:
+        for backend, opts in parse_overrides(pairs, field).items():
+            profile.setdefault(backend, {}).update(opts)
+
+    os.environ.update(BENCH_ENV)
+    fakes.install(profile, seed=args.seed)
+    fakes.NSE_ANNOUNCEMENT_COUNT = args.nse_items
+
+    results = {}
+    try:
+        for name in args.scenarios:
+            print(f"⏱️  {name}...")
+            results[name] = run_scenario(name, repeat=args.repeat, verbose=args.verbose, warm=args.warm)
+    finally:
+        fakes.uninstall()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    if args.save:
+        payload = {"created": datetime.now().isoformat(timespec="seconds"),
+                   "profile": {n: {"latency": b.latency, "jitter": b.jitter, "error_rate": b.error_rate,
+                                   "per_item": b.per_item} for n, b in fakes.BACKENDS.items()},
+                   "results": results}
+        with open(args.save, "w") as f:
+            json.dump(payload, f, indent=4)
+        print(f"\n💾 Baseline saved: {args.save}")
+
+
+if __name__ == "__main__":
+    main()
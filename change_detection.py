@@ -0,0 +1,109 @@
+import os
+import re
+import json
+import numpy as np
+from datetime import datetime
+from PIL import Image
+
+# --- CONFIGURATION ---
+SCENE_CACHE_DIR = "data/scene_cache"
+SCENE_INDEX = os.path.join(SCENE_CACHE_DIR, "index.json")
+COMPARE_SIZE = 256        # Scenes are compared on a 256x256 grid
+PIXEL_DELTA = 0.12        # Per-band change (0-1 scale) that marks a pixel as changed
+CHANGE_THRESHOLD_PCT = float(os.environ.get("CHANGE_THRESHOLD_PCT", "2.0"))
+
+
+def _slug(name):
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def load_index():
+    if not os.path.exists(SCENE_INDEX): return {}
+    try:
+        with open(SCENE_INDEX, "r") as f:
+            return json.load(f)
+    except:
+        return {}
+
+
+def save_index(index):
+    os.makedirs(SCENE_CACHE_DIR, exist_ok=True)
+    with open(SCENE_INDEX, "w") as f:
+        json.dump(index, f, indent=4)
+
+
+def load_scene(image_file):
+    """Image -> float32 (H, W, bands) array on the 0-1 scale, resampled to the comparison grid"""
+    with Image.open(image_file) as img:
+        img = img.convert("RGB").resize((COMPARE_SIZE, COMPARE_SIZE), Image.BILINEAR)
+        return np.asarray(img, dtype=np.float32) / 255.0
+
+
+def compare_scenes(previous, current):
+    """Per-band differences, change mask and changed-area percentage between two scenes"""
+    # Remove each band's median first so a brighter/darker acquisition doesn't read as change
+    prev = previous - np.median(previous, axis=(0, 1))
+    cur = current - np.median(current, axis=(0, 1))
+    diff = np.abs(cur - prev)
+    mask = (diff > PIXEL_DELTA).any(axis=2)
+    return {
+        "changed_pct": round(float(mask.mean() * 100), 2),
+        "band_delta": [round(float(d), 4) for d in diff.mean(axis=(0, 1))],
+        "mask": mask,
+    }
+
+
+def detect_change(name, image_file, scene_id=None, index=None):
+    """
+    Compares a target's new image with its cached previous scene, then caches
+    the new one. Returns changed_pct, band_delta, first_seen and changed.
+    """
+    own_index = index is None
+    index = load_index() if own_index else index
+    slug = _slug(name)
+    cache_file = os.path.join(SCENE_CACHE_DIR, f"{slug}.npy")
+    entry = index.get(slug, {})
+
+    result = {"changed_pct": 100.0, "band_delta": [], "first_seen": True, "same_scene": False}
+    if scene_id and entry.get("scene_id") == scene_id and os.path.exists(cache_file):
+        # Same acquisition as last run: nothing on the ground can have changed
+        result.update(changed_pct=0.0, first_seen=False, same_scene=True)
+    else:
+        current = load_scene(image_file)
+        if os.path.exists(cache_file):
+            previous = np.load(cache_file).astype(np.float32) / 255.0
+            if previous.shape == current.shape:
+                stats = compare_scenes(previous, current)
+                result.update(changed_pct=stats["changed_pct"], band_delta=stats["band_delta"], first_seen=False)
+        os.makedirs(SCENE_CACHE_DIR, exist_ok=True)
+        np.save(cache_file, np.round(current * 255).astype(np.uint8))
+        index[slug] = {"scene_id": scene_id, "updated": datetime.now().isoformat(timespec="seconds"),
+                       "changed_pct": result["changed_pct"]}
+
+    result["changed"] = result["first_seen"] or result["changed_pct"] >= CHANGE_THRESHOLD_PCT
+    if own_index: save_index(index)
+    return result
+
+
+def preview_change(name, image_file, scene_id=None, index=None):
+    """
+    detect_change without touching the cache, for on-demand checks: the daily
+    scan still compares against the same baseline afterwards.
+    """
+    index = load_index() if index is None else index
+    slug = _slug(name)
+    cache_file = os.path.join(SCENE_CACHE_DIR, f"{slug}.npy")
+    entry = index.get(slug, {})
+
+    result = {"changed_pct": 100.0, "band_delta": [], "first_seen": True, "same_scene": False}
+    if scene_id and entry.get("scene_id") == scene_id:
+        # Already scanned: report the change measured when this scene arrived
+        result.update(changed_pct=entry.get("changed_pct", 0.0), first_seen=False, same_scene=True)
+    elif os.path.exists(cache_file):
+        previous = np.load(cache_file).astype(np.float32) / 255.0
+        current = load_scene(image_file)
+        if previous.shape == current.shape:
+            stats = compare_scenes(previous, current)
+            result.update(changed_pct=stats["changed_pct"], band_delta=stats["band_delta"], first_seen=False)
+    result["changed"] = result["first_seen"] or result["changed_pct"] >= CHANGE_THRESHOLD_PCT
+    return result
@@ -0,0 +1,237 @@
+import os
+import json
+import threading
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from datetime import datetime, timedelta, time as dtime
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+from indicators import rsi_frame, RSI_LENGTH
+
+# --- CONFIGURATION ---
+STORE_DIR = "data/features"
+MATRIX_FILE = os.path.join(STORE_DIR, "features.npy")   # float32, column-major (one column = one feature)
+INDEX_FILE = os.path.join(STORE_DIR, "features.json")   # tickers, columns, build time
+MARKET_TZ = ZoneInfo("Asia/Kolkata")
+SESSION_OPEN = dtime(9, 15)     # NSE cash session (IST)
+SESSION_SETTLED = dtime(15, 45) # Close + a few minutes for the final daily bar to show up
+HISTORY_PERIOD = "6mo"
+INFO_WORKERS = 8
+
+COLUMNS = ["price", "ret_1d", "ret_5d", "ret_1m", "rsi_14", "pe", "confluence", "sat_change_pct"]
+COL = {name: i for i, name in enumerate(COLUMNS)}
+_write_lock = threading.Lock()  # Report workers update rows concurrently
+
+
+def valuation_signal(pe_ratio, change_pct):
+    """Shared P/E + 1-month momentum label (same rules the satellite report always used)"""
+    signal = "NEUTRAL"
+    if pe_ratio and pe_ratio > 0:
+        if pe_ratio < 15 and change_pct < 10: signal = "VALUE BUY"
+        elif pe_ratio > 40: signal = "OVERVALUED"
+        elif change_pct > 15: signal = "HEATED"
+    return signal
+
+
+def _normalize(ticker):
+    ticker = ticker.upper()
+    return ticker if ticker.endswith(".NS") or ticker.startswith("^") or "=" in ticker else f"{ticker}.NS"
+
+
+def default_universe():
+    from watchlist_manager import load_watchlist
+    from site_registry import load_sites
+    tickers = set(load_watchlist())
+    try:
+        tickers |= {s["ticker"] for s in load_sites().values() if s.get("ticker")}
+    except Exception:
+        pass
+    return sorted(_normalize(t) for t in tickers)
+
+
+# ==========================================
+# READ (memory-mapped, no recomputation)
+# ==========================================
+def load_index():
+    if not os.path.exists(INDEX_FILE) or not os.path.exists(MATRIX_FILE): return None
+    try:
+        with open(INDEX_FILE, "r") as f:
+            return json.load(f)
+    except:
+        return None
+
+
+def read_all():
+    """(index, matrix) for the whole universe. The matrix is a read-only memmap."""
+    index = load_index()
+    if index is None: return None, None
+    matrix = np.load(MATRIX_FILE, mmap_mode="r")
+    if matrix.shape != (len(index["tickers"]), len(index["columns"])): return None, None
+    return index, matrix
+
+
+def read_ticker(ticker):
+    """{feature: value} for one ticker, or None if it isn't in the store"""
+    index, matrix = read_all()
+    if index is None: return None
+    ticker = _normalize(ticker)
+    if ticker not in index["tickers"]: return None
+    row = matrix[index["tickers"].index(ticker)]
+    features = {col: (None if np.isnan(row[i]) else float(row[i])) for i, col in enumerate(index["columns"])}
+    features["valuation_signal"] = valuation_signal(features.get("pe"), features.get("ret_1m") or 0)
+    features["as_of"] = index.get("as_of")
+    features["built"] = index.get("built")
+    return features
+
+
+def last_boundary(now=None):
+    """
+    The latest session open or settled close at or before now (IST). A store built
+    before it is stale: one built during the session lacks the close, one built
+    yesterday lacks today's bars. Weekends roll back to Friday's close.
+    """
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    day = now.date()
+    while True:
+        if day.weekday() < 5:
+            for t in (SESSION_SETTLED, SESSION_OPEN):
+                boundary = datetime.combine(day, t, tzinfo=MARKET_TZ)
+                if boundary <= now: return boundary
+        day -= timedelta(days=1)
+
+
+def is_fresh(index=None, now=None):
+    """True if the store was built after the latest session boundary (same trading day, same phase)"""
+    index = index or load_index()
+    if not index: return False
+    built = datetime.fromisoformat(index["built"])
+    if built.tzinfo is None: built = built.astimezone()   # Older stores: runner-local time
+    return built >= last_boundary(now)
+
+
+# ==========================================
+# WRITE
+# ==========================================
+def _save(index, matrix):
+    os.makedirs(STORE_DIR, exist_ok=True)
+    tmp_matrix = MATRIX_FILE + ".tmp.npy"
+    np.save(tmp_matrix, np.asfortranarray(matrix, dtype=np.float32))
+    os.replace(tmp_matrix, MATRIX_FILE)
+    with open(INDEX_FILE + ".tmp", "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(INDEX_FILE + ".tmp", INDEX_FILE)
+
+
+def _fetch_pe(ticker):
+    try:
+        return float(yf.Ticker(ticker).info.get("trailingPE") or np.nan)
+    except Exception:
+        return np.nan
+
+
+def _satellite_activity():
+    """{ticker: changed_pct} from the change-detection cache"""
+    try:
+        from site_registry import load_sites
+        from change_detection import load_index as load_scene_index, _slug
+        scenes = load_scene_index()
+        activity = {}
+        for name, site in load_sites().items():
+            entry = scenes.get(_slug(name))
+            if site.get("ticker") and entry:
+                activity[_normalize(site["ticker"])] = entry.get("changed_pct", np.nan)
+        return activity
+    except Exception:
+        return {}
+
+
+def compute_features(tickers):
+    """All features for `tickers` from one batched price request. Returns (matrix, as_of)."""
+    from market_memory import load_memory, get_confluence_score
+    matrix = np.full((len(tickers), len(COLUMNS)), np.nan, dtype=np.float32)
+
+    with tracing.span("fetch", "yfinance", tickers=len(tickers)):
+        df = yf.download(tickers, period=HISTORY_PERIOD, interval="1d", progress=False, threads=True)
+    as_of = None
+    if not df.empty:
+        closes = df["Close"]
+        if isinstance(closes, pd.Series): closes = closes.to_frame(tickers[0])
+        closes = closes.reindex(columns=tickers).ffill()
+        as_of = str(pd.Timestamp(closes.index[-1]).date())
+        with tracing.span("indicator", "pandas", profile=True, tickers=len(tickers)):
+            last = closes.iloc[-1]
+            matrix[:, COL["price"]] = last.values
+            matrix[:, COL["ret_1d"]] = (closes.pct_change(1, fill_method=None).iloc[-1] * 100).values
+            matrix[:, COL["ret_5d"]] = (closes.pct_change(5, fill_method=None).iloc[-1] * 100).values
+            matrix[:, COL["ret_1m"]] = (closes.pct_change(21, fill_method=None).iloc[-1] * 100).values
+            matrix[:, COL["rsi_14"]] = rsi_frame(closes, RSI_LENGTH).iloc[-1].values
+
+    with tracing.span("fetch", "yfinance", call="info", tickers=len(tickers)):
+        with ThreadPoolExecutor(max_workers=INFO_WORKERS) as pool:
+            matrix[:, COL["pe"]] = list(pool.map(_fetch_pe, tickers))
+
+    mem = load_memory()
+    activity = _satellite_activity()
+    for i, t in enumerate(tickers):
+        matrix[i, COL["confluence"]] = get_confluence_score(t, mem=mem)
+        matrix[i, COL["sat_change_pct"]] = activity.get(t, np.nan)
+    return matrix, as_of
+
+
+def materialize(tickers=None, force=False):
+    """
+    Builds the store at most once per session phase (see is_fresh). If the store is
+    fresh but some tickers are missing, only those are computed and appended. A
+    rebuild keeps every ticker the store already had, so a small caller never shrinks it.
+    """
+    tickers = sorted({_normalize(t) for t in (tickers or default_universe())})
+    index, _ = read_all()   # None also when the matrix doesn't match the index: rebuild it
+    if not force and index and is_fresh(index):
+        missing = [t for t in tickers if t not in index["tickers"]]
+        if not missing: return index
+        print(f"🧮 [FEATURES] Adding {len(missing)} tickers to today's store")
+        extra, _ = compute_features(missing)
+        with _write_lock:
+            index, matrix = read_all()   # Re-read: another worker may have appended meanwhile
+            if index is None: return None
+            keep = [i for i, t in enumerate(missing) if t not in index["tickers"]]
+            if keep:
+                index = dict(index, tickers=index["tickers"] + [missing[i] for i in keep])
+                _save(index, np.vstack([np.asarray(matrix), np.asarray(extra)[keep]]))
+        return index
+
+    if index: tickers = sorted(set(tickers) | set(index["tickers"]))
+    print(f"🧮 [FEATURES] Materializing {len(tickers)} tickers...")
+    started = datetime.now(MARKET_TZ)   # Stamp the download time, not the end of the compute
+    matrix, as_of = compute_features(tickers)
+    index = {"built": started.isoformat(timespec="seconds"), "as_of": as_of,
+             "columns": COLUMNS, "tickers": tickers}
+    with _write_lock:
+        _save(index, matrix)
+    return index
+
+
+def update(ticker, **values):
+    """In-place update of a few features for one ticker (appends the ticker if it's new)"""
+    with _write_lock:
+        index = load_index()
+        if index is None: return False
+        ticker = _normalize(ticker)
+        if ticker in index["tickers"]:
+            matrix = np.load(MATRIX_FILE, mmap_mode="r+")
+            row = index["tickers"].index(ticker)
+            for col, value in values.items():
+                if col in COL: matrix[row, COL[col]] = np.nan if value is None else value
+            matrix.flush()
+            return True
+        row = np.full((1, len(index["columns"])), np.nan, dtype=np.float32)
+        for col, value in values.items():
+            if col in COL: row[0, COL[col]] = np.nan if value is None else value
+        _, matrix = read_all()
+        if matrix is None: return False   # Matrix and index disagree; the next materialize rebuilds
+        index["tickers"].append(ticker)
+        _save(index, np.vstack([np.asarray(matrix), row]))
+        return True
@@ -0,0 +1,159 @@
+import os
+import re
+import gzip
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import http_client
+import tracing
+
+# --- CONFIGURATION ---
+FILING_DIR = "data/filings"               # Extracted text, gzipped, one file per attachment
+DOWNLOAD_WORKERS = 8                      # PDFs downloading at once
+EXTRACT_WORKERS = os.cpu_count() or 1     # pypdf is pure Python, so extraction runs in processes
+MAX_PAGES = 15                            # Filings put the substance up front; stop reading after this
+MAX_CHARS = 40000
+EXCERPT_CHARS = 1500                      # What goes into the AI prompt
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+_lock = threading.Lock()
+_inflight = {}     # attachment -> Future[str]; one fetch per attachment, ever
+_io_pool = None
+_cpu_pool = None
+
+
+def _name(url):
+    return os.path.basename(url.split("?", 1)[0])
+
+
+def _cache_file(name):
+    return os.path.join(FILING_DIR, f"{re.sub(r'[^A-Za-z0-9._-]+', '_', name)}.txt.gz")
+
+
+def cached_text(name):
+    path = _cache_file(name)
+    if not os.path.exists(path): return None
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return f.read()
+
+
+def _store(name, text):
+    os.makedirs(FILING_DIR, exist_ok=True)
+    path = _cache_file(name)
+    with gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+
+def extract_text(pdf_path, max_pages=MAX_PAGES, max_chars=MAX_CHARS):
+    """Process-pool worker: reads page by page and stops as soon as it has enough text"""
+    from pypdf import PdfReader
+    parts, size = [], 0
+    try:
+        reader = PdfReader(pdf_path)
+        for i, page in enumerate(reader.pages):
+            if i >= max_pages or size >= max_chars: break
+            text = page.extract_text() or ""
+            parts.append(text)
+            size += len(text)
+    except Exception:
+        pass  # Scanned / broken PDFs just yield whatever was read
+    return "\n".join(parts)[:max_chars]
+
+
+def _pools():
+    global _io_pool, _cpu_pool
+    with _lock:
+        if _cpu_pool is None:
+            # Spawned, not forked: http_client's hedge pool and the NSE fetch threads already exist here
+            _cpu_pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            _cpu_pool.submit(int).result()  # Pay the worker start-up before the first PDF arrives
+            _io_pool = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix="filing")
+    return _io_pool, _cpu_pool
+
+
+def _fetch_and_extract(url, name, cpu_pool):
+    pdf_path = os.path.join(FILING_DIR, "pdf", name)
+    with tracing.span("fetch", "nse", call="attachment"):
+        ok = http_client.download(url, pdf_path, headers=HEADERS, timeout=(5, 30))
+    if not ok: raise IOError(f"download failed: {name}")
+    try:
+        with tracing.span("indicator", "pypdf", attachment=name):
+            text = cpu_pool.submit(extract_text, pdf_path).result()
+    finally:
+        os.remove(pdf_path)
+    _store(name, text)  # Empty text is cached too, so an unreadable PDF is not fetched again
+    tracing.count("filings_read")
+    return text
+
+
+def prefetch(urls):
+    """
+    Starts every attachment that is not cached or already in flight; returns
+    immediately. A burst of filings downloads and extracts in parallel.
+    """
+    io_pool = cpu_pool = None
+    for url in urls:
+        if not url: continue
+        name = _name(url)
+        with _lock:
+            if name in _inflight: continue
+        if cached_text(name) is not None:
+            tracing.count("filings_cached")
+            continue
+        if io_pool is None: io_pool, cpu_pool = _pools()
+        with _lock:
+            if name in _inflight: continue
+            _inflight[name] = io_pool.submit(_fetch_and_extract, url, name, cpu_pool)
+
+
+def get_text(url, timeout=60):
+    """Full extracted text ('' if unavailable). Waits for a prefetch that is still running."""
+    name = _name(url)
+    text = cached_text(name)
+    if text is not None: return text
+    prefetch([url])
+    with _lock:
+        future = _inflight.get(name)
+    if future is None: return cached_text(name) or ""
+    try:
+        return future.result(timeout=timeout)
+    except Exception as e:
+        # The failed future stays in _inflight, so only a later run tries this attachment again
+        print(f"⚠️ Filing unavailable ({name}): {e}")
+        return ""
+
+
+def excerpt(text, keywords=(), max_chars=EXCERPT_CHARS):
+    """The most informative paragraphs (keyword and figure hits), kept in document order"""
+    if not text: return ""
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n|(?<=[.:])\n", text) if len(p.strip()) > 40]
+    words = [k.lower() for k in keywords if k]
+
+    def score(p):
+        low = p.lower()
+        return (3 * sum(low.count(w) for w in words) + len(re.findall(r"(?:rs\.?|inr|₹|crore|lakh|%)", low))
+                + len(re.findall(r"\d[\d,.]*", p)) * 0.2)
+
+    ranked = sorted(range(len(paragraphs)), key=lambda i: -score(paragraphs[i]))
+    chosen, size = [], 0
+    for i in ranked:
+        if size + len(paragraphs[i]) > max_chars and chosen: continue
+        chosen.append(i)
+        size += len(paragraphs[i])
+        if size >= max_chars: break
+    return "\n".join(" ".join(paragraphs[i].split()) for i in sorted(chosen))[:max_chars]
+
+
+def shutdown():
+    global _io_pool, _cpu_pool
+    with _lock:
+        if _io_pool: _io_pool.shutdown(wait=True)
+        if _cpu_pool: _cpu_pool.shutdown(wait=True)
+        _io_pool = _cpu_pool = None
+        _inflight.clear()
@@ -1,9 +1,13 @@
 import os
-import requests
+import http_client
 import urllib.parse
 import google.generativeai as genai
 from GoogleNews import GoogleNews
 from datetime import datetime
+import tracing
+import intel_archive
+import sentiment_model
+import story_index
 
 # --- CONFIGURATION ---
 TARGETS = [
@@ -17,6 +21,7 @@ RUMOR_KEYWORDS = [
     "considering", "mulling", "exclusive", "potential deal",
     "unconfirmed", "buzz", "spotted", "leak"
 ]
+MAX_SOURCES_LISTED = 8   # Outlets linked in one cluster alert
 
 # SECRETS
 BOT_TOKEN = os.environ.get("TELEGRAM_TOKEN")
@@ -63,7 +68,8 @@ def get_ai_opinion(headline):
     for m in models_to_try:
         try:
             model = genai.GenerativeModel(m)
-            response = model.generate_content(prompt)
+            with tracing.span("llm", "gemini", model=m):
+                response = model.generate_content(prompt)
             return response.text.strip()
         except: continue
             
@@ -73,9 +79,11 @@ def send_telegram(msg):
     if not BOT_TOKEN or not CHAT_ID: return
     url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
     payload = {"chat_id": CHAT_ID, "text": msg, "parse_mode": "HTML", "disable_web_page_preview": True}
-    requests.post(url, json=payload)
+    with tracing.span("send", "telegram"):
+        http_client.post(url, json=payload)
 
 def hunt_for_gossip():
+    tracing.start_run("gossip_bot")
     print(f"🕵️‍♂️ Gossip Hunter Active... [{datetime.now().strftime('%H:%M')}]")
     
     # Look back 4 hours
@@ -84,10 +92,12 @@ def hunt_for_gossip():
     googlenews.set_encode('utf-8')
     
     seen_links = set()
+    run_clusters = {}  # cluster id -> target it was found under, in discovery order
     
     for target in TARGETS:
         search_query = f"{target} India"
-        googlenews.search(search_query)
+        with tracing.span("fetch", "googlenews", query=search_query):
+            googlenews.search(search_query)
         results = googlenews.result()
         googlenews.clear()
         
@@ -98,28 +108,58 @@ def hunt_for_gossip():
             # --- FIX 1: BETTER CLEANER ---
             link = clean_google_link(raw_link)
             
-            # --- FIX 2: FALLBACK SEARCH LINK ---
-            # This generates a Google Search URL for the title. It 100% works.
-            safe_search_url = f"https://www.google.com/search?q={urllib.parse.quote(title)}"
-            
             # FILTER: Must contain a Rumor Keyword
             is_gossip = any(k.lower() in title.lower() for k in RUMOR_KEYWORDS)
             
             if is_gossip and link not in seen_links:
                 seen_links.add(link)
-                
-                print(f"👀 Spot: {title}")
-                
-                ai_take = get_ai_opinion(title)
-                
-                msg = (
-                    f"🤫 <b>GOSSIP DETECTED</b> | {target}\n\n"
-                    f"🗣️ <i>{title}</i>\n\n"
-                    f"🔮 <b>AI READ:</b>\n<pre>{ai_take}</pre>\n\n"
-                    f"🔗 <a href='{link}'>Direct Link</a> | <a href='{safe_search_url}'>🔎 Google Search</a>"
-                )
-                
-                send_telegram(msg)
+                # Hourly runs look back 4h, so the same story comes round again; archived = already sent
+                if intel_archive.lookup(f"gossip:{link}"):
+                    tracing.count("already_archived")
+                    continue
+                # Outlets re-word the same rumor; near-duplicates join one cluster
+                cluster_id, status = story_index.assign(title, "gossip", link=link, outlet=item.get('media'))
+                if status != "seen":
+                    tracing.count("gossip_hits")
+                    print(f"👀 Spot: {title}" + (" (same story)" if status == "joined" else ""))
+                run_clusters.setdefault(cluster_id, target)  # Indexed but never alerted (crashed run) gets retried
+
+    # One analysis and one alert per story, listing every outlet that carried it
+    for cluster_id, target in run_clusters.items():
+        story = story_index.get_cluster(cluster_id)
+        if story['alerted']:
+            tracing.count("already_alerted")  # Alerted in an earlier run; new coverage just joins the cluster
+            continue
+        sources = story_index.members(cluster_id)
+        title, link = story['title'], sources[0]['link']
+        # This generates a Google Search URL for the title. It 100% works.
+        safe_search_url = f"https://www.google.com/search?q={urllib.parse.quote(title)}"
+
+        label, confidence, route = sentiment_model.route(title, "gossip")
+        if route == "local":
+            ai_take = f"IF TRUE, IMPACT: {label.title()}\n(Local model, {confidence:.0%} confident; AI skipped)"
+        else:
+            ai_take = get_ai_opinion(title)
+            sentiment_model.observe("gossip", label, ai_take, route)
+
+        outlets = " | ".join(f"<a href='{s['link']}'>{s['outlet'] or 'Link'}</a>" for s in sources[:MAX_SOURCES_LISTED])
+        if len(sources) > MAX_SOURCES_LISTED: outlets += f" +{len(sources) - MAX_SOURCES_LISTED} more"
+        msg = (
+            f"🤫 <b>GOSSIP DETECTED</b> | {target}\n\n"
+            f"🗣️ <i>{title}</i>\n\n"
+            f"🔮 <b>AI READ:</b>\n<pre>{ai_take}</pre>\n\n"
+            f"📡 <b>{len(sources)} source{'s' if len(sources) > 1 else ''}:</b> {outlets}\n"
+            f"🔗 <a href='{link}'>Direct Link</a> | <a href='{safe_search_url}'>🔎 Google Search</a>"
+        )
+
+        send_telegram(msg)
+        story_index.mark_alerted(cluster_id, ai_take)
+        tracing.count("gossip_alerts")
+        links = "\n".join(s['link'] for s in sources)
+        intel_archive.record("gossip", "rumor", title, f"{title}\n\n{ai_take}\n\n{links}",
+                             sentiment=ai_take, key=f"gossip:{link}", analyst="local" if route == "local" else "gemini")
+
+    sentiment_model.report()
 
 if __name__ == "__main__":
     hunt_for_gossip()
@@ -0,0 +1,179 @@
+import os
+import time
+import random
+import threading
+import urllib.parse
+from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+import tracing
+
+# --- CONFIGURATION ---
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 30.0
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5       # First retry waits ~0.5s, then 1s, 2s ... (full jitter)
+BACKOFF_CAP = 8.0
+POOL_SIZE = 8            # Keep-alive connections per host
+RETRY_STATUS = {429, 500, 502, 503, 504}
+IDEMPOTENT = {"GET", "HEAD", "OPTIONS"}
+
+_sessions = {}
+_lock = threading.Lock()
+_latency = defaultdict(list)
+_errors = Counter()
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+
+def _host(url):
+    return urllib.parse.urlparse(url).netloc
+
+
+def session_for(url):
+    """One pooled keep-alive session per host (cookies stick too, which NSE needs)"""
+    host = _host(url)
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def _record(host, seconds, ok):
+    with _lock:
+        _latency[host].append(seconds * 1000)
+        if not ok: _errors[host] += 1
+
+
+def _backoff(attempt, response=None):
+    if response is not None and response.status_code == 429:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_CAP * 4)
+    # Full jitter: spreads retries from parallel workers apart
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _rewind(kwargs):
+    for f in (kwargs.get("files") or {}).values():
+        handle = f[1] if isinstance(f, tuple) else f
+        if hasattr(handle, "seek"): handle.seek(0)
+
+
+def _send(method, url, timeout, retries, **kwargs):
+    session = session_for(url)
+    host = _host(url)
+    idempotent = method in IDEMPOTENT
+    for attempt in range(retries + 1):
+        if attempt: _rewind(kwargs)
+        t0 = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _record(host, time.perf_counter() - t0, False)
+            # A POST that failed mid-flight may have landed; only retry if it never connected
+            reason = getattr(e.args[0], "reason", None) if e.args else None
+            never_sent = isinstance(e, requests.ConnectTimeout) or isinstance(reason, NewConnectionError)
+            safe = idempotent or never_sent
+            if attempt >= retries or not safe: raise
+            time.sleep(_backoff(attempt))
+            continue
+        ok = response.status_code < 400
+        _record(host, time.perf_counter() - t0, ok)
+        retryable = response.status_code in RETRY_STATUS and (idempotent or response.status_code == 429)
+        if not retryable or attempt >= retries:
+            return response
+        delay = _backoff(attempt, response)
+        response.close()  # Hand the pooled connection back (a streamed body is never read)
+        time.sleep(delay)
+    return response
+
+
+def request(method, url, timeout=None, retries=MAX_RETRIES, hedge_after=None, **kwargs):
+    """
+    Pooled request with connect/read timeouts and jittered retries.
+    hedge_after (seconds, GET only): if the first attempt is still running,
+    fire a duplicate and take whichever answers first.
+    """
+    method = method.upper()
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    if not hedge_after or method not in IDEMPOTENT or kwargs.get("stream"):
+        return _send(method, url, timeout, retries, **kwargs)
+
+    first = _hedge_pool.submit(_send, method, url, timeout, retries, **kwargs)
+    done, _ = wait([first], timeout=hedge_after)
+    if done: return first.result()
+    tracing.count(f"hedged:{_host(url)}")
+    second = _hedge_pool.submit(_send, method, url, timeout, retries, **kwargs)
+    pending = {first, second}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                response = future.result()
+            except Exception as e:
+                error = e
+                continue
+            for other in (first, second):
+                if other is not future: other.add_done_callback(_discard)
+            return response
+    raise error
+
+
+def _discard(future):
+    """Closes the losing hedge's response so its pooled connection is released"""
+    try: future.result().close()
+    except Exception: pass
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def download(url, path, chunk_size=64 * 1024, **kwargs):
+    """Streams a (possibly large) body straight to disk. Returns path on success, None otherwise."""
+    tmp = f"{path}.part"
+    try:
+        with request("GET", url, stream=True, **kwargs) as response:
+            if response.status_code != 200: return None
+            folder = os.path.dirname(path)
+            if folder: os.makedirs(folder, exist_ok=True)
+            with open(tmp, "wb") as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk: f.write(chunk)
+        os.replace(tmp, path)
+        return path
+    except Exception as e:
+        print(f"⚠️ Download failed ({_host(url)}): {e}")
+        if os.path.exists(tmp): os.remove(tmp)
+        return None
+
+
+def reset_stats():
+    with _lock:
+        _latency.clear()
+        _errors.clear()
+
+
+def latency_stats():
+    """Per-host request latency (every attempt, retries included)"""
+    with _lock:
+        return {host: {"requests": len(ms), "errors": _errors[host], "p50_ms": tracing._percentile(ms, 50),
+                       "p95_ms": tracing._percentile(ms, 95), "max_ms": round(max(ms), 1)}
+                for host, ms in _latency.items() if ms}
+
+
+tracing.register_summary("http", latency_stats)
@@ -0,0 +1,56 @@
+RSI_LENGTH = 14
+
+
+class WilderRSI:
+    """
+    Incremental RSI (Wilder smoothing). Each new close is O(1), so a
+    streaming scan never recomputes the whole series.
+    """
+    def __init__(self, length=RSI_LENGTH):
+        self.length = length
+        self.last_close = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self._warmup = []
+        self.value = None
+
+    @classmethod
+    def from_closes(cls, closes, length=RSI_LENGTH):
+        state = cls(length)
+        for close in closes:
+            state.update(close)
+        return state
+
+    def update(self, close):
+        close = float(close)
+        if self.last_close is None:
+            self.last_close = close
+            return None
+        change = close - self.last_close
+        self.last_close = close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+
+        if self.avg_gain is None:
+            # First `length` changes seed the averages with a simple mean
+            self._warmup.append((gain, loss))
+            if len(self._warmup) < self.length: return None
+            self.avg_gain = sum(g for g, _ in self._warmup) / self.length
+            self.avg_loss = sum(l for _, l in self._warmup) / self.length
+            self._warmup = []
+        else:
+            self.avg_gain = (self.avg_gain * (self.length - 1) + gain) / self.length
+            self.avg_loss = (self.avg_loss * (self.length - 1) + loss) / self.length
+
+        if self.avg_loss == 0:
+            self.value = 100.0 if self.avg_gain > 0 else 50.0
+        else:
+            self.value = 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+        return self.value
+
+
+def rsi_frame(closes, length=RSI_LENGTH):
+    """Vectorized Wilder RSI for a whole Close frame (rows = bars, columns = tickers)"""
+    delta = closes.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / length, adjust=False, min_periods=length).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / length, adjust=False, min_periods=length).mean()
+    return 100 - 100 / (1 + gain / loss)
@@ -0,0 +1,185 @@
+import os
+import re
+import zlib
+import sqlite3
+import argparse
+from datetime import datetime, date, timedelta
+
+import tracing
+
+# --- CONFIGURATION ---
+ARCHIVE_FILE = os.environ.get("INTEL_ARCHIVE", "data/intel_archive.db")
+SENTIMENTS = {"BULLISH": "BULLISH", "POSITIVE": "BULLISH", "BEARISH": "BEARISH",
+              "NEGATIVE": "BEARISH", "NEUTRAL": "NEUTRAL"}
+
+# Bodies are stored zlib-compressed; the FTS5 table is contentless (index only),
+# so the text is never kept twice.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    source TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    ticker TEXT,
+    sentiment TEXT,
+    key TEXT UNIQUE,
+    title TEXT,
+    body BLOB,
+    analyst TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_ticker_ts ON entries (ticker, ts);
+CREATE INDEX IF NOT EXISTS entries_source_ts ON entries (source, ts);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5 (title, body, content='');
+"""
+
+
+def _connect():
+    folder = os.path.dirname(ARCHIVE_FILE)
+    if folder: os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(ARCHIVE_FILE, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    if "analyst" not in {r[1] for r in conn.execute("PRAGMA table_info(entries)")}:
+        conn.execute("ALTER TABLE entries ADD COLUMN analyst TEXT")  # Archives created before the column existed
+    return conn
+
+
+def _ticker(ticker):
+    if not ticker: return None
+    ticker = ticker.upper().strip()
+    return ticker[:-3] if ticker.endswith(".NS") else ticker
+
+
+def normalize_sentiment(text):
+    """Normalizes BULLISH/POSITIVE etc. Also finds the label inside a longer AI answer."""
+    if not text: return None
+    text = text.upper()
+    if text in SENTIMENTS: return SENTIMENTS[text]
+    for word in re.findall(r"[A-Z]+", text):
+        if word in SENTIMENTS: return SENTIMENTS[word]
+    return None
+
+
+def _since(value):
+    """datetime / date / ISO string, or shorthand: 'quarter', 'month', '7d', '12h'"""
+    if value is None or isinstance(value, datetime): return value
+    if isinstance(value, date): return datetime(value.year, value.month, value.day)
+    now = datetime.now()
+    if value == "quarter": return datetime(now.year, 3 * ((now.month - 1) // 3) + 1, 1)
+    if value == "month": return datetime(now.year, now.month, 1)
+    match = re.fullmatch(r"(\d+)([dh])", value)
+    if match:
+        n = int(match.group(1))
+        return now - (timedelta(days=n) if match.group(2) == "d" else timedelta(hours=n))
+    return datetime.fromisoformat(value)
+
+
+def record(source, kind, title, body, ticker=None, sentiment=None, key=None, ts=None, analyst=None):
+    """
+    Appends one alert/report. Entries are never modified; an entry whose key is
+    already archived is skipped. Returns the row id (existing one if skipped).
+    analyst names who produced the sentiment ('gemini', 'local').
+    """
+    ts = (ts or datetime.now()).isoformat(timespec="seconds")
+    with tracing.span("persist", "sqlite", kind=kind):
+        conn = _connect()
+        try:
+            with conn:
+                if key:
+                    row = conn.execute("SELECT id FROM entries WHERE key = ?", (key,)).fetchone()
+                    if row: return row[0]
+                cur = conn.execute(
+                    "INSERT INTO entries (ts, source, kind, ticker, sentiment, key, title, body, analyst) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (ts, source, kind, _ticker(ticker), normalize_sentiment(sentiment), key, title,
+                     zlib.compress((body or "").encode("utf-8"), 9), analyst))
+                conn.execute("INSERT INTO entries_fts (rowid, title, body) VALUES (?, ?, ?)",
+                             (cur.lastrowid, title or "", body or ""))
+                return cur.lastrowid
+        finally:
+            conn.close()
+
+
+def _row(r):
+    return {"id": r[0], "ts": r[1], "source": r[2], "kind": r[3], "ticker": r[4], "sentiment": r[5],
+            "key": r[6], "title": r[7], "body": zlib.decompress(r[8]).decode("utf-8") if r[8] else ""}
+
+
+def lookup(key):
+    """A past analysis by its key (e.g. an NSE attachment or a site + scene id), or None"""
+    if not os.path.exists(ARCHIVE_FILE): return None
+    conn = _connect()
+    try:
+        r = conn.execute("SELECT id, ts, source, kind, ticker, sentiment, key, title, body FROM entries WHERE key = ?",
+                         (key,)).fetchone()
+        return _row(r) if r else None
+    finally:
+        conn.close()
+
+
+def quote_terms(words):
+    """Plain words -> FTS5 query matching all of them: Q2-results steel's -> "Q2-results" "steel's" """
+    return " ".join('"' + w.replace('"', '""') + '"' for w in words) or None
+
+
+def search(text=None, ticker=None, sentiment=None, source=None, kind=None, since=None, until=None, limit=50):
+    """
+    Newest-first matches. text is an FTS5 query ('order win', 'merger OR acquisition');
+    every other filter is an indexed column. E.g. all BEARISH filings for HINDALCO
+    this quarter: search(ticker="HINDALCO", sentiment="BEARISH", source="news", since="quarter")
+    """
+    if not os.path.exists(ARCHIVE_FILE): return []
+    sql = "SELECT e.id, e.ts, e.source, e.kind, e.ticker, e.sentiment, e.key, e.title, e.body FROM entries e"
+    where, args = [], []
+    if text:
+        sql += " JOIN entries_fts f ON f.rowid = e.id"
+        where.append("entries_fts MATCH ?")
+        args.append(text)
+    for column, value in (("e.ticker", _ticker(ticker)), ("e.sentiment", normalize_sentiment(sentiment)),
+                          ("e.source", source), ("e.kind", kind)):
+        if value:
+            where.append(f"{column} = ?")
+            args.append(value)
+    if since:
+        where.append("e.ts >= ?")
+        args.append(_since(since).isoformat(timespec="seconds"))
+    if until:
+        where.append("e.ts < ?")
+        args.append(_since(until).isoformat(timespec="seconds"))
+    if where: sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY e.ts DESC LIMIT ?"
+    args.append(limit)
+
+    conn = _connect()
+    try:
+        return [_row(r) for r in conn.execute(sql, args)]
+    finally:
+        conn.close()
+
+
+def labelled_titles(source, limit=20000):
+    """(title, sentiment) pairs labelled by the LLM, newest first - training data for sentiment_model"""
+    if not os.path.exists(ARCHIVE_FILE): return []
+    conn = _connect()
+    try:
+        return conn.execute("SELECT title, sentiment FROM entries WHERE source = ? AND sentiment IS NOT NULL "
+                            "AND (analyst IS NULL OR analyst != 'local') ORDER BY ts DESC LIMIT ?",
+                            (source, limit)).fetchall()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search the intel archive")
+    parser.add_argument("text", nargs="?", help="full-text query (FTS5 syntax)")
+    parser.add_argument("--ticker")
+    parser.add_argument("--sentiment", help="BULLISH / BEARISH / NEUTRAL")
+    parser.add_argument("--source", help="news / gossip / macro / satellite")
+    parser.add_argument("--kind")
+    parser.add_argument("--since", help="ISO date, 'quarter', 'month', '7d' or '12h'")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    started = datetime.now()
+    hits = search(args.text, args.ticker, args.sentiment, args.source, args.kind, args.since, limit=args.limit)
+    for hit in hits:
+        print(f"[{hit['ts']}] {hit['source']}/{hit['kind']} {hit['ticker'] or '-'} {hit['sentiment'] or ''}: {hit['title']}")
+    print(f"🔎 {len(hits)} hits in {(datetime.now() - started).total_seconds() * 1000:.1f} ms")
@@ -0,0 +1,195 @@
+import os
+import glob
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+
+import tracing
+import feature_store
+import intel_archive
+import timelapse
+from site_registry import load_sites
+from change_detection import preview_change, _slug
+from market_memory import load_memory, get_confluence_score
+
+# --- CONFIGURATION ---
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))   # On-demand jobs running at once
+RESULT_TTL = 600            # Seconds a finished result is served again to an identical request
+JOB_DIR = "data/jobs"       # Site images fetched on demand, one per site (latest scene)
+
+_lock = threading.Lock()
+_pool = None
+_inflight = {}   # (kind, key) -> {"future", "listeners"}
+_results = {}    # (kind, key) -> (finished_at, result)
+
+
+# ==========================================
+# TARGET RESOLUTION (cheap, runs before enqueueing)
+# ==========================================
+def resolve_site(query):
+    """Registry name for '/scan tata steel', '/scan TATASTEEL' or '/scan 4', or None"""
+    sites = load_sites()
+    q = query.strip().lower()
+    for name, site in sites.items():
+        ticker = (site.get("ticker") or "").lower()
+        if q in (name.lower(), ticker, ticker.replace(".ns", "")) or name.lower().startswith(f"{q}."):
+            return name
+    matches = [name for name in sites if q in name.lower()]
+    return matches[0] if len(matches) == 1 else None
+
+
+def normalize_ticker(query):
+    ticker = query.strip().upper()
+    return ticker if ticker.endswith(".NS") or ticker.startswith("^") else f"{ticker}.NS"
+
+
+# ==========================================
+# JOBS
+# ==========================================
+def _site_image(name, site, scene_id, progress):
+    """Latest scene for one site: job cache, then the time-lapse frame cache, then Earth Engine"""
+    import main
+    path = os.path.join(JOB_DIR, f"{_slug(name)}_{scene_id}.jpg")
+    if os.path.exists(path): return path
+    cached = timelapse.frame_path(name, scene_id)
+    if cached: return cached
+    progress(f"🛰️ Downloading scene {timelapse.scene_date(scene_id)}...")
+    os.makedirs(JOB_DIR, exist_ok=True)
+    with tracing.span("fetch", "ee", target=name, call="on_demand"):
+        _, fetched = main.get_satellite_data(site['roi'], site['vis'], path)
+    if not fetched: return None
+    for old in glob.glob(os.path.join(JOB_DIR, f"{_slug(name)}_*.jpg")):
+        if old != path: os.remove(old)
+    return path
+
+
+def scan_site(name, progress):
+    """Fresh satellite page for one site. Scenes, valuation and AI reads come from the caches when possible."""
+    import main
+    main.init()
+    site = main.targets[name]
+    progress(f"🛰️ {name}: checking for the latest scene...")
+    with tracing.span("fetch", "ee", call="latest_scene", target=name):
+        scene_ids = timelapse.list_scenes(site['roi'], 1)
+    scene_id = scene_ids[0] if scene_ids else None
+    img = _site_image(name, site, scene_id, progress) if scene_id else None
+
+    artifact = {"name": name, "img": img, "has_image": img is not None, "change": None,
+                "sentiment": None, "commentary": ""}
+    if img:
+        artifact['change'] = preview_change(name, img, scene_id)
+
+    progress(f"📊 {name}: valuation and news...")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        val = pool.submit(main.get_valuation_data, site['ticker'])
+        news = pool.submit(main.get_market_news, site['query'])
+        artifact['val'], artifact['news'] = val.result(), news.result()
+
+    artifact['archive_key'] = f"site:{name}:{scene_id}" if scene_id else None
+    past = intel_archive.lookup(artifact['archive_key']) if artifact['archive_key'] else None
+    if past:
+        artifact['sentiment'] = main.ARCHIVE_SENTIMENT.get(past['sentiment'])
+        artifact['commentary'] = past['body'].split("\n", 1)[0]
+        tracing.count("archived_commentary")
+    elif artifact['change']:
+        progress(f"🧠 {name}: asking the AI...")
+        artifact['sentiment'], artifact['commentary'] = main.get_ai_commentary(
+            name, site, artifact['change'], artifact['val'], artifact['news']) or (None, "")
+        if artifact['commentary']: main.archive_site(artifact)  # The daily scan reuses it for this scene
+
+    scene = f"🗓️ Scene: {timelapse.scene_date(scene_id)}" if scene_id else "🗓️ No clear scene in the lookback window"
+    return {"text": main.build_caption(artifact, footer=scene), "photo": img}
+
+
+def check_ticker(ticker, progress):
+    """Features, confluence and the latest archived intel for one stock"""
+    f = feature_store.read_ticker(ticker) if feature_store.is_fresh() else None
+    if f is None:
+        progress(f"📈 {ticker}: computing features...")
+        universe = feature_store.default_universe() if not feature_store.is_fresh() else []
+        feature_store.materialize(universe + [ticker])
+        f = feature_store.read_ticker(ticker)
+    if f is None or f['price'] is None:
+        raise ValueError(f"no price data for {ticker}")
+
+    def fmt(value, spec, suffix=""):
+        return "n/a" if value is None else f"{value:{spec}}{suffix}"
+
+    mem = load_memory()
+    lines = [
+        f"🔍 <b>{ticker}</b> (as of {f['as_of']})", "",
+        f"💰 Price: Rs {fmt(f['price'], ',.2f')} | P/E: {fmt(f['pe'], '.1f', 'x')} ({f['valuation_signal']})",
+        f"📈 1D {fmt(f['ret_1d'], '+.1f', '%')} | 5D {fmt(f['ret_5d'], '+.1f', '%')} | 1M {fmt(f['ret_1m'], '+.1f', '%')}",
+        f"📉 RSI(14): {fmt(f['rsi_14'], '.1f')}",
+        f"🧠 Confluence: {get_confluence_score(ticker, mem=mem)}/100 "
+        f"({mem.get('stock_sentiment', {}).get(ticker, 'NEUTRAL')}, regime {mem.get('global_trend', 'NEUTRAL')})",
+    ]
+    if f['sat_change_pct'] is not None:
+        lines.append(f"🛰️ Satellite change: {f['sat_change_pct']:.1f}%")
+    hits = intel_archive.search(ticker=ticker, since="7d", limit=3)
+    if hits:
+        lines += ["", "🗄️ <b>Last 7 days:</b>"]
+        for h in hits:
+            icon = {"BULLISH": "🟢", "BEARISH": "🔴"}.get(h['sentiment'], "⚪")
+            lines.append(f"{icon} <i>{h['ts'][:16]}</i> [{h['source']}] {(h['title'] or '')[:120]}")
+    return {"text": "\n".join(lines), "photo": None}
+
+
+JOBS = {"scan": scan_site, "check": check_ticker}
+
+
+# ==========================================
+# QUEUE
+# ==========================================
+def _notify(listeners, text):
+    for callback in list(listeners):
+        try: callback(text)
+        except: pass
+
+
+def _run(job, listeners):
+    kind, key = job
+    started = time.perf_counter()
+    result = JOBS[kind](key, lambda text: _notify(listeners, text))
+    result["seconds"] = round(time.perf_counter() - started, 1)
+    tracing.count(f"jobs_{kind}")
+    print(f"⚙️ [JOBS] {kind} {key} done in {result['seconds']}s")
+    return result
+
+
+def _finished(job, future):
+    with _lock:
+        _inflight.pop(job, None)
+        if not future.cancelled() and future.exception() is None:
+            _results[job] = (time.time(), future.result())
+
+
+def submit(kind, key, on_progress=None):
+    """
+    Queues a job; returns (future, status). status is 'cached' (identical job
+    finished < RESULT_TTL ago), 'joined' (identical job already in flight; its
+    progress is streamed to on_progress too) or 'queued'.
+    """
+    global _pool
+    job = (kind, key)
+    with _lock:
+        done = _results.get(job)
+        if done and time.time() - done[0] < RESULT_TTL:
+            future = Future()
+            future.set_result(done[1])
+            return future, "cached"
+        if job in _inflight:
+            if on_progress: _inflight[job]["listeners"].append(on_progress)
+            return _inflight[job]["future"], "joined"
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+        listeners = [on_progress] if on_progress else []
+        future = _pool.submit(_run, job, listeners)
+        _inflight[job] = {"future": future, "listeners": listeners}
+    future.add_done_callback(lambda f: _finished(job, f))
+    return future, "queued"
+
+
+def pending():
+    with _lock:
+        return sorted(f"{kind} {key}" for kind, key in _inflight)
@@ -1,13 +1,18 @@
 import os
 import time
 import json
-import requests
+import http_client
 import urllib.parse
+import numpy as np
+import pandas as pd
 import yfinance as yf
 import google.generativeai as genai
 from GoogleNews import GoogleNews
 from datetime import datetime
-from market_memory import update_global_trend # Must exist in repo
+from market_memory import update_global_trend, commit_memory # Must exist in repo
+import tracing
+import intel_archive
+import macro_calendar
 
 # --- STANDARD SETUP ---
 LIVE_INDICATORS = {
@@ -28,6 +33,17 @@ DATA_HUNT_QUERIES = [
     "24. Nifty 50 EPS growth earnings", "25. RBI Capacity Utilization OBICUS"
 ]
 
+# --- PERSISTED INDICATOR PANEL ---
+PANEL_FILE = "data/macro_panel.csv"
+PANEL_HISTORY = "2y"     # First fetch depth
+PANEL_MAX_ROWS = 520     # ~2 years of daily bars kept on disk
+ZSCORE_WINDOW = 20       # Rolling window for z-scores
+PERCENTILE_WINDOW = 252  # 1 year of bars for percentile rank
+CORR_WINDOW = 60         # Daily returns used for cross-correlation
+CORR_ALERT = 0.6         # Only report pairs above this |correlation|
+
+FULL_HUNT = os.environ.get("MACRO_FULL_HUNT") == "1"   # Search every indicator, ignoring the release calendar
+
 BOT_TOKEN = os.environ.get("TELEGRAM_TOKEN")
 CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID")
 GEMINI_KEY = os.environ.get("GEMINI_API_KEY")
@@ -37,44 +53,170 @@ if GEMINI_KEY:
     except: pass
 
 # --- FUNCTIONS ---
+def load_panel():
+    """Loads the locally persisted Close panel (rows = dates, columns = tickers)"""
+    if not os.path.exists(PANEL_FILE): return pd.DataFrame()
+    try:
+        return pd.read_csv(PANEL_FILE, index_col=0, parse_dates=True)
+    except:
+        return pd.DataFrame()
+
+def save_panel(panel):
+    os.makedirs(os.path.dirname(PANEL_FILE), exist_ok=True)
+    panel.tail(PANEL_MAX_ROWS).to_csv(PANEL_FILE)
+
+def fetch_closes(tickers, **window):
+    """One batched yfinance request for every ticker, Close prices only"""
+    with tracing.span("fetch", "yfinance", tickers=len(tickers)):
+        df = yf.download(tickers, interval="1d", progress=False, threads=True, **window)
+    if df.empty: return pd.DataFrame()
+    closes = df['Close']
+    if isinstance(closes, pd.Series): closes = closes.to_frame(tickers[0])
+    closes.index = pd.to_datetime(closes.index).tz_localize(None)
+    return closes.dropna(how='all')
+
+def update_panel():
+    """Extends the persisted panel with only the bars we don't have yet"""
+    tickers = list(LIVE_INDICATORS.values())
+    panel = load_panel()
+    missing = [t for t in tickers if t not in panel.columns]
+
+    try:
+        if panel.empty or missing:
+            fresh = fetch_closes(tickers, period=PANEL_HISTORY)
+        else:
+            # Re-pull the last few bars too; today's bar may have been partial last run
+            start = (panel.index[-1] - pd.Timedelta(days=5)).strftime("%Y-%m-%d")
+            fresh = fetch_closes(tickers, start=start)
+    except Exception as e:
+        print(f"⚠️ Panel fetch failed: {e}")
+        fresh = pd.DataFrame()
+
+    if not fresh.empty:
+        panel = fresh.combine_first(panel) if not panel.empty else fresh
+        panel = panel.sort_index()
+        save_panel(panel)
+    return panel.reindex(columns=tickers)
+
+def compute_regime_stats(panel):
+    """Z-scores, percentiles and correlations for the whole panel in one vectorized pass"""
+    # Tickers trade on different calendars (FX, VIX, futures): price and day change
+    # come from each column's own last two bars, never from a forward-filled row
+    last_two = {c: panel[c].dropna().iloc[-2:] for c in panel.columns}
+    price = pd.Series({c: (v.iloc[-1] if len(v) else np.nan) for c, v in last_two.items()})
+    change = pd.Series({c: ((v.iloc[-1] / v.iloc[-2] - 1) * 100 if len(v) == 2 else np.nan)
+                        for c, v in last_two.items()})
+
+    # Forward fill only for the rolling windows, so a holiday doesn't break them
+    closes = panel.ffill()
+    roll = closes.rolling(ZSCORE_WINDOW)
+    zscores = ((closes - roll.mean()) / roll.std()).iloc[-1]
+    percentiles = closes.tail(PERCENTILE_WINDOW).rank(pct=True).iloc[-1] * 100
+    corr = panel.pct_change(fill_method=None).tail(CORR_WINDOW).corr()   # Pairwise over shared trading days
+
+    stats = pd.DataFrame({
+        "price": price,
+        "change": change,
+        "z": zscores,
+        "pctile": percentiles,
+    })
+
+    # Upper triangle only, so each pair shows up once
+    values = corr.to_numpy()
+    rows, cols = np.triu_indices_from(values, k=1)
+    pairs = [(corr.index[r], corr.columns[c], values[r, c]) for r, c in zip(rows, cols)
+             if np.isfinite(values[r, c]) and abs(values[r, c]) >= CORR_ALERT]
+    pairs.sort(key=lambda p: -abs(p[2]))
+    return stats, pairs
+
+def regime_tag(z):
+    if z >= 2: return "STRETCHED HIGH"
+    if z <= -2: return "STRETCHED LOW"
+    if z >= 1: return "ELEVATED"
+    if z <= -1: return "DEPRESSED"
+    return "NORMAL"
+
 def get_live_market_data():
     data_summary = "📊 <b>LIVE MARKET DASHBOARD</b>\n\n"
-    raw_text = "LIVE DATA:\n"
+    raw_text = "LIVE DATA (price, day change, 20d z-score, 1y percentile):\n"
+
+    panel = update_panel()
+    if panel.dropna(how='all').empty:
+        for name in LIVE_INDICATORS:
+            data_summary += f"⚪ <b>{name}</b>: N/A\n"
+        return data_summary, raw_text + "No market data available\n"
+
+    with tracing.span("indicator", "pandas", profile=True, rows=len(panel)):
+        stats, pairs = compute_regime_stats(panel)
+    names = {ticker: name for name, ticker in LIVE_INDICATORS.items()}
+
     for name, ticker in LIVE_INDICATORS.items():
-        try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period="5d")
-            if not hist.empty:
-                price = hist['Close'].iloc[-1]
-                prev = hist['Close'].iloc[-2]
-                change = ((price - prev) / prev) * 100
-                icon = "🟢" if change >= 0 else "🔴"
-                data_summary += f"{icon} <b>{name}</b>: <code>{price:.2f}</code> ({change:+.2f}%)\n"
-                raw_text += f"{name}: {price:.2f} ({change:+.2f}%)\n"
-            else: data_summary += f"⚪ <b>{name}</b>: N/A\n"
-        except: data_summary += f"⚪ <b>{name}</b>: Error\n"
+        row = stats.loc[ticker]
+        if pd.isna(row['price']):
+            data_summary += f"⚪ <b>{name}</b>: N/A\n"
+            continue
+        change = 0.0 if pd.isna(row['change']) else row['change']
+        icon = "🟢" if change >= 0 else "🔴"
+        context = ""
+        if not pd.isna(row['z']):
+            context = f" | z {row['z']:+.1f} | p{row['pctile']:.0f}"
+        data_summary += f"{icon} <b>{name}</b>: <code>{row['price']:.2f}</code> ({change:+.2f}%){context}\n"
+        raw_text += f"{name}: {row['price']:.2f} ({change:+.2f}%)"
+        if context:
+            raw_text += f", z={row['z']:+.2f} [{regime_tag(row['z'])}], {row['pctile']:.0f}th pctile"
+        raw_text += "\n"
+
+    if pairs:
+        data_summary += f"\n🔗 <b>Linked Moves ({CORR_WINDOW}d corr)</b>\n"
+        raw_text += f"\nCROSS-ASSET CORRELATIONS ({CORR_WINDOW}d daily returns):\n"
+        for a, b, c in pairs[:5]:
+            data_summary += f"• {names[a]} ↔ {names[b]}: <code>{c:+.2f}</code>\n"
+            raw_text += f"{names[a]} vs {names[b]}: {c:+.2f}\n"
     return data_summary, raw_text
 
 def hunt_for_economic_data():
-    data_summary = "📰 <b>ECONOMIC NEWS FEED</b>\n\n"
-    raw_text = "\n--- NEWS DATA ---\n"
+    """
+    Searches only the indicators whose release is due (see macro_calendar);
+    the dossier is built from the store, so it always covers every indicator.
+    """
+    store = macro_calendar.load_store()
+    due = macro_calendar.due_queries(DATA_HUNT_QUERIES, store, force=FULL_HUNT)
+    print(f"📅 [CALENDAR] {len(due)}/{len(DATA_HUNT_QUERIES)} indicators due for a search")
+    tracing.count("macro_searches", len(due))
+
+    updated = set()
     googlenews = GoogleNews(period='7d')
-    for query in DATA_HUNT_QUERIES:
+    for query in due:
         googlenews.clear()
-        googlenews.search(query)
-        results = googlenews.result()
+        try:
+            with tracing.span("fetch", "googlenews", query=query):
+                googlenews.search(query)
+            results = googlenews.result()
+        except Exception as e:
+            print(f"⚠️ Search failed ({query}): {e}")
+            continue
+        if macro_calendar.record_results(store, query, results):
+            updated.add(macro_calendar.query_key(query))
+    macro_calendar.save_store(store)
+
+    data_summary = f"📰 <b>ECONOMIC DATA FEED</b> ({len(updated)} new releases)\n\n"
+    raw_text = "\n--- ECONOMIC DATA (latest release per indicator) ---\n"
+    for query in DATA_HUNT_QUERIES:
+        key = macro_calendar.query_key(query)
+        entry = store.get(key)
         indicator_name = query.split(' ', 1)[1]
-        if results:
-            top_result = results[0]
-            title = top_result['title']
-            link = top_result['link']
-            safe_query = urllib.parse.quote(title)
-            search_link = f"https://www.google.com/search?q={safe_query}"
-            data_summary += f"🔹 <b>{indicator_name}</b>\n└ <a href='{link}'>{title}</a>\n   🔎 <a href='{search_link}'>Google Search</a>\n\n"
-            raw_text += f"{indicator_name}: {title}\n"
-        else:
+        if not entry or not entry.get('text'):
             data_summary += f"🔸 {indicator_name}: No recent news.\n"
             raw_text += f"{indicator_name}: No recent news\n"
+            continue
+        icon = "🆕" if key in updated else "🔹"
+        value = macro_calendar.format_value(entry)
+        figure = f" <code>{value}</code>" if value else ""
+        safe_query = urllib.parse.quote(entry['text'])
+        search_link = f"https://www.google.com/search?q={safe_query}"
+        data_summary += (f"{icon} <b>{indicator_name}</b>:{figure} <i>({entry['released']})</i>\n"
+                         f"└ <a href='{entry['link']}'>{entry['text']}</a>\n   🔎 <a href='{search_link}'>Google Search</a>\n\n")
+        raw_text += macro_calendar.dossier_line(entry) + "\n"
     return data_summary, raw_text
 
 def generate_grand_strategy(full_data_text):
@@ -98,7 +240,8 @@ def generate_grand_strategy(full_data_text):
         for attempt in range(2):
             try:
                 model = genai.GenerativeModel(m)
-                response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
+                with tracing.span("llm", "gemini", model=m, attempt=attempt):
+                    response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
                 data = json.loads(response.text)
                 return True, data
             except Exception as e:
@@ -110,22 +253,16 @@ def send_telegram(msg):
     if not BOT_TOKEN or not CHAT_ID: return
     url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
     payload = {"chat_id": CHAT_ID, "text": msg, "parse_mode": "HTML", "disable_web_page_preview": True}
-    requests.post(url, json=payload)
+    with tracing.span("send", "telegram"):
+        http_client.post(url, json=payload)
 
 # --- SAVE TO GITHUB (THE MEMORY FIX) ---
 def commit_memory_to_github():
-    """Forces the updated memory file back to the repo"""
-    try:
-        os.system('git config --global user.email "bot@github.com"')
-        os.system('git config --global user.name "Macro Bot"')
-        os.system('git add market_memory.json')
-        os.system('git commit -m "🧠 Update Market Memory [Skip CI]"')
-        os.system('git push')
-        print("✅ Memory Saved to GitHub.")
-    except Exception as e:
-        print(f"⚠️ Memory Save Failed: {e}")
+    """Pushes this run's memory updates as one commit, merged with whatever other bots pushed meanwhile"""
+    commit_memory("🧠 Update Market Memory [Skip CI]")
 
 def run_omni_scanner():
+    tracing.start_run("macro_bot")
     print(f"🚀 Starting Omni-Scanner... [{datetime.now().strftime('%H:%M')}]")
     
     # 1. Gather Data
@@ -150,6 +287,8 @@ def run_omni_scanner():
             f"🧠 <b>Brain Updated:</b> {result['trend']}"
         )
         send_telegram(final_msg)
+        intel_archive.record("macro", "macro_report", f"Omni-Scanner Report {datetime.now().strftime('%d %b %Y %H:%M')}",
+                             f"{result['report']}\n\n--- DOSSIER ---\n{full_dossier}", sentiment=result["trend"])
     else:
         send_telegram(f"❌ Analysis Failed. Raw Data:\n<pre>{full_dossier}</pre>")
 
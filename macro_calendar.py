@@ -0,0 +1,239 @@
+import os
+import re
+import json
+import calendar
+from datetime import datetime, timedelta
+
+# --- CONFIGURATION ---
+STORE_FILE = "data/macro_calendar.json"   # Last extracted value + release date per indicator
+RETRY_HOURS = 6          # A due release that hasn't shown up in the news yet is searched again after this
+GRACE_DAYS = 10          # ...until this long after its expected date; then we wait for the next release
+HISTORY_LENGTH = 12      # Past releases kept per indicator (for "prev" in the dossier)
+
+# Expected release pattern per DATA_HUNT_QUERIES number. Kinds:
+#   daily                     every weekday
+#   weekly, weekday           0 = Monday
+#   monthly, day              day of month (clamped to month end; 31 = last day)
+#   first_weekday, weekday    e.g. US payrolls on the first Friday
+#   quarterly, months, day
+#   dates, dates              published meeting calendar ("YYYY-MM-DD"); "every" once the list runs out
+#   every, days               irregular releases roughly this far apart: not on any grid, so one is
+#                             searched for (every RETRY_HOURS) once the last capture is 2/3 of that old
+# "unit" picks the right figure out of a headline that quotes several.
+FOMC_DATES = ["2025-01-29", "2025-03-19", "2025-05-07", "2025-06-18", "2025-07-30", "2025-09-17",
+              "2025-10-29", "2025-12-10", "2026-01-28", "2026-03-18", "2026-04-29", "2026-06-17",
+              "2026-07-29", "2026-09-16", "2026-10-28", "2026-12-09"]   # Decision days; extend each December
+RELEASE_CALENDAR = {
+    "3":  {"kind": "dates", "dates": FOMC_DATES, "days": 45, "unit": "%"},   # FOMC meetings
+    "4":  {"kind": "daily", "unit": "crore"},                        # FII / DII provisional flows
+    "6":  {"kind": "monthly", "day": 1, "unit": "crore"},            # GST collections
+    "7":  {"kind": "monthly", "day": 1, "unit": "units"},            # Auto sales
+    "8":  {"kind": "monthly", "day": 28, "unit": "%"},               # IIP
+    "9":  {"kind": "monthly", "day": 20, "unit": "%"},               # Core sector
+    "10": {"kind": "monthly", "day": 2, "unit": "bu"},               # Power demand
+    "11": {"kind": "every", "days": 14, "unit": "%"},                # RBI fortnightly bank credit
+    "12": {"kind": "daily", "unit": "%"},                            # 10Y G-Sec
+    "13": {"kind": "monthly", "day": 1, "unit": "mt"},               # Railway freight loading
+    "14": {"kind": "weekly", "weekday": 3, "unit": "%"},             # IMD monsoon update (Thursday)
+    "15": {"kind": "daily", "unit": "points"},                       # Baltic Dry Index
+    "17": {"kind": "daily", "unit": "x"},                            # Nifty P/E
+    "18": {"kind": "monthly", "day": 10, "unit": "crore"},           # AMFI SIP inflows
+    "19": {"kind": "monthly", "day": 31, "unit": "%"},               # CGA fiscal deficit
+    "20": {"kind": "quarterly", "months": [3, 6, 9, 12], "day": 25, "unit": "%"},   # RBI BoP / CAD
+    "21": {"kind": "weekly", "weekday": 4, "unit": "bn"},            # RBI forex reserves (Friday)
+    "23": {"kind": "first_weekday", "weekday": 4, "unit": "k"},      # US non-farm payrolls
+    "24": {"kind": "quarterly", "months": [2, 5, 8, 11], "day": 20, "unit": "%"},   # End of results season
+    "25": {"kind": "quarterly", "months": [1, 4, 7, 10], "day": 15, "unit": "%"},   # RBI OBICUS survey
+}
+DEFAULT_SCHEDULE = {"kind": "daily"}   # Queries without a calendar entry are treated as live data
+
+UNITS = {
+    "%": "%", "per cent": "%", "percent": "%", "bps": "bps",
+    "lakh crore": "lakh crore", "crore": "crore", "cr": "crore",
+    "trillion": "tn", "tn": "tn", "billion": "bn", "bn": "bn", "million": "mn", "mn": "mn",
+    "bu": "bu", "billion units": "bu", "mt": "mt", "million tonnes": "mt", "units": "units",
+    "points": "points", "pts": "points", "jobs": "k", "k": "k", "x": "x", "times": "x",
+}
+NUMBER = re.compile(
+    r"(?<![\w.])(?:rs\.?\s*|₹\s*|\$\s*|usd\s*|inr\s*)?(-?\d{1,3}(?:,\d{2,3})+|-?\d+(?:\.\d+)?)\s*"
+    r"(lakh crore|billion units|million tonnes|per cent|percent|bps|crore|cr\b|trillion|tn\b|billion|bn\b|"
+    r"million|mn\b|bu\b|mt\b|units|points|pts\b|jobs|k\b|x\b|times|%)?", re.IGNORECASE)
+
+
+# ==========================================
+# STORE
+# ==========================================
+def load_store():
+    if not os.path.exists(STORE_FILE): return {}
+    try:
+        with open(STORE_FILE, "r") as f:
+            return json.load(f)
+    except:
+        return {}
+
+
+def save_store(store):
+    os.makedirs(os.path.dirname(STORE_FILE), exist_ok=True)
+    with open(STORE_FILE + ".tmp", "w") as f:
+        json.dump(store, f, indent=4, sort_keys=True)
+    os.replace(STORE_FILE + ".tmp", STORE_FILE)
+
+
+def query_key(query):
+    """'6. India GST collections latest month' -> '6'"""
+    return query.split(".", 1)[0].strip()
+
+
+# ==========================================
+# SCHEDULER
+# ==========================================
+def _on_day(year, month, day):
+    return datetime(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def last_release(schedule, now):
+    """The most recent date on or before now that this indicator was due out (None: no grid, see is_due)"""
+    today = datetime(now.year, now.month, now.day)
+    kind = schedule["kind"]
+    if kind == "daily":
+        return today - timedelta(days=max(0, today.weekday() - 4))
+    if kind == "weekly":
+        return today - timedelta(days=(today.weekday() - schedule["weekday"]) % 7)
+    if kind == "dates":
+        past = [d for d in schedule["dates"] if d <= today.strftime("%Y-%m-%d")]
+        if not past: return None
+        latest = datetime.strptime(past[-1], "%Y-%m-%d")
+        if past[-1] == schedule["dates"][-1] and today - latest >= timedelta(days=schedule["days"]):
+            return None   # Calendar ran out: treat it like "every" until the list is extended
+        return latest
+    if kind == "first_weekday":
+        year, month = today.year, today.month
+        while True:
+            first = datetime(year, month, 1)
+            release = first + timedelta(days=(schedule["weekday"] - first.weekday()) % 7)
+            if release <= today: return release
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    months = schedule.get("months", range(1, 13))
+    year, month = today.year, today.month
+    for _ in range(24):
+        if month in months:
+            release = _on_day(year, month, schedule["day"])
+            if release <= today: return release
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return today
+
+
+def is_due(schedule, entry, now):
+    """
+    Due when the latest expected release isn't in the store yet. A release
+    that is late (not in the news) is retried every RETRY_HOURS for GRACE_DAYS.
+    """
+    if not entry: return True
+    expected = last_release(schedule, now) if schedule["kind"] != "every" else None
+    if expected is None:
+        # No grid: the next release is due once the last capture is 2/3 of a period old
+        released = datetime.fromisoformat(entry["released"]) if entry.get("released") else None
+        if released and now - released < timedelta(days=schedule["days"] * 2 / 3): return False
+        return now - datetime.fromisoformat(entry["checked"]) >= timedelta(hours=RETRY_HOURS)
+    checked = datetime.fromisoformat(entry["checked"])
+    if checked < expected: return True                       # Haven't looked since it came out
+    tolerance = timedelta(days=0 if schedule["kind"] == "daily" else 3)
+    released = datetime.fromisoformat(entry["released"]) if entry.get("released") else None
+    if released and released >= expected - tolerance: return False   # Already have this release
+    return now - checked >= timedelta(hours=RETRY_HOURS) and now - expected <= timedelta(days=GRACE_DAYS)
+
+
+def due_queries(queries, store, now=None, force=False):
+    now = now or datetime.now()
+    if force: return list(queries)
+    return [q for q in queries
+            if is_due(RELEASE_CALENDAR.get(query_key(q), DEFAULT_SCHEDULE), store.get(query_key(q)), now)]
+
+
+# ==========================================
+# EXTRACTION
+# ==========================================
+def extract_value(text, unit=None):
+    """
+    The headline's figure as (value, unit), e.g. 'GST mop-up rises 9% to Rs 1.87 lakh crore'
+    -> (1.87, 'lakh crore') with unit='crore'. Bare integers (years, counts) are ignored.
+    """
+    candidates = []
+    for match in NUMBER.finditer(text or ""):
+        number, suffix = match.group(1), match.group(2)
+        found = UNITS.get(suffix.lower()) if suffix else None
+        if found is None and "." not in number: continue
+        try:
+            candidates.append((float(number.replace(",", "")), found))
+        except ValueError:
+            continue
+    if not candidates: return None, None
+    if unit:
+        for value, found in candidates:
+            if found and unit in found: return value, found
+    for value, found in candidates:
+        if found: return value, found
+    return candidates[0]
+
+
+def published(result, now):
+    """Article date from a GoogleNews result: its datetime, '3 days ago' or 'Oct 1, 2026'"""
+    dt = result.get("datetime")
+    if isinstance(dt, datetime): return dt.replace(tzinfo=None)
+    text = (result.get("date") or "").strip()
+    match = re.match(r"(\d+)\s*(min|hour|day|week|month)", text)
+    if match:
+        n, span = int(match.group(1)), match.group(2)
+        days = {"min": n / 1440, "hour": n / 24, "day": n, "week": 7 * n, "month": 30 * n}[span]
+        return now - timedelta(days=days)
+    for fmt in ("%b %d, %Y", "%d %b %Y", "%Y-%m-%d"):
+        try: return datetime.strptime(text, fmt)
+        except ValueError: continue
+    return now
+
+
+def record_results(store, query, results, now=None):
+    """
+    Folds one search into the store: the first headline that carries a figure
+    (else the top headline) replaces the entry if it is at least as recent.
+    Returns True if the indicator got a newer release.
+    """
+    now = now or datetime.now()
+    key = query_key(query)
+    unit = RELEASE_CALENDAR.get(key, DEFAULT_SCHEDULE).get("unit")
+    entry = store.setdefault(key, {"name": query.split(" ", 1)[1], "history": []})
+    entry["checked"] = now.isoformat(timespec="seconds")
+    if not results: return False
+
+    pick, value, found = results[0], None, None
+    for r in results:
+        value, found = extract_value(r.get("title"), unit)
+        if value is not None:
+            pick = r
+            break
+    released = published(pick, now).strftime("%Y-%m-%d")
+    if entry.get("released") and released < entry["released"]: return False
+    newer = released != entry.get("released") or pick.get("title") != entry.get("text")
+    if newer and value is not None and entry.get("value") is not None:
+        entry["history"] = ([[entry["released"], entry["value"]]] + entry["history"])[:HISTORY_LENGTH]
+    entry.update({"value": value, "unit": found, "text": pick.get("title"), "link": pick.get("link"),
+                  "released": released})
+    return newer
+
+
+# ==========================================
+# DOSSIER
+# ==========================================
+def format_value(entry):
+    if entry.get("value") is None: return None
+    unit = entry.get("unit") or ""
+    return f"{entry['value']:g}{unit}" if unit in ("%", "x", "k") else f"{entry['value']:g} {unit}".strip()
+
+
+def dossier_line(entry):
+    """'GST collections latest month: 1.87 lakh crore (released 2026-10-01, prev 1.73) - headline'"""
+    value = format_value(entry)
+    if value is None:
+        return f"{entry['name']}: {entry.get('text') or 'No recent news'} (released {entry.get('released', 'n/a')})"
+    prev = f", prev {entry['history'][0][1]:g}" if entry.get("history") else ""
+    return f"{entry['name']}: {value} (released {entry['released']}{prev}) - {entry['text']}"
@@ -1,15 +1,29 @@
 import os
+import re
 import json
 import ee
 import base64
-import requests
-import urllib.request
+import http_client
 import urllib.parse
 from datetime import datetime, timedelta
 from google.oauth2.service_account import Credentials
 from GoogleNews import GoogleNews
 from fpdf import FPDF
 import yfinance as yf
+import google.generativeai as genai
+import tracing
+import time
+import shutil
+import queue
+import threading
+import html
+from concurrent.futures import ThreadPoolExecutor
+from site_registry import load_sites, group_into_tiles, crop_site
+from change_detection import detect_change, load_index, save_index, CHANGE_THRESHOLD_PCT
+from market_memory import update_stock_sentiment, get_confluence_score, commit_memory
+import feature_store
+import intel_archive
+import timelapse
 
 # ==========================================
 # 1. CONFIGURATION & AUTH
@@ -17,6 +31,17 @@ import yfinance as yf
 PROJECT_ID = "satellite-tracker-2026"
 BOT_TOKEN = os.environ.get("TELEGRAM_TOKEN")
 CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID")
+GEMINI_KEY = os.environ.get("GEMINI_API_KEY")
+FULL_REPORT = os.environ.get("FULL_REPORT") == "1"  # Bypass the change gate
+DELIVERY_MODE = os.environ.get("DELIVERY_MODE", "stream")  # "stream" = per-target Telegram posts, "pdf" = PDF only
+SCAN_WORKERS = int(os.environ.get("SCAN_WORKERS", "4"))
+ARCHIVE_SENTIMENT = {"BULLISH": "POSITIVE", "BEARISH": "NEGATIVE", "NEUTRAL": "NEUTRAL"}  # Archive labels -> ours
+REPORT_FILE = "Financial_Intel_Report.pdf"
+CAPTION_LIMIT = 1024  # Telegram's photo caption limit
+
+if GEMINI_KEY:
+    try: genai.configure(api_key=GEMINI_KEY)
+    except: pass
 
 # --- SANITIZER FUNCTION (Fixes the Crash) ---
 def clean_text(text):
@@ -25,133 +50,50 @@ def clean_text(text):
     # This magic line removes anything that isn't standard English/Latin
     return text.encode('latin-1', 'ignore').decode('latin-1')
 
-try:
-    if os.environ.get("EE_KEY"):
-        key_data = base64.b64decode(os.environ.get("EE_KEY")).decode('utf-8')
-        service_account_info = json.loads(key_data)
-        credentials = Credentials.from_service_account_info(
-            service_account_info, 
-            scopes=['https://www.googleapis.com/auth/earthengine']
-        )
-        ee.Initialize(credentials=credentials, project=PROJECT_ID)
-    else:
-        ee.Initialize(project=PROJECT_ID)
-    print("✅ [SYSTEM] Satellite Connection Established")
-except Exception as e:
-    print(f"❌ [CRITICAL] Auth Failed: {e}")
-    pass
-
-googlenews = GoogleNews(period='2d') 
-googlenews.set_lang('en')
-googlenews.set_encode('utf-8')
+_ready = False
+_init_lock = threading.Lock()  # Two on-demand jobs may call init() at once
+
+def init():
+    """
+    Earth Engine auth + the site registry. The daily scan runs it at startup; the
+    commander's on-demand jobs run it on first use (importing this module has no side effects).
+    """
+    global _ready
+    with _init_lock:
+        if _ready: return
+        try:
+            if os.environ.get("EE_KEY"):
+                key_data = base64.b64decode(os.environ.get("EE_KEY")).decode('utf-8')
+                service_account_info = json.loads(key_data)
+                credentials = Credentials.from_service_account_info(
+                    service_account_info, 
+                    scopes=['https://www.googleapis.com/auth/earthengine']
+                )
+                ee.Initialize(credentials=credentials, project=PROJECT_ID)
+            else:
+                ee.Initialize(project=PROJECT_ID)
+            print("✅ [SYSTEM] Satellite Connection Established")
+        except Exception as e:
+            print(f"❌ [CRITICAL] Auth Failed: {e}")
+            pass
+        targets.clear()
+        targets.update(load_sites())
+        _ready = True
 
 # ==========================================
-# 2. TARGET LIST (With Emojis - Will be stripped for PDF)
+# 2. TARGET LIST (sites.json registry - emojis stripped for PDF)
 # ==========================================
-targets = {
-    "1. COAL INDIA (Gevra Mine)": { 
-        "roi": [82.5600, 22.3100, 82.6000, 22.3500], 
-        "vis": {'bands': ['B12', 'B11', 'B4'], 'min': 0, 'max': 4000, 'gamma': 1.3}, 
-        "query": "Coal India production", 
-        "ticker": "COALINDIA.NS",
-        "location": "Korba District, Chhattisgarh (Asia's Largest Open Cast Mine)",
-        "guide": "ANALYSIS (SWIR Band): The bright pink/brown patches are active mining cuts exposing fresh earth. Black pools are water/slurry."
-    },
-    "2. NMDC (Bailadila Iron)": { 
-        "roi": [81.2000, 18.6600, 81.2400, 18.7000], 
-        "vis": {'bands': ['B12', 'B11', 'B4'], 'min': 0, 'max': 4000, 'gamma': 1.3}, 
-        "query": "NMDC iron ore prices", 
-        "ticker": "NMDC.NS",
-        "location": "Dantewada, Chhattisgarh (Iron Ore Range)",
-        "guide": "ANALYSIS (SWIR Band): High-grade iron ore reflects a distinctive deep orange/red in this band. Look for expansion of red zones."
-    },
-    "3. RELIANCE (Oil Complex)": { 
-        "roi": [69.8300, 22.3300, 69.9100, 22.3800], 
-        "vis": {'bands': ['B12', 'B11', 'B4'], 'min': 0, 'max': 4500, 'gamma': 1.4}, 
-        "query": "Reliance refinery margins", 
-        "ticker": "RELIANCE.NS",
-        "location": "Jamnagar, Gujarat (World's Largest Refinery)",
-        "guide": "ANALYSIS (SWIR Band): White circles are storage tanks. Bright glowing yellow spots indicate active heat flares or processing units."
-    },
-    "4. TATA STEEL (Jamshedpur)": { 
-        "roi": [86.1950, 22.7950, 86.2050, 22.8050], 
-        "vis": {'bands': ['B12', 'B11', 'B4'], 'min': 0, 'max': 4000, 'gamma': 1.4}, 
-        "query": "Tata Steel production", 
-        "ticker": "TATASTEEL.NS",
-        "location": "Jamshedpur, Jharkhand (Main Steel Works)",
-        "guide": "ANALYSIS (SWIR Band): Penetrates smog. Intense orange dots reveal active blast furnaces (1500C+). Blue/White roofs are cold sheds."
-    },
-    "5. HINDALCO (Copper Unit)": { 
-        "roi": [72.5300, 21.6900, 72.5600, 21.7200], 
-        "vis": {'bands': ['B12', 'B11', 'B4'], 'min': 0, 'max': 4000, 'gamma': 1.2}, 
-        "query": "Hindalco copper demand", 
-        "ticker": "HINDALCO.NS",
-        "location": "Dahej, Gujarat (Birla Copper Complex)",
-        "guide": "ANALYSIS (SWIR Band): Large coastal smelter. Dark piles near docks are copper concentrate imports or slag waste."
-    },
-    "6. ULTRACEMCO (Aditya)": { 
-        "roi": [74.6000, 24.7800, 74.6400, 24.8200], 
-        "vis": {'bands': ['B12', 'B11', 'B4'], 'min': 0, 'max': 4000, 'gamma': 1.2}, 
-        "query": "Cement prices India", 
-        "ticker": "ULTRACEMCO.NS",
-        "location": "Shambhupura, Rajasthan (Integrated Cement Plant)",
-        "guide": "ANALYSIS (SWIR Band): Limestone quarries appear bright White/Cyan. Pinkish surrounding earth indicates cleared topsoil."
-    },
-    "7. ADANI PORTS (Mundra)": { 
-        "roi": [69.6900, 22.7300, 69.7300, 22.7600], 
-        "vis": {'bands': ['B8', 'B4', 'B3'], 'min': 0, 'max': 2500, 'gamma': 1.5}, 
-        "query": "Adani Ports cargo volume", 
-        "ticker": "ADANIPORTS.NS",
-        "location": "Mundra, Gujarat (India's Largest Private Port)",
-        "guide": "ANALYSIS (NIR Band): Water appears jet black, contrasting with ships (white dots) and docks. Bright red indicates mangrove vegetation."
-    },
-    "8. CONCOR (Delhi ICD)": { 
-        "roi": [77.2880, 28.5200, 77.2980, 28.5300], 
-        "vis": {'bands': ['B4', 'B3', 'B2'], 'min': 0, 'max': 3000, 'gamma': 1.3}, 
-        "query": "Container Corp volume", 
-        "ticker": "CONCOR.NS",
-        "location": "Tughlakabad, New Delhi (Inland Container Depot)",
-        "guide": "ANALYSIS (True Color): Visual view. Look for density of colorful rectangular blocks (shipping containers) in the yard."
-    },
-    "9. MARUTI (Manesar)": { 
-        "roi": [76.9300, 28.3500, 76.9400, 28.3600], 
-        "vis": {'bands': ['B4', 'B3', 'B2'], 'min': 0, 'max': 3000, 'gamma': 1.4}, 
-        "query": "Maruti Suzuki sales", 
-        "ticker": "MARUTI.NS",
-        "location": "Manesar, Haryana (Vehicle Stockyard)",
-        "guide": "ANALYSIS (True Color): Look for grey parking grids. Filled grids = High Inventory. Empty grey asphalt = Low Inventory (High Sales)."
-    },
-    "10. JEWAR AIRPORT (Site)": { 
-        "roi": [77.6000, 28.1600, 77.6400, 28.1900], 
-        "vis": {'bands': ['B8', 'B4', 'B3'], 'min': 0, 'max': 3000, 'gamma': 1.3}, 
-        "query": "Jewar Airport construction", 
-        "ticker": "GMRINFRA.NS",
-        "location": "Jewar, Uttar Pradesh (Upcoming Int'l Airport)",
-        "guide": "ANALYSIS (NIR Band): Vegetation is red. The bright white/cyan strip is the bare earth of the runway construction site."
-    },
-    "11. BHADLA SOLAR (Park)": { 
-        "roi": [71.9000, 27.5300, 71.9400, 27.5600], 
-        "vis": {'bands': ['B8', 'B4', 'B3'], 'min': 0, 'max': 3000, 'gamma': 1.2}, 
-        "query": "India solar power capacity", 
-        "ticker": None,
-        "location": "Bhadla, Rajasthan (World's Largest Solar Park)",
-        "guide": "ANALYSIS (NIR Band): Solar panels appear dark Blue/Black (absorbing light), contrasting against bright white desert sand."
-    },
-    "12. BHAKRA DAM (Reservoir)": { 
-        "roi": [76.4100, 31.3900, 76.4500, 31.4200], 
-        "vis": {'bands': ['B8', 'B4', 'B3'], 'min': 0, 'max': 2500, 'gamma': 1.4}, 
-        "query": "Monsoon rainfall India", 
-        "ticker": None,
-        "location": "Bilaspur, Himachal Pradesh (Gobind Sagar)",
-        "guide": "ANALYSIS (NIR Band): Deep water is black. Light blue fringes indicate shallow water or drying banks. Red is hill vegetation."
-    }
-}
+targets = {}   # Filled by init(); same dict object for every importer
 
 # ==========================================
 # 3. HELPER FUNCTIONS
 # ==========================================
 def get_valuation_data(ticker):
     if not ticker: return {"price": "N/A", "pe": "N/A", "signal": "N/A"}
+    # Today's feature store already has it (materialized at the start of the scan)
+    cached = feature_store.read_ticker(ticker) if feature_store.is_fresh() else None
+    if cached and cached['price'] is not None:
+        return {"price": f"Rs {cached['price']:.1f}", "pe": f"{cached['pe'] or 0:.1f}x", "signal": cached['valuation_signal']}
     try:
         stock = yf.Ticker(ticker)
         info = stock.info
@@ -165,16 +107,17 @@ def get_valuation_data(ticker):
             start_price = hist['Close'].iloc[0]
             change_pct = ((current_price - start_price) / start_price) * 100
             
-        signal = "NEUTRAL"
-        if pe_ratio > 0:
-            if pe_ratio < 15 and change_pct < 10: signal = "VALUE BUY"
-            elif pe_ratio > 40: signal = "OVERVALUED"
-            elif change_pct > 15: signal = "HEATED"
+        signal = feature_store.valuation_signal(pe_ratio, change_pct)
+        feature_store.update(ticker, price=current_price, pe=pe_ratio or None, ret_1m=change_pct)
         
         return {"price": f"Rs {current_price:.1f}", "pe": f"{pe_ratio:.1f}x", "signal": signal}
     except: return {"price": "Error", "pe": "-", "signal": "Error"}
 
-def get_satellite_data(coords, vis, filename):
+def get_satellite_data(coords, vis, filename, dimensions=700, crs=None, mosaic=False):
+    """
+    Latest clear Sentinel-2 view of coords. mosaic=True (shared tiles) layers the
+    recent scenes newest-on-top, so a member outside the newest granule still gets pixels.
+    """
     try:
         roi = ee.Geometry.Rectangle(coords)
         end_date = datetime.now()
@@ -186,29 +129,59 @@ def get_satellite_data(coords, vis, filename):
                .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 15))
                .sort('system:time_start', False))
         
-        if col.size().getInfo() > 0:
+        # One round trip gives both "is there a scene?" and its ID for the change cache
+        scene_ids = col.limit(1).aggregate_array('system:index').getInfo()
+        if scene_ids:
             vis_params = {
                 'min': vis['min'], 
                 'max': vis['max'], 
                 'bands': vis['bands'], 
                 'region': roi, 
                 'format': 'jpg', 
-                'dimensions': 700, 
+                'dimensions': dimensions, 
                 'gamma': vis.get('gamma', 1.0)
             }
-            url = col.first().getThumbURL(vis_params)
-            r = requests.get(url)
-            if r.status_code == 200:
-                with open(filename, 'wb') as f:
-                    f.write(r.content)
-                return url, True
+            if crs: vis_params['crs'] = crs
+            image = col.sort('system:time_start').mosaic() if mosaic else col.first()
+            url = image.getThumbURL(vis_params)
+            if http_client.download(url, filename, timeout=(5, 60)):
+                return url, scene_ids[0]
     except Exception as e:
         print(f"EE Error: {e}")
-    return None, False
+    return None, None
+
+def fetch_tile(tile, order):
+    """One EE scene per tile, cropped locally for every site it covers. Returns {name: (file, ok, scene_id)}."""
+    images = {}
+    shared = len(tile['sites']) > 1
+    tile_file = f"{tile['id']}.jpg"
+    with tracing.span("fetch", "ee", target=tile['id'], sites=len(tile['sites'])):
+        _, scene_id = get_satellite_data(tile['bbox'], tile['vis'], tile_file, tile['dimensions'],
+                                         crs='EPSG:4326' if shared else None, mosaic=shared)
+    for site in tile['sites']:
+        img_filename = f"sector_{order[site]}.jpg"
+        if not scene_id:
+            images[site] = (img_filename, False, None)
+            continue
+        try:
+            if shared:
+                crop_site(tile_file, tile['bbox'], targets[site]['roi'], img_filename,
+                          tile_gamma=tile['vis'].get('gamma', 1.0),
+                          site_gamma=targets[site]['vis'].get('gamma', 1.0))
+            else:
+                shutil.copyfile(tile_file, img_filename)
+            images[site] = (img_filename, True, scene_id)
+        except Exception as e:
+            print(f"Crop Error ({site}): {e}")
+            images[site] = (img_filename, False, None)
+    return images
 
 def get_market_news(query):
     try:
-        googlenews.clear()
+        # One client per call: GoogleNews keeps results on the instance, and sites run in parallel
+        googlenews = GoogleNews(period='2d')
+        googlenews.set_lang('en')
+        googlenews.set_encode('utf-8')
         googlenews.search(query)
         results = googlenews.result()
         news_data = []
@@ -226,22 +199,39 @@ def get_market_news(query):
     except:
         return [{'title': "News fetch failed.", 'link': "#", 'date': "Error"}]
 
-# ==========================================
-# 4. REPORT GENERATION (SAFE & ENHANCED)
-# ==========================================
-print("🚀 [SYSTEM] Generating Enhanced Report...")
-
-pdf = FPDF()
-pdf.set_auto_page_break(auto=True, margin=15)
+def get_ai_commentary(name, data, change, val_data, news_items):
+    """Asks Gemini what the detected change means for the stock. Returns (sentiment, comment)."""
+    if not GEMINI_KEY: return None, ""
+    headlines = "\n".join(f"- {n['title']}" for n in news_items)
+    prompt = (
+        f"Satellite monitoring of {name} ({data['location']}).\n"
+        f"Analyst guide: {data['guide']}\n"
+        f"Change vs previous scene: {change['changed_pct']:.1f}% of the area changed "
+        f"(mean per-band delta {change['band_delta']}).\n"
+        f"Valuation: {val_data['price']}, P/E {val_data['pe']}, signal {val_data['signal']}.\n"
+        f"Latest headlines:\n{headlines}\n\n"
+        "Task: Judge whether this physical activity is good or bad for the linked stock.\n"
+        "Output Format:\n"
+        "SENTIMENT: [POSITIVE/NEGATIVE/NEUTRAL]\n"
+        "COMMENT: [1-2 concise sentences]"
+    )
+    for m in ['gemini-2.5-flash', 'gemini-2.0-flash']:
+        try:
+            model = genai.GenerativeModel(m)
+            with tracing.span("llm", "gemini", target=name, model=m):
+                response = model.generate_content(prompt)
+            text = response.text.strip()
+            sentiment = None
+            for label in ["POSITIVE", "NEGATIVE", "NEUTRAL"]:
+                if f"SENTIMENT: {label}" in text.upper():
+                    sentiment = label
+                    break
+            comment = text.split("COMMENT:", 1)[-1].strip()
+            return sentiment, comment
+        except: continue
+    return None, ""
 
-for i, (name, data) in enumerate(targets.items()):
-    print(f"   ...Analyzing: {name}")
-    
-    img_filename = f"sector_{i}.jpg"
-    img_url, has_image = get_satellite_data(data['roi'], data['vis'], img_filename)
-    news_items = get_market_news(data['query'])
-    val_data = get_valuation_data(data['ticker'])
-    
+def render_page(pdf, name, data, val_data, news_items, img_filename, has_image, change=None, commentary="", sheet=None):
     pdf.add_page()
     
     # 1. Header (Sanitized)
@@ -261,8 +251,18 @@ for i, (name, data) in enumerate(targets.items()):
     pdf.set_fill_color(240, 240, 240)
     pdf.set_text_color(0, 0, 0)
     pdf.cell(0, 8, f"  Price: {val_data['price']}  |  P/E: {val_data['pe']}  |  Signal: {val_data['signal']}", ln=True, fill=True)
+    if change:
+        label = "First scene on record" if change['first_seen'] else f"{change['changed_pct']:.1f}% of area changed since last scene"
+        pdf.cell(0, 8, f"  Ground Change: {label}", ln=True, fill=True)
     pdf.ln(5)
     
+    # AI Commentary (Sanitized)
+    if commentary:
+        pdf.set_font("Arial", "I", 10)
+        pdf.set_text_color(60, 60, 60)
+        pdf.multi_cell(0, 5, clean_text(f"AI Read: {commentary}"))
+        pdf.ln(3)
+    
     # 4. News Links (Sanitized)
     pdf.set_font("Arial", "", 10)
     pdf.set_text_color(0, 0, 255)
@@ -288,20 +288,265 @@ for i, (name, data) in enumerate(targets.items()):
         except:
             pdf.cell(0, 10, "Image Error", ln=True)
 
-# Finalize
-filename = "Financial_Intel_Report.pdf"
-pdf.output(filename)
-print("✅ Report Generated.")
+    # 6. Time-lapse contact sheet (oldest -> newest, left to right)
+    if sheet:
+        try:
+            pdf.add_page()
+            pdf.set_font("Arial", "B", 10)
+            pdf.set_text_color(50, 50, 50)
+            pdf.cell(0, 8, clean_text(f"Time-lapse: {name}"), ln=True)
+            pdf.image(sheet, x=10, w=190)
+        except:
+            pdf.cell(0, 10, "Time-lapse Error", ln=True)
+
+# ==========================================
+# 4. PER-SITE ANALYSIS & DELIVERY
+# ==========================================
+def analyze_site(name, img_filename, has_image, scene_id, scene_index):
+    """Change gate, then news / valuation / AI for changed sites. Returns the site's artifact."""
+    data = targets[name]
+    print(f"   ...Analyzing: {name}")
+    artifact = {"name": name, "img": img_filename, "has_image": has_image, "change": None, "quiet": False}
+    if has_image:
+        with tracing.span("indicator", "numpy", profile=True, target=name):
+            artifact['change'] = detect_change(name, img_filename, scene_id, index=scene_index)
+
+    # Change gate: quiet sites skip the page, the LLM and the sentiment update
+    change = artifact['change']
+    if not FULL_REPORT and (change is None or not change['changed']):
+        artifact['quiet'] = True
+        return artifact
+
+    with tracing.span("fetch", "googlenews", target=name):
+        artifact['news'] = get_market_news(data['query'])
+    with tracing.span("fetch", "yfinance", target=name):
+        artifact['val'] = get_valuation_data(data['ticker'])
+
+    artifact['sentiment'], artifact['commentary'] = None, ""
+    artifact['archive_key'] = f"site:{name}:{scene_id}" if scene_id else None
+    past = intel_archive.lookup(artifact['archive_key']) if artifact['archive_key'] else None
+    if past:
+        # This exact scene was analyzed before (e.g. FULL_REPORT re-run): reuse the archived read
+        artifact['sentiment'] = ARCHIVE_SENTIMENT.get(past['sentiment'])
+        artifact['commentary'] = past['body'].split("\n", 1)[0]
+        tracing.count("archived_commentary")
+    elif change:
+        artifact['sentiment'], artifact['commentary'] = get_ai_commentary(name, data, change, artifact['val'], artifact['news'])
+
+    # Time-lapse only for changed sites; cached frames make this one new download per day
+    artifact['timelapse'] = None
+    try:
+        artifact['timelapse'] = timelapse.build_timelapse(name, data)
+    except Exception as e:
+        print(f"⚠️ Time-lapse failed ({name}): {e}")
+    return artifact
+
+def archive_site(artifact):
+    """Page summary -> intel archive (first body line is the commentary, reused for the same scene)"""
+    data, val, change = targets[artifact['name']], artifact['val'], artifact['change']
+    lines = [artifact.get('commentary') or "", f"Location: {data['location']}",
+             f"Price: {val['price']} | P/E: {val['pe']} | {val['signal']}"]
+    if change: lines.append(f"Ground: {change['changed_pct']:.1f}% of area changed (first_seen={change['first_seen']})")
+    lines += [f"- {n['title']}" for n in artifact.get('news', [])]
+    intel_archive.record("satellite", "site_page", artifact['name'], "\n".join(lines), ticker=data['ticker'],
+                         sentiment=artifact.get('sentiment'), key=artifact.get('archive_key'))
+
+def scan_tile(tile, order, scene_index, results):
+    """Worker: fetch one tile, then hand each site's artifact to the dispatcher as soon as it is ready"""
+    try:
+        images = fetch_tile(tile, order)
+    except Exception as e:
+        print(f"Tile Error ({tile['id']}): {e}")
+        images = {site: (f"sector_{order[site]}.jpg", False, None) for site in tile['sites']}
+    for site in tile['sites']:
+        try:
+            results.put(analyze_site(site, *images[site], scene_index))
+        except Exception as e:
+            print(f"Site Error ({site}): {e}")
+            results.put({"name": site, "img": images[site][0], "has_image": False, "change": None, "quiet": True})
+
+def build_caption(artifact, footer=None):
+    """
+    Telegram caption (HTML, max CAPTION_LIMIT chars) with the same facts as the PDF page; footer is kept last.
+    The commentary and news list are trimmed before the markup is built, so a tag is never cut in half.
+    """
+    data = targets[artifact['name']]
+    val, change = artifact['val'], artifact['change']
+    head = [f"🛰️ <b>{html.escape(artifact['name'])}</b>", f"<i>{html.escape(data['location'])}</i>", ""]
+    head.append(f"💰 Price: <code>{val['price']}</code> | P/E: <code>{val['pe']}</code> | {val['signal']}")
+    if change:
+        ground = "first scene on record" if change['first_seen'] else f"{change['changed_pct']:.1f}% of area changed"
+        head.append(f"🌍 Ground: {ground}")
+    tail = [footer] if footer else []
+    budget = CAPTION_LIMIT - len("\n".join(head + [""] + tail)) - 1
+
+    commentary = artifact.get('commentary') or ""
+    if commentary:
+        icon = {"POSITIVE": "🟢", "NEGATIVE": "🔴"}.get(artifact.get('sentiment'), "⚪")
+        room = max(0, budget - len(icon) - 2)
+        text = html.escape(commentary)
+        if len(text) > room:
+            cut = max(0, room - 3)
+            while cut and len(html.escape(commentary[:cut])) > room - 3: cut -= 1
+            text = html.escape(commentary[:cut]) + "..."
+        head.append(f"{icon} {text}")
+        budget -= len(head[-1]) + 1
+    head.append("")
+    for n in artifact['news']:
+        line = f"📰 <a href='{html.escape(n['link'], quote=True)}'>{html.escape(n['title'])}</a>"
+        if len(line) + 1 > budget: break
+        head.append(line)
+        budget -= len(line) + 1
+    return "\n".join(head + tail)
+
+def _plain(caption):
+    """HTML caption -> plain text, for when Telegram rejects the markup"""
+    return html.unescape(re.sub(r"<[^>]+>", "", caption))
+
+def _post_site(method, payload, files=None, timeout=60):
+    """One Telegram call; a rejected HTML message is logged and sent again as plain text"""
+    url = f"https://api.telegram.org/bot{BOT_TOKEN}/{method}"
+
+    def send(body):
+        if files: return http_client.post(url, data=body, files=files, timeout=timeout)
+        return http_client.post(url, json=body, timeout=timeout)
+
+    response = send(payload)
+    if response.status_code == 200: return True
+    print(f"⚠️ Telegram {method} rejected ({response.status_code}): {response.text[:200]}")
+    if payload.get("parse_mode") != "HTML": return False
+    for f in (files or {}).values(): f.seek(0)
+    field = "caption" if "caption" in payload else "text"
+    plain = {k: v for k, v in payload.items() if k != "parse_mode"}
+    plain[field] = _plain(payload[field])
+    response = send(plain)
+    if response.status_code != 200:
+        print(f"❌ Telegram {method} failed again ({response.status_code}): {response.text[:200]}")
+    return response.status_code == 200
 
-# Telegram Send
-if BOT_TOKEN and CHAT_ID:
+def send_site_update(artifact):
+    """Streams one changed site to Telegram: photo + caption, or text if there is no image"""
+    if not BOT_TOKEN or not CHAT_ID: return
+    caption = build_caption(artifact)
+    try:
+        with tracing.span("send", "telegram", target=artifact['name']):
+            if artifact['has_image']:
+                with open(artifact['img'], 'rb') as f:
+                    _post_site("sendPhoto", {"chat_id": CHAT_ID, "caption": caption, "parse_mode": "HTML"},
+                               files={"photo": f}, timeout=60)
+            else:
+                _post_site("sendMessage", {"chat_id": CHAT_ID, "text": caption, "parse_mode": "HTML",
+                                           "disable_web_page_preview": True}, timeout=30)
+            lapse = artifact.get('timelapse')
+            if lapse and lapse['frames'] > 1:
+                with open(lapse['gif'], 'rb') as f:
+                    _post_site("sendAnimation",
+                               {"chat_id": CHAT_ID,
+                                "caption": f"⏳ Time-lapse: {lapse['frames']} scenes, {lapse['first']} → {lapse['last']}"},
+                               files={"animation": f}, timeout=60)
+    except Exception as e:
+        print(f"❌ Telegram Error ({artifact['name']}): {e}")
+
+def build_report(artifacts, filename=REPORT_FILE):
+    """Consolidated PDF, assembled from the cached per-site artifacts in registry order"""
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    quiet_sites = []
+    for name in targets:
+        artifact = artifacts.get(name)
+        if artifact is None: continue
+        if artifact['quiet']:
+            quiet_sites.append((name, artifact['change']))
+            continue
+        with tracing.span("render", "fpdf", target=name):
+            sheet = None
+            if artifact.get('timelapse'):
+                sheet = timelapse.contact_sheet(artifact['timelapse'], os.path.join(artifact['timelapse']['folder'], "sheet.jpg"))
+            render_page(pdf, name, targets[name], artifact['val'], artifact['news'], artifact['img'],
+                        artifact['has_image'], artifact['change'], artifact['commentary'], sheet)
+
+    # Quiet-day digest: one line per site that stayed below the change threshold
+    if quiet_sites:
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 14)
+        pdf.set_text_color(44, 62, 80)
+        pdf.cell(0, 10, f"No Significant Change (< {CHANGE_THRESHOLD_PCT:.1f}% of area)", ln=True)
+        pdf.set_font("Arial", "", 10)
+        pdf.set_text_color(0, 0, 0)
+        for name, change in quiet_sites:
+            if change is None: status = "No clear scene in the last 45 days"
+            elif change['same_scene']: status = "No new acquisition since last run"
+            else: status = f"{change['changed_pct']:.1f}% changed"
+            pdf.cell(0, 7, clean_text(f"- {name}: {status}"), ln=True)
+
+    with tracing.span("render", "fpdf", profile=True, target="pdf.output"):
+        pdf.output(filename)
+    return quiet_sites
+
+def send_report(filename, active, quiet):
+    if not BOT_TOKEN or not CHAT_ID: return
     print("🚀 Sending to Telegram...")
     try:
         with open(filename, 'rb') as f:
             url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendDocument"
-            payload = {"chat_id": CHAT_ID, "caption": "🛰️ **Strategic Satellite Dispatch**\nFull Imagery & Analyst Guides Included."}
+            payload = {"chat_id": CHAT_ID, "caption": f"🛰️ **Strategic Satellite Dispatch**\n{active} sites changed (full pages), {quiet} quiet."}
             files = {"document": f}
-            requests.post(url, data=payload, files=files)
+            with tracing.span("send", "telegram"):
+                http_client.post(url, data=payload, files=files, timeout=(5, 120))
             print("✅ Sent.")
     except Exception as e:
         print(f"❌ Telegram Error: {e}")
+
+def run_daily_scan():
+    print("🚀 [SYSTEM] Generating Enhanced Report...")
+    tiles = group_into_tiles(targets)
+    print(f"🛰️ [SYSTEM] {len(targets)} sites -> {len(tiles)} scene tiles ({DELIVERY_MODE} mode)")
+    order = {name: i for i, name in enumerate(targets)}
+    scene_index = load_index()
+    try:
+        feature_store.materialize([site['ticker'] for site in targets.values() if site['ticker']])
+    except Exception as e:
+        print(f"⚠️ Feature store skipped: {e}")
+
+    # Tiles are fetched in parallel; each finished site is dispatched right away
+    results = queue.Queue()
+    artifacts = {}
+    started = time.perf_counter()
+    first_dispatch = None
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as pool:
+        for tile in tiles:
+            pool.submit(scan_tile, tile, order, scene_index, results)
+        for _ in range(len(targets)):
+            artifact = results.get()
+            artifacts[artifact['name']] = artifact
+            ticker = targets[artifact['name']]['ticker']
+            if ticker and artifact['change']:
+                feature_store.update(ticker, sat_change_pct=artifact['change']['changed_pct'])
+            if artifact['quiet']:
+                tracing.count("quiet_sites")
+                continue
+            if artifact.get('sentiment') and ticker:
+                update_stock_sentiment(ticker, artifact['sentiment'])
+                feature_store.update(ticker, confluence=get_confluence_score(ticker))
+            archive_site(artifact)
+            if DELIVERY_MODE == "stream":
+                send_site_update(artifact)
+                tracing.count("streamed_sites")
+                if first_dispatch is None:
+                    first_dispatch = time.perf_counter() - started
+                    print(f"⚡ First site delivered after {first_dispatch:.1f}s")
+
+    save_index(scene_index)
+    commit_memory("🛰️ Update Satellite Sentiment [Skip CI]")  # One commit for every sentiment this run wrote
+    quiet_sites = build_report(artifacts)
+    print("✅ Report Generated.")
+    quiet_names = {name for name, _ in quiet_sites}
+    intel_archive.record("satellite", "report", f"Satellite Dispatch {datetime.now().strftime('%d %b %Y')}",
+                         "Changed: " + ", ".join(n for n in targets if n not in quiet_names) +
+                         "\nQuiet: " + ", ".join(n for n in targets if n in quiet_names))
+    send_report(REPORT_FILE, len(targets) - len(quiet_sites), len(quiet_sites))
+
+if __name__ == "__main__":
+    tracing.start_run("main")
+    init()
+    run_daily_scan()
@@ -1,8 +1,18 @@
 import json
 import os
-import requests
+import sys
+import time
+import random
+import threading
+import subprocess
+from datetime import datetime, timezone
+import http_client
+import tracing
 
 MEMORY_FILE = "market_memory.json"
+SOURCE = os.path.splitext(os.path.basename(sys.argv[0] or ""))[0] or "bot"  # Who stamped a key
+PUSH_RETRIES = 4
+_lock = threading.Lock()
 
 # You need to fill these in, or ensure they are set in your Environment Variables
 # For simplicity, if the Env Vars exist (Commander has them), we use them.
@@ -15,39 +25,141 @@ def load_memory():
     if REPO_OWNER and REPO_NAME:
         url = f"https://raw.githubusercontent.com/{REPO_OWNER}/{REPO_NAME}/main/market_memory.json"
         try:
-            # We use a timeout so it doesn't hang if GitHub is slow
-            response = requests.get(url, timeout=5)
+            # Short timeouts + one retry so it doesn't hang if GitHub is slow
+            response = http_client.get(url, timeout=(3, 5), retries=1, hedge_after=1.5)
             if response.status_code == 200:
-                return response.json()
+                # Local stamps not pushed yet must still win over older cloud values
+                return merge(response.json(), _read_local())
         except:
             pass # If cloud fails, fall back to local file
 
     # 2. Local Fallback
-    if not os.path.exists(MEMORY_FILE):
-        return {"global_trend": "NEUTRAL", "stock_sentiment": {}}
+    return merge(_read_local())
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+def _read_local():
+    if not os.path.exists(MEMORY_FILE): return {}
     try:
         with open(MEMORY_FILE, "r") as f:
             return json.load(f)
     except:
-        return {"global_trend": "NEUTRAL", "stock_sentiment": {}}
+        return {}
+
+def _write_local(mem):
+    with open(MEMORY_FILE + ".tmp", "w") as f:
+        json.dump(mem, f, indent=4, sort_keys=True)
+    os.replace(MEMORY_FILE + ".tmp", MEMORY_FILE)
+
+def _entries(mem):
+    """Flattens memory into {key: (value, meta)}; keys are 'global_trend' and 'stock_sentiment/<TICKER>'"""
+    meta = mem.get("_meta", {})
+    entries = {}
+    if "global_trend" in mem:
+        entries["global_trend"] = (mem["global_trend"], meta.get("global_trend", {}))
+    for ticker, value in mem.get("stock_sentiment", {}).items():
+        key = f"stock_sentiment/{ticker}"
+        entries[key] = (value, meta.get(key, {}))
+    return entries
+
+def _build(entries):
+    """Only keys that were actually present come back out (no phantom NEUTRAL default)"""
+    mem = {"stock_sentiment": {}, "_meta": {}}
+    for key, (value, meta) in sorted(entries.items()):
+        if key == "global_trend": mem["global_trend"] = value
+        else: mem["stock_sentiment"][key.split("/", 1)[1]] = value
+        if meta: mem["_meta"][key] = meta
+    return mem
+
+def merge(*memories):
+    """
+    Last-writer-wins per key. Newest ts wins, then source name, then value, so any
+    merge order of stamped writes gives the same result. Keys without _meta (old files)
+    lose to any stamped write; between two unstamped values the earlier memory is kept.
+    """
+    best = {}
+    for mem in memories:
+        for key, (value, meta) in _entries(mem).items():
+            if not meta.get("ts") and key in best: continue
+            rank = (meta.get("ts", ""), meta.get("source", ""), str(value))
+            if key not in best or rank > best[key][0]:
+                best[key] = (rank, value, meta)
+    return _build({key: (value, meta) for key, (_, value, meta) in best.items()})
 
-def update_global_trend(trend):
+def _set(key, value, source=None):
+    """Stamps one key in the local file. Nothing is pushed until commit_memory()."""
+    with _lock:
+        entries = _entries(merge(_read_local()))
+        entries[key] = (value, {"ts": _now(), "source": source or SOURCE})
+        _write_local(_build(entries))
+
+def update_global_trend(trend, source=None):
     """Macro Bot calls this (BULLISH/BEARISH/NEUTRAL)"""
-    mem = load_memory() # Load latest
-    mem["global_trend"] = trend.upper()
-    with open(MEMORY_FILE, "w") as f:
-        json.dump(mem, f, indent=4)
+    _set("global_trend", trend.upper(), source)
 
-def update_stock_sentiment(ticker, sentiment):
+def update_stock_sentiment(ticker, sentiment, source=None):
     """Satellite/News Bot calls this"""
-    mem = load_memory() # Load latest
     if not ticker.endswith(".NS"): ticker += ".NS"
-    mem["stock_sentiment"][ticker] = sentiment.upper()
-    with open(MEMORY_FILE, "w") as f:
-        json.dump(mem, f, indent=4)
+    _set(f"stock_sentiment/{ticker}", sentiment.upper(), source)
+
+# ==========================================
+# BATCHED COMMIT (one per run, merge + retry on conflict)
+# ==========================================
+def _git(*args, input=None, env=None, check=True):
+    result = subprocess.run(["git", *args], input=input, capture_output=True, text=True, env=env)
+    if check and result.returncode != 0:
+        raise RuntimeError(f"git {args[0]}: {result.stderr.strip()}")
+    return result.stdout.strip()
+
+def _parse(raw):
+    try:
+        return json.loads(raw) if raw else {}
+    except ValueError:
+        return {}
+
+def commit_memory(message="🧠 Update Market Memory [Skip CI]", remote="origin", branch=None, retries=PUSH_RETRIES):
+    """
+    Pushes every update this run made as a single commit. The commit is built
+    on top of the remote's latest memory (merged, never overwritten) without
+    touching the working tree; a rejected push refetches, re-merges and retries.
+    """
+    index_file = os.path.abspath(f".memory_index_{os.getpid()}")
+    env = dict(os.environ, GIT_INDEX_FILE=index_file, GIT_AUTHOR_NAME=f"{SOURCE} bot", GIT_COMMITTER_NAME=f"{SOURCE} bot",
+               GIT_AUTHOR_EMAIL="bot@github.com", GIT_COMMITTER_EMAIL="bot@github.com")
+    try:
+        with tracing.span("persist", "git"):
+            branch = branch or os.environ.get("GITHUB_REF_NAME") or _git("rev-parse", "--abbrev-ref", "HEAD")
+            for attempt in range(retries + 1):
+                try:
+                    _git("fetch", "--quiet", remote, branch)
+                    base = _git("rev-parse", "FETCH_HEAD")
+                    theirs = _parse(_git("show", f"{base}:{MEMORY_FILE}", check=False))
+                    with _lock:
+                        merged = merge(theirs, _read_local())
+                        _write_local(merged)
+                    if json.dumps(merged, sort_keys=True) == json.dumps(merge(theirs), sort_keys=True):
+                        print("✅ Memory already up to date.")
+                        return True
+                    blob = _git("hash-object", "-w", "--stdin", input=json.dumps(merged, indent=4, sort_keys=True) + "\n")
+                    _git("read-tree", base, env=env)
+                    _git("update-index", "--add", "--cacheinfo", f"100644,{blob},{MEMORY_FILE}", env=env)
+                    tree = _git("write-tree", env=env)
+                    commit = _git("commit-tree", tree, "-p", base, "-m", message, env=env)
+                    _git("push", "--quiet", remote, f"{commit}:refs/heads/{branch}")
+                    print("✅ Memory Saved to GitHub.")
+                    return True
+                except RuntimeError as e:
+                    print(f"⚠️ Memory push attempt {attempt + 1} failed: {e}")
+                    if attempt < retries: time.sleep(random.uniform(1, 2 ** (attempt + 1)))
+    except Exception as e:
+        print(f"⚠️ Memory Save Failed: {e}")
+    finally:
+        if os.path.exists(index_file): os.remove(index_file)
+    return False
 
-def get_confluence_score(ticker):
-    mem = load_memory() # Load latest
+def get_confluence_score(ticker, mem=None):
+    if mem is None: mem = load_memory() # Load latest (callers scoring many tickers pass one copy in)
     if not ticker.endswith(".NS"): ticker += ".NS"
     
     score = 50 
@@ -1,8 +1,14 @@
-import requests
+import http_client
 import os
+import re
 import json
 import google.generativeai as genai
 from datetime import datetime, timedelta
+import tracing
+import intel_archive
+import filing_reader
+import sentiment_model
+import story_index
 
 # --- CONFIGURATION ---
 NSE_API = "https://www.nseindia.com/api/corporate-announcements?index=equities"
@@ -33,7 +39,24 @@ WATCHLIST = [
     "Press Release", "Earnings", "Result", "Preferential"
 ]
 
-def analyze_news_with_ai(symbol, category, headline):
+# Wording every NSE filing shares; left in, it makes unrelated filings of one company look alike
+FILING_BOILERPLATE = re.compile(
+    r"\b(?:has|have)\s+(?:informed|intimated|submitted\s+to)\s+the\s+exchange(?:\s+(?:regarding|about|that|of|on))?"
+    r"|\bpursuant\s+to\s+regulation\s+\d+(?:[^.:]*?\bregulations?(?:,?\s*\d{4})?)?|\bsebi\s*\(lodr\)\s*regulations?(?:,?\s*\d{4})?"
+    r"|\b(?:limited|ltd)\b\.?", re.IGNORECASE)
+
+def filing_title(company, category, headline):
+    """What the story index compares: category + headline, minus the company name and exchange boilerplate"""
+    text = headline
+    if company: text = re.sub(re.escape(company), " ", text, flags=re.IGNORECASE)
+    return f"{category}: {' '.join(FILING_BOILERPLATE.sub(' ', text).split())}"
+
+def is_refiling(cluster_id, title):
+    """True if an earlier filing in the cluster has exactly the same wording (a correction / re-upload)"""
+    words = story_index.tokens(title)
+    return any(story_index.tokens(s['title']) == words for s in story_index.members(cluster_id)[:-1])
+
+def analyze_news_with_ai(symbol, category, headline, filing_excerpt=""):
     """Asks Gemini 3 Pro (from your confirmed list) to analyze news."""
     if not GEMINI_KEY: return "⚠️ AI Key Missing"
     
@@ -41,6 +64,7 @@ def analyze_news_with_ai(symbol, category, headline):
         f"Analyze this corporate filing for Indian stock '{symbol}':\n"
         f"Category: {category}\n"
         f"Headline: {headline}\n\n"
+        + (f"Excerpt from the filing document:\n{filing_excerpt}\n\n" if filing_excerpt else "") +
         "Task: Determine if this is good (BULLISH), bad (BEARISH), or neutral for the stock price.\n"
         "Output Format:\n"
         "IMPACT: [BULLISH/BEARISH/NEUTRAL]\n"
@@ -55,7 +79,8 @@ def analyze_news_with_ai(symbol, category, headline):
     for model_name in models_to_try:
         try:
             model = genai.GenerativeModel(model_name)
-            response = model.generate_content(prompt)
+            with tracing.span("llm", "gemini", symbol=symbol, model=model_name):
+                response = model.generate_content(prompt)
             return response.text.strip()
         except Exception as e:
             # If the first one fails, try the next one silently
@@ -73,19 +98,23 @@ def send_telegram_alert(msg):
         "parse_mode": "HTML", 
         "disable_web_page_preview": True
     }
-    requests.post(url, json=payload)
+    with tracing.span("send", "telegram"):
+        http_client.post(url, json=payload)
 
 def get_nse_data():
     try:
-        session = requests.Session()
-        session.get("https://www.nseindia.com", headers=HEADERS) 
-        response = session.get(NSE_API, headers=HEADERS)
+        # Same pooled host session for both calls, so the homepage cookies carry over
+        with tracing.span("fetch", "nse", call="homepage"):
+            http_client.get("https://www.nseindia.com", headers=HEADERS, timeout=(5, 15))
+        with tracing.span("fetch", "nse", call="announcements"):
+            response = http_client.get(NSE_API, headers=HEADERS, timeout=(5, 20), hedge_after=4)
         return response.json()
     except Exception as e:
         print(f"❌ Error: {e}")
         return []
 
 def check_for_fresh_news():
+    tracing.start_run("news_bot")
     print(f"🚀 Scanning NSE (Gemini 3 Pro)... [{datetime.now().strftime('%H:%M:%S')}]")
     data = get_nse_data()
     
@@ -93,6 +122,8 @@ def check_for_fresh_news():
     time_threshold = now - timedelta(minutes=15) 
     
     alert_count = 0
+    matches = []
+    run_clusters = {}  # story cluster -> the match that will be analyzed for it
     
     for item in data:
         raw_date = item.get('an_dt') 
@@ -113,37 +144,88 @@ def check_for_fresh_news():
                 pdf_link = f"{URL_SME}{attachment}"
             else:
                 pdf_link = f"{URL_CORP}{attachment}"
-            safe_link = f"https://www.nseindia.com/get-quotes/equity?symbol={symbol}"
 
             full_text = f"{category} {headline}"
             
             if any(k.lower() in full_text.lower() for k in WATCHLIST):
-                
-                print(f"🧠 Analyzing {symbol}...")
-                ai_insight = analyze_news_with_ai(symbol, category, headline)
-                
-                # Dynamic Icon
-                if "BULLISH" in ai_insight.upper():
-                    icon = "🟢"
-                elif "BEARISH" in ai_insight.upper():
-                    icon = "🔴"
-                elif "NEUTRAL" in ai_insight.upper():
-                    icon = "⚪"
-                else:
-                    icon = "⚠️"
-
-                alert_msg = (
-                    f"<b>🚨 {symbol}</b> | {category}\n\n"
-                    f"📰 <b>{headline}</b>\n\n"
-                    f"{icon} <b>AI INSIGHT:</b>\n<pre>{ai_insight}</pre>\n\n"
-                    f"🔗 <a href='{pdf_link}'>Try PDF</a> | <a href='{safe_link}'>View on NSE</a>\n"
-                    f"🕒 <i>{raw_date}</i>"
-                )
-                
-                print(f"Sent Alert: {symbol}")
-                send_telegram_alert(alert_msg)
-                alert_count += 1
+                # Runs overlap (every 5 min, 15 min window): a filing already in the archive was already sent
+                archive_key = f"nse:{attachment or f'{symbol}:{raw_date}:{category}'}"
+                if intel_archive.lookup(archive_key):
+                    tracing.count("already_archived")
+                    continue
+                # Re-filed / corrected announcements: near-duplicates for the same symbol and category form one cluster
+                title = filing_title(item.get('sm_name'), category, headline)
+                cluster_id, status = story_index.assign(title, "news", link=archive_key, scope=f"{symbol}:{category}")
+                if cluster_id in run_clusters:
+                    if status != "seen" and attachment: run_clusters[cluster_id]['also_filed'].append(pdf_link)
+                    tracing.count("duplicate_filings")
+                    continue
+                # Across runs only an exact re-filing stays quiet; a similar but new filing still alerts
+                if story_index.get_cluster(cluster_id)['alerted'] and (status == "seen" or is_refiling(cluster_id, title)):
+                    tracing.count("already_alerted")
+                    continue
+                keywords = [k for k in WATCHLIST if k.lower() in full_text.lower()]
+                # Obvious filings are labelled by the local model; only low-confidence ones go to Gemini
+                label, confidence, route = sentiment_model.route(f"{category}: {headline}", "news")
+                matches.append({"symbol": symbol, "category": category, "headline": headline, "raw_date": raw_date,
+                                "news_time": news_time, "pdf_link": pdf_link if attachment else None,
+                                "archive_key": archive_key, "keywords": keywords,
+                                "label": label, "confidence": confidence, "route": route,
+                                "cluster": cluster_id, "also_filed": []})
+                run_clusters[cluster_id] = matches[-1]
+
+    # The whole burst of attachments downloads and extracts in parallel while the AI loop runs
+    filing_reader.prefetch([m['pdf_link'] for m in matches if m['route'] != "local"])
+    
+    for m in matches:
+        symbol, category, headline, pdf_link = m['symbol'], m['category'], m['headline'], m['pdf_link']
+        safe_link = f"https://www.nseindia.com/get-quotes/equity?symbol={symbol}"
+        filing_excerpt = ""
+        if m['route'] == "local":
+            ai_insight = (f"IMPACT: {m['label']}\n"
+                          f"INSIGHT: Routine {category.lower()} filing (local model, {m['confidence']:.0%} confident; AI skipped).")
+        else:
+            if pdf_link: filing_excerpt = filing_reader.excerpt(filing_reader.get_text(pdf_link), m['keywords'])
+            print(f"🧠 Analyzing {symbol}...")
+            ai_insight = analyze_news_with_ai(symbol, category, headline, filing_excerpt)
+            sentiment_model.observe("news", m['label'], ai_insight, m['route'])
+        
+        # Dynamic Icon
+        if "BULLISH" in ai_insight.upper():
+            icon = "🟢"
+        elif "BEARISH" in ai_insight.upper():
+            icon = "🔴"
+        elif "NEUTRAL" in ai_insight.upper():
+            icon = "⚪"
+        else:
+            icon = "⚠️"
+
+        read_note = " <i>(filing read)</i>" if filing_excerpt else ""
+        also = ""
+        if m['also_filed']:
+            also = "📎 Also filed: " + " | ".join(f"<a href='{u}'>PDF {i + 2}</a>" for i, u in enumerate(m['also_filed'])) + "\n"
+        pdf_note = f"<a href='{pdf_link}'>Try PDF</a> | " if pdf_link else ""
+        alert_msg = (
+            f"<b>🚨 {symbol}</b> | {category}\n\n"
+            f"📰 <b>{headline}</b>\n\n"
+            f"{icon} <b>AI INSIGHT:</b>{read_note}\n<pre>{ai_insight}</pre>\n\n"
+            f"🔗 {pdf_note}<a href='{safe_link}'>View on NSE</a>\n"
+            f"{also}"
+            f"🕒 <i>{m['raw_date']}</i>"
+        )
+        
+        print(f"Sent Alert: {symbol}")
+        send_telegram_alert(alert_msg)
+        story_index.mark_alerted(m['cluster'], ai_insight)
+        intel_archive.record("news", "filing", f"{category}: {headline}",
+                             f"{headline}\n\n{ai_insight}\n\n{pdf_link or ''}\n\n{filing_excerpt}",
+                             ticker=symbol, sentiment=ai_insight, key=m['archive_key'], ts=m['news_time'],
+                             analyst="local" if m['route'] == "local" else "gemini")
+        alert_count += 1
+        tracing.count("alerts")
 
+    filing_reader.shutdown()
+    sentiment_model.report()
     if alert_count == 0:
         print("✅ No urgent news found.")
 
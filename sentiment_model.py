@@ -0,0 +1,182 @@
+import os
+import re
+import gzip
+import json
+import math
+import random
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+import tracing
+import intel_archive
+
+# --- CONFIGURATION ---
+MODEL_FILE = "data/sentiment_model.json.gz"
+STATS_FILE = "data/sentiment_stats.json"   # Running gate / agreement totals across runs
+LABELS = ["BULLISH", "BEARISH", "NEUTRAL"]
+CONFIDENCE = float(os.environ.get("SENTIMENT_CONFIDENCE", "0.9"))   # Below this the LLM decides
+SHADOW_RATE = float(os.environ.get("SENTIMENT_SHADOW_RATE", "0.1"))  # Confident cases still sent to the LLM, to measure agreement
+MIN_EXAMPLES = 50          # Per source; below this every headline goes to the LLM
+MIN_TOKEN_COUNT = 2        # Rarer tokens are dropped from the serialized model
+RETRAIN_HOURS = 24
+STOPWORDS = {"the", "a", "an", "of", "to", "in", "for", "on", "and", "by", "with", "at", "from", "is", "as", "its", "under"}
+
+_lock = threading.Lock()
+_models = None
+_stats = Counter()
+
+
+def tokens(text):
+    """Unigrams + bigrams of the lowercased words"""
+    words = [w for w in re.findall(r"[a-z]+", text.lower()) if w not in STOPWORDS]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+# ==========================================
+# TRAIN (multinomial naive Bayes on archived LLM labels)
+# ==========================================
+def train_source(rows):
+    counts = defaultdict(Counter)
+    docs = Counter()
+    for title, label in rows:
+        if label not in LABELS or not title: continue
+        docs[label] += 1
+        counts[label].update(set(tokens(title)))
+    if sum(docs.values()) < MIN_EXAMPLES or len(docs) < 2: return None
+
+    vocab = {t for c in counts.values() for t, n in c.items()}
+    vocab = {t for t in vocab if sum(counts[l][t] for l in LABELS) >= MIN_TOKEN_COUNT}
+    total_docs = sum(docs.values())
+    priors = [round(math.log((docs[l] + 1) / (total_docs + len(LABELS))), 4) for l in LABELS]
+    totals = [sum(counts[l][t] for t in vocab) + len(vocab) for l in LABELS]
+    weights = {t: [round(math.log((counts[l][t] + 1) / totals[i]), 4) for i, l in enumerate(LABELS)] for t in vocab}
+    return {"priors": priors, "weights": weights, "examples": total_docs}
+
+
+def train(sources=("news", "gossip")):
+    model = {"labels": LABELS, "trained": datetime.now().isoformat(timespec="seconds"), "sources": {}}
+    for source in sources:
+        trained = train_source(intel_archive.labelled_titles(source))
+        if trained: model["sources"][source] = trained
+    if not model["sources"]:
+        # Nothing saved, so the next process tries again instead of waiting RETRAIN_HOURS for labels
+        print("🧮 [SENTIMENT] Not enough archived labels yet; model not saved")
+        return model
+    os.makedirs(os.path.dirname(MODEL_FILE), exist_ok=True)
+    with gzip.open(MODEL_FILE + ".tmp", "wt", encoding="utf-8") as f:
+        json.dump(model, f, separators=(",", ":"))
+    os.replace(MODEL_FILE + ".tmp", MODEL_FILE)
+    summary = ", ".join(f"{s} {m['examples']} ex / {len(m['weights'])} tokens" for s, m in model["sources"].items())
+    print(f"🧮 [SENTIMENT] Model trained: {summary}")
+    return model
+
+
+def load_model():
+    """Loads the compact model once per process; retrains from the archive when it is a day old"""
+    global _models
+    with _lock:
+        if _models is not None: return _models
+        model = None
+        if os.path.exists(MODEL_FILE):
+            try:
+                with gzip.open(MODEL_FILE, "rt", encoding="utf-8") as f:
+                    model = json.load(f)
+            except Exception:
+                model = None
+        if model is None or not model.get("sources") or \
+                datetime.now() - datetime.fromisoformat(model["trained"]) > timedelta(hours=RETRAIN_HOURS):
+            try:
+                with tracing.span("indicator", "sentiment_train"):
+                    model = train()
+            except Exception as e:
+                print(f"⚠️ Sentiment model training failed: {e}")
+                model = model or {"labels": LABELS, "sources": {}}
+        _models = model
+        return _models
+
+
+# ==========================================
+# PREDICT + GATE
+# ==========================================
+def predict(text, source):
+    """(label, confidence) in microseconds; (None, 0.0) if there is no model or no known token"""
+    m = load_model()["sources"].get(source)
+    if not m: return None, 0.0
+    weights = m["weights"]
+    scores = list(m["priors"])
+    known = 0
+    for t in set(tokens(text)):
+        w = weights.get(t)
+        if w is None: continue
+        known += 1
+        for i in range(len(scores)): scores[i] += w[i]
+    if not known: return None, 0.0
+    top = max(scores)
+    probs = [math.exp(s - top) for s in scores]
+    best = probs.index(1.0)
+    return LABELS[best], 1.0 / sum(probs)
+
+
+def route(text, source):
+    """
+    -> (label, confidence, route). route is 'local' (trust the label), 'llm'
+    (low confidence) or 'shadow' (confident, but sampled for the agreement stat).
+    """
+    label, confidence = predict(text, source)
+    if label is None or confidence < CONFIDENCE:
+        decision = "llm"
+    else:
+        decision = "shadow" if random.random() < SHADOW_RATE else "local"
+    with _lock:
+        _stats[f"{source}:{decision}"] += 1
+    return label, confidence, decision
+
+
+def observe(source, local_label, llm_text, decision):
+    """Called with the LLM's answer for 'llm' / 'shadow' routes; tracks agreement"""
+    llm_label = intel_archive.normalize_sentiment(llm_text)
+    if local_label is None or llm_label is None: return
+    with _lock:
+        _stats[f"{source}:{decision}_compared"] += 1
+        if llm_label == local_label: _stats[f"{source}:{decision}_agree"] += 1
+
+
+def gate_stats():
+    """Per-source gating rate and agreement with the LLM for this run"""
+    with _lock:
+        stats = dict(_stats)
+    report = {}
+    for source in sorted({k.split(":")[0] for k in stats}):
+        get = lambda k: stats.get(f"{source}:{k}", 0)
+        total = get("local") + get("shadow") + get("llm")
+        report[source] = {
+            "headlines": total, "local": get("local"), "shadow": get("shadow"), "llm": get("llm"),
+            "gated_pct": round(100 * get("local") / total, 1) if total else 0.0,
+            "shadow_agree": f"{get('shadow_agree')}/{get('shadow_compared')}",
+            "low_conf_agree": f"{get('llm_agree')}/{get('llm_compared')}",
+        }
+    return report
+
+
+def report():
+    """Prints this run's gate stats and folds them into the running totals"""
+    with _lock:
+        run = Counter(_stats)
+    if not run: return
+    for source, r in gate_stats().items():
+        print(f"🧮 [SENTIMENT] {source}: {r['local']}/{r['headlines']} answered locally ({r['gated_pct']}%), "
+              f"shadow agreement {r['shadow_agree']}, low-confidence agreement {r['low_conf_agree']}")
+    totals = Counter()
+    if os.path.exists(STATS_FILE):
+        try:
+            with open(STATS_FILE, "r") as f:
+                totals.update(json.load(f))
+        except: pass
+    totals.update(run)
+    os.makedirs(os.path.dirname(STATS_FILE), exist_ok=True)
+    with open(STATS_FILE, "w") as f:
+        json.dump(dict(totals), f, indent=4, sort_keys=True)
+
+
+tracing.register_summary("sentiment_gate", gate_stats)
@@ -0,0 +1,158 @@
+import os
+import json
+import math
+from collections import defaultdict
+from PIL import Image
+
+# --- CONFIGURATION ---
+REGISTRY_FILE = os.environ.get("SITE_REGISTRY", "sites.json")
+GRID_DEG = 0.25           # Spatial index cell size (~28 km)
+MAX_TILE_DEG = 0.5        # Largest extent one shared scene may cover
+SITE_PIXELS = 700         # Width each site is delivered at (small crops are upsampled to it)
+MAX_TILE_PIXELS = 4096    # EE thumbnail size ceiling
+NATIVE_METERS = 10        # Sentinel-2 visible/NIR pixel; finer tile pixels add no detail
+METERS_PER_DEG = 111320
+
+
+def load_sites(path=REGISTRY_FILE):
+    """Reads the site registry (a JSON list of site objects) into an ordered {name: site} dict"""
+    with open(path, "r") as f:
+        entries = json.load(f)
+    sites = {}
+    for entry in entries:
+        if entry.get("enabled", True) is False: continue
+        site = dict(entry)
+        sites[site.pop("name")] = site
+    return sites
+
+
+def _center(roi):
+    return (roi[0] + roi[2]) / 2, (roi[1] + roi[3]) / 2
+
+
+def _union(a, b):
+    return [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+
+
+def _extent(bbox):
+    return max(bbox[2] - bbox[0], bbox[3] - bbox[1])
+
+
+def _width(bbox):
+    return max(bbox[2] - bbox[0], 1e-4)
+
+
+def pixels_per_deg(roi):
+    """
+    Tile resolution a site needs: enough for SITE_PIXELS across its ROI, but never
+    finer than Sentinel-2's native pixel. A 1 km site has ~100 real pixels, so it can
+    share a tile ~35 km wide without losing detail (the crop is upsampled back).
+    """
+    native = METERS_PER_DEG * math.cos(math.radians(_center(roi)[1])) / NATIVE_METERS
+    return min(SITE_PIXELS / _width(roi), native)
+
+
+class SiteIndex:
+    """Uniform grid index over site ROIs. Cells are GRID_DEG wide; a site is stored in every cell its ROI touches."""
+    def __init__(self, sites, cell=GRID_DEG):
+        self.cell = cell
+        self.sites = sites
+        self.grid = defaultdict(list)
+        for name, site in sites.items():
+            for key in self._cells(site["roi"]):
+                self.grid[key].append(name)
+
+    def _cells(self, bbox):
+        x0, y0 = math.floor(bbox[0] / self.cell), math.floor(bbox[1] / self.cell)
+        x1, y1 = math.floor(bbox[2] / self.cell), math.floor(bbox[3] / self.cell)
+        return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    def query(self, bbox):
+        """Names of sites whose ROI intersects bbox"""
+        found = []
+        seen = set()
+        for key in self._cells(bbox):
+            for name in self.grid.get(key, ()):
+                if name in seen: continue
+                seen.add(name)
+                roi = self.sites[name]["roi"]
+                if roi[0] <= bbox[2] and roi[2] >= bbox[0] and roi[1] <= bbox[3] and roi[3] >= bbox[1]:
+                    found.append(name)
+        return found
+
+    def nearby(self, name, radius_deg):
+        cx, cy = _center(self.sites[name]["roi"])
+        return self.query([cx - radius_deg, cy - radius_deg, cx + radius_deg, cy + radius_deg])
+
+
+def _vis_key(vis):
+    # Gamma is re-applied locally after cropping, so it does not split tiles
+    return json.dumps({k: v for k, v in vis.items() if k != "gamma"}, sort_keys=True)
+
+
+def group_into_tiles(sites, max_tile_deg=MAX_TILE_DEG, index=None):
+    """
+    Greedily packs nearby sites that share bands and stretch into tiles.
+    One EE scene is fetched per tile and cropped locally for each member.
+    """
+    index = index or SiteIndex(sites)
+    assigned = set()
+    tiles = []
+    for seed in sites:
+        if seed in assigned: continue
+        seed_site = sites[seed]
+        vis_key = _vis_key(seed_site["vis"])
+        bbox = list(seed_site["roi"])
+        members = [seed]
+        assigned.add(seed)
+
+        sx, sy = _center(bbox)
+        density = pixels_per_deg(bbox)
+        candidates = [n for n in index.nearby(seed, max_tile_deg) if n not in assigned]
+        candidates.sort(key=lambda n: math.dist((sx, sy), _center(sites[n]["roi"])))
+        for name in candidates:
+            if _vis_key(sites[name]["vis"]) != vis_key: continue
+            grown = _union(bbox, sites[name]["roi"])
+            if _extent(grown) > max_tile_deg: continue
+            # Never share a tile if a member would get fewer pixels than it natively has
+            needed = max(density, pixels_per_deg(sites[name]["roi"]))
+            if _extent(grown) * needed > MAX_TILE_PIXELS: continue
+            bbox = grown
+            density = needed
+            members.append(name)
+            assigned.add(name)
+
+        if len(members) == 1:
+            dimensions = min(MAX_TILE_PIXELS, math.ceil(_extent(bbox) / _width(bbox) * SITE_PIXELS))
+        else:
+            dimensions = min(MAX_TILE_PIXELS, math.ceil(_extent(bbox) * density))
+        tiles.append({"id": f"tile_{len(tiles)}", "bbox": bbox, "vis": seed_site["vis"],
+                      "sites": members, "dimensions": dimensions})
+    return tiles
+
+
+def crop_site(tile_file, tile_bbox, roi, out_file, width=SITE_PIXELS, tile_gamma=1.0, site_gamma=1.0):
+    """
+    Cuts one site's ROI out of a shared tile image (tile must be rendered in
+    EPSG:4326) and swaps the tile's gamma stretch for the site's own.
+    """
+    with Image.open(tile_file) as img:
+        w, h = img.size
+        span_x = tile_bbox[2] - tile_bbox[0]
+        span_y = tile_bbox[3] - tile_bbox[1]
+        box = (
+            round((roi[0] - tile_bbox[0]) / span_x * w),
+            round((tile_bbox[3] - roi[3]) / span_y * h),
+            round((roi[2] - tile_bbox[0]) / span_x * w),
+            round((tile_bbox[3] - roi[1]) / span_y * h),
+        )
+        crop = img.crop(box).convert("RGB")
+        if tile_gamma != site_gamma:
+            # EE renders x ** (1 / gamma), so re-stretch with x ** (tile_gamma / site_gamma)
+            power = tile_gamma / site_gamma
+            crop = crop.point([round(255 * (v / 255) ** power) for v in range(256)] * 3)
+        if crop.width != width:
+            # Down to the delivery width, or back up for a small site cut from a wide tile
+            crop = crop.resize((width, max(1, round(crop.height * width / crop.width))), Image.LANCZOS)
+        crop.save(out_file, "JPEG", quality=90)
+    return out_file
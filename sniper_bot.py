@@ -1,17 +1,36 @@
 import os
-import requests
+import time
+import argparse
+import statistics
+import http_client
+import pandas as pd
 import yfinance as yf
-import pandas_ta as ta
 import google.generativeai as genai
 from datetime import datetime
+import tracing
+import feature_store
+import universe
 from watchlist_manager import load_watchlist
 from paper_trader import execute_buy, execute_sell # IMPORT THE LEDGER
+from indicators import WilderRSI
 
 # SECRETS
 BOT_TOKEN = os.environ.get("TELEGRAM_TOKEN")
 CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID")
 GEMINI_KEY = os.environ.get("GEMINI_API_KEY")
 
+# INTRADAY MODE
+INTRADAY_INTERVAL = os.environ.get("INTRADAY_INTERVAL", "5m")
+INTRADAY_POLL_SECONDS = int(os.environ.get("INTRADAY_POLL_SECONDS", "30"))
+INTRADAY_MAX_MINUTES = int(os.environ.get("INTRADAY_MAX_MINUTES", "340"))  # Under the 360-minute hosted-runner limit
+INTRADAY_STOP = os.environ.get("INTRADAY_STOP")  # "HH:MM" IST; the session is split across two jobs
+INTRADAY_FLUSH_MINUTES = 15  # Traces + latency stats reach disk this often, in case the job is killed
+MARKET_CLOSE = (15, 30)  # IST
+RSI_BUY, RSI_SELL = 30, 70
+
+# UNIVERSE MODE
+UNIVERSE_TOP_N = int(os.environ.get("UNIVERSE_TOP_N", "15"))
+
 if GEMINI_KEY:
     try:
         genai.configure(api_key=GEMINI_KEY)
@@ -23,7 +42,8 @@ def get_ai_confirmation(ticker, signal, technicals):
     prompt = (f"Technical Signal for {ticker}: {signal}. Data: {technicals}. "
               "Confirm if this is a good trade setup. Keep it very short.")
     try:
-        response = model.generate_content(prompt)
+        with tracing.span("llm", "gemini", ticker=ticker):
+            response = model.generate_content(prompt)
         return response.text.strip()
     except: return "AI Silent"
 
@@ -31,26 +51,33 @@ def send_telegram(msg):
     if not BOT_TOKEN or not CHAT_ID: return
     url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
     payload = {"chat_id": CHAT_ID, "text": msg, "parse_mode": "Markdown"}
-    requests.post(url, json=payload)
+    with tracing.span("send", "telegram"):
+        http_client.post(url, json=payload)
 
 def scan_market():
+    tracing.start_run("sniper_bot")
     print(f"🎯 Sniper Scope Active... [{datetime.now().strftime('%H:%M')}]")
     watchlist = load_watchlist() # Load dynamic list
     
     today_str = datetime.now().strftime("%Y-%m-%d")
     
+    # One batched download for the whole watchlist; a store built before today's close is rebuilt first
+    feature_store.materialize(watchlist)
+    index, matrix = feature_store.read_all()
+    if index is None:
+        print("⚠️ Feature store unavailable")
+        return
+    rows = {t: i for i, t in enumerate(index["tickers"])}
+    rsi_col, price_col = feature_store.COL["rsi_14"], feature_store.COL["price"]
+
     for ticker in watchlist:
         try:
             # Clean ticker format
             if not ticker.endswith(".NS"): ticker = f"{ticker}.NS"
-            
-            df = yf.download(ticker, period="6mo", interval="1d", progress=False)
-            if df.empty: continue
-            
-            # Indicators
-            df['RSI'] = ta.rsi(df['Close'], length=14)
-            rsi = df['RSI'].iloc[-1].item()
-            price = df['Close'].iloc[-1].item()
+            if ticker not in rows: continue
+            rsi = float(matrix[rows[ticker], rsi_col])
+            price = float(matrix[rows[ticker], price_col])
+            if pd.isna(rsi) or pd.isna(price): continue
             
             # --- TRADING LOGIC ---
             
@@ -71,5 +98,187 @@ def scan_market():
             print(f"⚠️ Error {ticker}: {e}")
             continue
 
+# ==========================================
+# INTRADAY STREAMING MODE
+# ==========================================
+def fetch_intraday_closes(tickers, interval, period):
+    """One batched request for the whole watchlist -> Close frame (rows = bars, columns = tickers)"""
+    with tracing.span("fetch", "yfinance", tickers=len(tickers), interval=interval):
+        df = yf.download(tickers, period=period, interval=interval, progress=False, threads=True)
+    if df.empty: return pd.DataFrame()
+    closes = df['Close']
+    if isinstance(closes, pd.Series): closes = closes.to_frame(tickers[0])
+    return closes
+
+def closed_bars(closes, bar_length, now):
+    """Drops the bar that is still forming"""
+    if closes.empty: return closes
+    closing_times = closes.index + bar_length
+    return closes[closing_times <= now]
+
+def _now(tz=None):
+    # yfinance intraday bars are exchange-tz aware; match them so comparisons work
+    return pd.Timestamp.now(tz=tz)
+
+def handle_cross(ticker, prev_rsi, rsi, price, bar_close, latencies, interval=INTRADAY_INTERVAL):
+    """Fires paper trades the moment RSI crosses a threshold; records bar-close -> alert latency"""
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    sent = False
+    if rsi < RSI_BUY <= prev_rsi:
+        success, msg = execute_buy(ticker, price, today_str)
+        if success:
+            ai_msg = get_ai_confirmation(ticker, "INTRADAY OVERSOLD BUY", f"RSI {rsi:.1f} ({interval})")
+            send_telegram(f"🟢 **INTRADAY BUY {ticker}**\nPrice: {price:.2f}\nReason: RSI {rsi:.2f} crossed below {RSI_BUY} ({interval})\n\n🤖 AI: {ai_msg}")
+            sent = True
+    elif rsi > RSI_SELL >= prev_rsi:
+        success, msg = execute_sell(ticker, price, today_str)
+        if success:
+            send_telegram(f"🔴 **INTRADAY SELL {ticker}**\nPrice: {price:.2f}\nResult: {msg}\nReason: RSI {rsi:.2f} crossed above {RSI_SELL} ({interval})")
+            sent = True
+    if sent:
+        latency = (_now(bar_close.tz) - bar_close).total_seconds()
+        latencies.append(latency)
+        tracing.count("intraday_alerts")
+        print(f"⚡ {ticker} alert {latency:.1f}s after bar close")
+
+def latency_stats(latencies, polls):
+    if not latencies: return {"polls": polls, "alerts": 0}
+    ordered = sorted(latencies)
+    return {"polls": polls, "alerts": len(latencies), "p50_s": round(statistics.median(latencies), 1),
+            "p95_s": round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))], 1),
+            "max_s": round(ordered[-1], 1)}
+
+def run_intraday(interval=INTRADAY_INTERVAL, poll_seconds=INTRADAY_POLL_SECONDS, max_minutes=INTRADAY_MAX_MINUTES,
+                 stop=INTRADAY_STOP):
+    """
+    Long-running scan: polls batched intraday bars for the whole watchlist,
+    appends only new closed bars and updates RSI incrementally. Runs until the
+    session closes, or until stop ("HH:MM" IST) when the session is split into two jobs.
+    """
+    tracing.start_run("sniper_intraday")
+    print(f"🎯 Sniper Intraday Mode [{interval}, poll {poll_seconds}s, until {stop or 'close'}]... [{datetime.now().strftime('%H:%M')}]")
+    tickers = sorted({t if t.endswith(".NS") else f"{t}.NS" for t in load_watchlist()})
+    bar_length = pd.Timedelta(interval.replace("m", "min"))
+
+    # Seed: a few days of bars so RSI is warm before the first live bar
+    history = fetch_intraday_closes(tickers, interval, period="5d")
+    history = closed_bars(history, bar_length, _now(getattr(history.index, "tz", None)))
+    states, last_bar = {}, {}
+    for t in tickers:
+        series = history[t].dropna() if t in history else pd.Series(dtype=float)
+        states[t] = WilderRSI.from_closes(series.values)
+        last_bar[t] = series.index[-1] if len(series) else None
+
+    latencies = []
+    deadline = time.time() + max_minutes * 60
+    polls = 0
+    tracing.register_summary("intraday", lambda: latency_stats(latencies, polls))
+    if stop:
+        hour, minute = map(int, stop.split(":"))
+        end_of_run = pd.Timedelta(hours=hour, minutes=minute)
+    else:
+        end_of_run = pd.Timedelta(hours=MARKET_CLOSE[0], minutes=MARKET_CLOSE[1]) + bar_length
+    next_flush = time.time() + INTRADAY_FLUSH_MINUTES * 60
+    while time.time() < deadline:
+        time.sleep(poll_seconds)
+        polls += 1
+        if time.time() >= next_flush:
+            tracing.flush()
+            next_flush = time.time() + INTRADAY_FLUSH_MINUTES * 60
+        try:
+            fresh = fetch_intraday_closes(tickers, interval, period="1d")
+        except Exception as e:
+            print(f"⚠️ Poll failed: {e}")
+            continue
+        if fresh.empty: continue
+        now = _now(fresh.index.tz)
+        fresh = closed_bars(fresh, bar_length, now)
+
+        with tracing.span("indicator", "rsi_incremental", tickers=len(tickers)):
+            for t in tickers:
+                if t not in fresh: continue
+                series = fresh[t].dropna()
+                if last_bar[t] is not None: series = series[series.index > last_bar[t]]
+                for ts, close in series.items():
+                    prev = states[t].value
+                    rsi = states[t].update(close)
+                    last_bar[t] = ts
+                    if prev is None or rsi is None: continue
+                    try:
+                        handle_cross(t, prev, rsi, float(close), ts + bar_length, latencies, interval)
+                    except Exception as e:
+                        print(f"⚠️ Error {t}: {e}")
+
+        # Stop once the last bar of the session (or of this half) has closed and been processed
+        local = now.tz_convert("Asia/Kolkata") if now.tz is not None else now
+        if local >= local.normalize() + end_of_run:
+            break
+
+    report_latency(latencies, polls, "SESSION" if not stop else f"RUN (until {stop})")
+
+def report_latency(latencies, polls, label="SESSION"):
+    stats = latency_stats(latencies, polls)
+    if latencies:
+        msg = (f"⏱️ **INTRADAY {label} DONE**\nPolls: {polls} | Alerts: {len(latencies)}\n"
+               f"Bar close -> alert: p50 {stats['p50_s']:.1f}s | p95 {stats['p95_s']:.1f}s | max {stats['max_s']:.1f}s")
+    else:
+        msg = f"⏱️ **INTRADAY {label} DONE**\nPolls: {polls} | No threshold crossings."
+    print(msg)
+    send_telegram(msg)
+
+# ==========================================
+# FULL UNIVERSE SCAN (SHARDED)
+# ==========================================
+def run_universe_scan(top_n=UNIVERSE_TOP_N):
+    """Screens every NSE EQ symbol and sends one merged, ranked list (no paper trades)"""
+    tracing.start_run("sniper_universe")
+    started = time.perf_counter()
+    print(f"🌐 Sniper Universe Scan... [{datetime.now().strftime('%H:%M')}]")
+    tickers = universe.load_universe()
+    if not tickers:
+        print("⚠️ Universe list unavailable, falling back to the watchlist")
+        tickers = sorted({t if t.endswith(".NS") else f"{t}.NS" for t in load_watchlist()})
+    loaded = time.perf_counter() - started
+
+    rows, stats = universe.scan_universe(tickers, RSI_BUY, RSI_SELL)
+    with tracing.span("indicator", "rank", symbols=len(rows)):
+        oversold, overbought = universe.rank_signals(rows, top_n)
+    wall = time.perf_counter() - started
+
+    def line(r):
+        return f"• `{r['ticker'][:-3]}` RSI {r['rsi']:.1f} | 1M {r['ret_1m']:+.1f}% | Vol {r['vol_ratio']:.1f}x"
+
+    n_oversold = sum(r["signal"] == "OVERSOLD" for r in rows)
+    n_overbought = sum(r["signal"] == "OVERBOUGHT" for r in rows)
+    msg = f"🌐 **UNIVERSE SCAN** ({len(rows)}/{len(tickers)} symbols in {wall:.0f}s)\n\n"
+    msg += f"🟢 **Oversold** (RSI < {RSI_BUY}): {n_oversold}\n" + ("\n".join(map(line, oversold)) or "• None") + "\n\n"
+    msg += f"🔴 **Overbought** (RSI > {RSI_SELL}): {n_overbought}\n" + ("\n".join(map(line, overbought)) or "• None") + "\n\n"
+    msg += report_throughput(stats, loaded, wall)
+    print(msg)
+    send_telegram(msg)
+
+def report_throughput(stats, loaded, wall):
+    """Per-stage symbols/s. busy_s sums every worker, so sym/s is per worker."""
+    lines = [f"⏱️ Universe list {loaded:.1f}s | {stats['chunks']} chunks | {stats.get('processes', 1)} processes"
+             + (f" | {stats['failed']} failed" if stats['failed'] else "")]
+    for stage in ("fetch", "indicator"):
+        st = stats[stage]
+        rate = st["symbols"] / st["busy_s"] if st["busy_s"] else 0
+        lines.append(f"• {stage}: {st['symbols']} sym | busy {st['busy_s']:.1f}s | {rate:,.0f} sym/s")
+    lines.append(f"• end-to-end: {stats['symbols'] / wall:,.0f} sym/s")
+    return "\n".join(lines)
+
 if __name__ == "__main__":
-    scan_market()
+    parser = argparse.ArgumentParser(description="Technical Sniper")
+    parser.add_argument("--intraday", action="store_true", help="long-running intraday streaming scan")
+    parser.add_argument("--interval", default=INTRADAY_INTERVAL, help="bar size, e.g. 1m or 5m")
+    parser.add_argument("--poll", type=int, default=INTRADAY_POLL_SECONDS, help="seconds between polls")
+    parser.add_argument("--until", default=INTRADAY_STOP, help="stop at HH:MM IST instead of the session close")
+    parser.add_argument("--universe", action="store_true", help="screen the full NSE equity universe")
+    args = parser.parse_args()
+    if args.universe:
+        run_universe_scan()
+    elif args.intraday:
+        run_intraday(args.interval, args.poll, stop=args.until)
+    else:
+        scan_market()
@@ -0,0 +1,197 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import tracing
+
+# --- CONFIGURATION ---
+INDEX_FILE = os.environ.get("STORY_INDEX", "data/story_index.db")
+WINDOW_DAYS = 3            # Stories older than this no longer pull new headlines into their cluster
+BANDS, ROWS = 16, 3        # MinHash LSH: 48 hashes, a candidate needs one band (3 hashes) in common
+MIN_JACCARD = 0.5          # Word-set overlap that counts as the same story
+MAX_CANDIDATES = 500       # Cap per lookup, so one very common bucket can't slow it down
+STOPWORDS = {"the", "a", "an", "of", "to", "in", "for", "on", "and", "by", "with", "at", "from", "is", "as",
+             "its", "it", "be", "has", "have", "after", "over", "into", "this", "that", "will", "new"}
+FILLER = {"sources", "source", "say", "says", "said", "reportedly", "report", "reports", "exclusive",
+          "likely", "news", "latest", "update", "india", "indian"}   # Wording outlets add to the same story
+
+# Fixed seeds: signatures must match across runs
+_SEEDS = np.random.default_rng(20240105).integers(0, 1 << 63, size=BANDS * ROWS, dtype=np.uint64)
+
+# One row per headline, one bucket row per (story, band). Band keys carry the
+# band number in their top bits, so a lookup is a single indexed IN (...);
+# the CROSS JOIN keeps SQLite probing buckets first instead of scanning stories.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clusters (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    scope TEXT,
+    title TEXT,
+    first_ts TEXT,
+    last_ts TEXT,
+    size INTEGER DEFAULT 1,
+    alerted INTEGER DEFAULT 0,
+    analysis TEXT
+);
+CREATE TABLE IF NOT EXISTS stories (
+    id INTEGER PRIMARY KEY,
+    cluster INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    scope TEXT,
+    ts TEXT NOT NULL,
+    title TEXT,
+    link TEXT,
+    outlet TEXT,
+    tokens TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS stories_link ON stories (source, link);
+CREATE INDEX IF NOT EXISTS stories_ts ON stories (ts);
+CREATE INDEX IF NOT EXISTS stories_cluster ON stories (cluster);
+CREATE TABLE IF NOT EXISTS buckets (
+    key INTEGER NOT NULL,
+    story INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS buckets_key ON buckets (key);
+CREATE INDEX IF NOT EXISTS buckets_story ON buckets (story);
+"""
+
+_lock = threading.Lock()
+_conn = None
+
+
+def _connect():
+    """One connection per process; the window is pruned when it opens"""
+    global _conn
+    if _conn is None:
+        folder = os.path.dirname(INDEX_FILE)
+        if folder: os.makedirs(folder, exist_ok=True)
+        _conn = sqlite3.connect(INDEX_FILE, timeout=10, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.executescript(SCHEMA)
+        prune()
+    return _conn
+
+
+def prune(now=None):
+    cutoff = ((now or datetime.now()) - timedelta(days=WINDOW_DAYS)).isoformat(timespec="seconds")
+    with _conn:
+        _conn.execute("DELETE FROM buckets WHERE story IN (SELECT id FROM stories WHERE ts < ?)", (cutoff,))
+        _conn.execute("DELETE FROM stories WHERE ts < ?", (cutoff,))
+        _conn.execute("DELETE FROM clusters WHERE last_ts < ? AND id NOT IN (SELECT cluster FROM stories)", (cutoff,))
+
+
+# ==========================================
+# SIGNATURES
+# ==========================================
+def tokens(title):
+    """Content words, lightly stemmed: 'Adani in talks to buy Jaypee's assets' -> adani talk buy jaypee asset"""
+    words = []
+    for w in re.findall(r"[a-z0-9]+", (title or "").lower().replace("'s ", " ")):
+        if w in STOPWORDS or w in FILLER: continue
+        if len(w) > 3 and w.endswith("s") and not w.endswith("ss"): w = w[:-1]
+        words.append(w)
+    return set(words)
+
+
+def _mix(z):
+    """splitmix64 finalizer (uint64 arithmetic wraps, which is the point)"""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def band_keys(words):
+    """MinHash signature folded into BANDS bucket keys (62-bit, band number in the top 4 bits)"""
+    if not words: return []
+    x = np.array([int.from_bytes(hashlib.blake2b(w.encode(), digest_size=8).digest(), "big") for w in words],
+                 dtype=np.uint64)
+    signature = _mix(x[:, None] ^ _SEEDS[None, :]).min(axis=0)
+    keys = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest()
+        keys.append((band << 58) | (int.from_bytes(digest, "big") >> 6))
+    return keys
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+# ==========================================
+# LOOKUP + ASSIGN
+# ==========================================
+def nearest(words, source, scope=None, keys=None, now=None):
+    """(cluster_id, similarity) of the closest story in the window, or (None, 0.0)"""
+    keys = keys if keys is not None else band_keys(words)
+    if not keys: return None, 0.0
+    cutoff = ((now or datetime.now()) - timedelta(days=WINDOW_DAYS)).isoformat(timespec="seconds")
+    rows = _connect().execute(
+        f"SELECT DISTINCT s.id, s.cluster, s.tokens FROM buckets b CROSS JOIN stories s ON s.id = b.story "
+        f"WHERE b.key IN ({','.join('?' * len(keys))}) AND s.source = ? AND s.scope IS ? AND s.ts >= ? "
+        f"ORDER BY s.id DESC LIMIT ?", (*keys, source, scope, cutoff, MAX_CANDIDATES)).fetchall()
+    best, score = None, 0.0
+    for _, cluster, stored in rows:
+        sim = jaccard(words, set(stored.split()))
+        if sim > score: best, score = cluster, sim
+    return (best, score) if score >= MIN_JACCARD else (None, score)
+
+
+def assign(title, source, link=None, outlet=None, scope=None, ts=None):
+    """
+    Files one headline. -> (cluster_id, status): 'seen' if this link is already
+    indexed, 'joined' if it is a near-duplicate of a story in the window,
+    'new' if it starts its own cluster. scope narrows matching (e.g. to a ticker).
+    """
+    now = ts or datetime.now()
+    stamp = now.isoformat(timespec="seconds")
+    words = tokens(title)
+    with _lock:
+        conn = _connect()
+        if link:
+            row = conn.execute("SELECT cluster FROM stories WHERE source = ? AND link = ?", (source, link)).fetchone()
+            if row: return row[0], "seen"
+        keys = band_keys(words)
+        with tracing.span("indicator", "lsh", source=source):
+            cluster, _ = nearest(words, source, scope, keys, now)
+        with conn:
+            if cluster is None:
+                cluster = conn.execute("INSERT INTO clusters (source, scope, title, first_ts, last_ts) VALUES (?, ?, ?, ?, ?)",
+                                       (source, scope, title, stamp, stamp)).lastrowid
+                status = "new"
+            else:
+                conn.execute("UPDATE clusters SET size = size + 1, last_ts = ? WHERE id = ?", (stamp, cluster))
+                status = "joined"
+            story = conn.execute("INSERT INTO stories (cluster, source, scope, ts, title, link, outlet, tokens) "
+                                 "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                 (cluster, source, scope, stamp, title, link, outlet, " ".join(sorted(words)))).lastrowid
+            conn.executemany("INSERT INTO buckets (key, story) VALUES (?, ?)", [(k, story) for k in keys])
+    tracing.count(f"stories_{status}")
+    return cluster, status
+
+
+def get_cluster(cluster_id):
+    row = _connect().execute("SELECT id, source, scope, title, first_ts, last_ts, size, alerted, analysis "
+                             "FROM clusters WHERE id = ?", (cluster_id,)).fetchone()
+    if not row: return None
+    return dict(zip(["id", "source", "scope", "title", "first_ts", "last_ts", "size", "alerted", "analysis"], row))
+
+
+def members(cluster_id):
+    """Every headline in the cluster, oldest first"""
+    rows = _connect().execute("SELECT ts, title, link, outlet FROM stories WHERE cluster = ? ORDER BY id",
+                              (cluster_id,)).fetchall()
+    return [{"ts": r[0], "title": r[1], "link": r[2], "outlet": r[3]} for r in rows]
+
+
+def mark_alerted(cluster_id, analysis=None):
+    """Later coverage of an alerted cluster joins it silently instead of alerting again"""
+    with _lock:
+        conn = _connect()
+        with conn:
+            conn.execute("UPDATE clusters SET alerted = 1, analysis = ? WHERE id = ?", (analysis, cluster_id))
@@ -1,5 +1,34 @@
-# ... inside imports ...
-import random # Add this import at the top
+import os
+import random
+import html
+import asyncio
+from telegram import Update
+from telegram.ext import Application, CommandHandler, ContextTypes
+
+import tracing
+import http_client # Shared pooled HTTP client (timeouts + retries)
+import feature_store # Daily per-ticker features (memory-mapped read)
+import intel_archive # Searchable history of every alert and report
+from market_memory import load_memory
+
+# --- CONFIGURATION ---
+TELEGRAM_TOKEN = os.environ.get("TELEGRAM_TOKEN")
+REPO_OWNER = os.environ.get("REPO_OWNER")
+REPO_NAME = os.environ.get("REPO_NAME")
+
+HELP_TEXT = (
+    "🤖 <b>COMMANDS</b>\n\n"
+    "/intel - market regime and per-stock sentiment\n"
+    "/features TICKER - today's feature store row\n"
+    "/archive [TICKER] [BULLISH|BEARISH|NEUTRAL] [words...] - past alerts\n"
+    "/scan SITE - fresh satellite page for one site\n"
+    "/check TICKER - valuation, technicals and recent intel"
+)
+
+
+async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text(HELP_TEXT, parse_mode="HTML")
+
 
 async def cmd_intel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Shows what the AI Brain currently knows about the market"""
@@ -11,7 +40,7 @@ async def cmd_intel(update: Update, context: ContextTypes.DEFAULT_TYPE):
         rand_id = random.randint(1, 99999)
         url = f"https://raw.githubusercontent.com/{REPO_OWNER}/{REPO_NAME}/main/market_memory.json?t={rand_id}"
         try:
-            response = requests.get(url, timeout=5)
+            response = http_client.get(url, timeout=(3, 5), retries=1)
             if response.status_code == 200:
                 mem = response.json()
         except: pass
@@ -42,3 +71,129 @@ async def cmd_intel(update: Update, context: ContextTypes.DEFAULT_TYPE):
         msg += "• No satellite data recorded yet.\n"
         
     await update.message.reply_text(msg, parse_mode="Markdown")
+
+
+async def cmd_features(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/features TICKER - everything the bots know about one stock, from the daily feature store"""
+    if not context.args:
+        await update.message.reply_text("Usage: /features TICKER")
+        return
+    ticker = context.args[0].upper()
+    f = feature_store.read_ticker(ticker)
+    if f is None:
+        await update.message.reply_text(f"❌ {ticker} is not in today's feature store.")
+        return
+
+    def fmt(value, spec, suffix=""):
+        return "n/a" if value is None else f"{value:{spec}}{suffix}"
+
+    msg = (
+        f"📊 **{ticker} FEATURES** (as of {f['as_of']})\n\n"
+        f"💰 Price: Rs {fmt(f['price'], ',.2f')}\n"
+        f"📈 Returns: 1D {fmt(f['ret_1d'], '+.1f', '%')} | 5D {fmt(f['ret_5d'], '+.1f', '%')} | 1M {fmt(f['ret_1m'], '+.1f', '%')}\n"
+        f"📉 RSI(14): {fmt(f['rsi_14'], '.1f')}\n"
+        f"🏷️ P/E: {fmt(f['pe'], '.1f', 'x')} ({f['valuation_signal']})\n"
+        f"🧠 Confluence: {fmt(f['confluence'], '.0f', '/100')}\n"
+        f"🛰️ Satellite change: {fmt(f['sat_change_pct'], '.1f', '%')}\n"
+    )
+    await update.message.reply_text(msg, parse_mode="Markdown")
+
+
+async def cmd_archive(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/archive [TICKER] [BULLISH|BEARISH|NEUTRAL] [words...] - past alerts, newest first (this quarter)"""
+    ticker, sentiment, words = None, None, []
+    for arg in context.args:
+        if arg.upper() in intel_archive.SENTIMENTS: sentiment = arg.upper()
+        elif arg.isupper() and ticker is None: ticker = arg
+        else: words.append(arg)
+    try:
+        hits = intel_archive.search(intel_archive.quote_terms(words), ticker=ticker, sentiment=sentiment,
+                                    since="quarter", limit=10)
+    except Exception:
+        await update.message.reply_text("❌ Couldn't search that. Usage: /archive [TICKER] [BULLISH|BEARISH|NEUTRAL] [words...]")
+        return
+    if not hits:
+        await update.message.reply_text("📭 Nothing archived for that this quarter.")
+        return
+    msg = "🗄️ <b>INTEL ARCHIVE</b>\n\n"
+    for h in hits:
+        icon = {"BULLISH": "🟢", "BEARISH": "🔴"}.get(h['sentiment'], "⚪")
+        msg += f"{icon} <i>{h['ts'][:16]}</i> [{h['source']}] {html.escape(h['title'] or '')}\n"
+    await update.message.reply_text(msg, parse_mode="HTML")
+
+async def _run_job(update: Update, kind, key, label):
+    """Queues one job, streams its progress into a status message, then replies with the result"""
+    import job_queue # Imported here: its EE / PDF stack must not take down the other commands
+    status = await update.message.reply_text(f"⏳ Queued {label}...")
+    loop = asyncio.get_running_loop()
+
+    def progress(text):
+        # Called from the worker thread; hop back onto the bot's event loop
+        asyncio.run_coroutine_threadsafe(status.edit_text(text), loop)
+
+    future, state = job_queue.submit(kind, key, progress)
+    if state == "joined":
+        await status.edit_text(f"🔁 {label} is already running, you'll get the same result.")
+    try:
+        result = await asyncio.wrap_future(future)
+        if result.get("photo"):
+            with open(result["photo"], "rb") as f:
+                await update.message.reply_photo(photo=f, caption=result["text"], parse_mode="HTML")
+        else:
+            await update.message.reply_text(result["text"], parse_mode="HTML", disable_web_page_preview=True)
+    except Exception as e:
+        try: await status.edit_text(f"❌ {label} failed: {html.escape(str(e))}")
+        except: pass
+        return
+    note = "cached result" if state == "cached" else f"done in {result['seconds']}s"
+    try: await status.edit_text(f"✅ {label}: {note}")
+    except: pass
+
+
+async def cmd_scan(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/scan SITE - fresh satellite page for one site (name, number or ticker)"""
+    if not context.args:
+        await update.message.reply_text("Usage: /scan SITE  (e.g. /scan TATASTEEL or /scan 4)")
+        return
+    try:
+        import job_queue # Imported here: its EE / PDF stack must not take down the other commands
+        name = job_queue.resolve_site(" ".join(context.args))
+    except Exception as e:
+        await update.message.reply_text(f"❌ Scanning is unavailable: {html.escape(str(e))}", parse_mode="HTML")
+        return
+    if name is None:
+        await update.message.reply_text("❌ No single site matches that. Try the site number or its ticker.")
+        return
+    await _run_job(update, "scan", name, f"Scan of {name}")
+
+
+async def cmd_check(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/check TICKER - valuation, technicals, confluence and recent intel for one stock"""
+    if not context.args:
+        await update.message.reply_text("Usage: /check TICKER")
+        return
+    ticker = context.args[0].strip().upper()
+    if not (ticker.endswith(".NS") or ticker.startswith("^")): ticker += ".NS"
+    await _run_job(update, "check", ticker, f"Check of {ticker}")
+
+# ==========================================
+# ENTRY POINT
+# ==========================================
+def main():
+    if not TELEGRAM_TOKEN:
+        print("❌ TELEGRAM_TOKEN is not set")
+        return
+    tracing.start_run("telegram_commander")
+    app = Application.builder().token(TELEGRAM_TOKEN).build()
+    app.add_handler(CommandHandler(["start", "help"], cmd_help))
+    app.add_handler(CommandHandler("intel", cmd_intel))
+    app.add_handler(CommandHandler("features", cmd_features))
+    app.add_handler(CommandHandler("archive", cmd_archive))
+    app.add_handler(CommandHandler("scan", cmd_scan))
+    app.add_handler(CommandHandler("check", cmd_check))
+    print("🎧 [COMMANDER] Listening for commands...")
+    app.run_polling()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Unit tests run offline: the benchmark fakes (benchmarks/fakes.py) stand in for
+ee, yfinance, GoogleNews and Gemini, and every test runs in its own scratch
+directory so the relative data/ paths never touch the repo.
+"""
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path: sys.path.insert(0, REPO_ROOT)
+
+from benchmarks import fakes
+
+fakes.install(profile={name: {"latency": 0.0, "jitter": 0.0, "per_item": 0.0} for name in fakes.DEFAULT_PROFILE})
+
+
+@pytest.fixture(autouse=True)
+def scratch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,45 @@
+import numpy as np
+from PIL import Image
+
+import change_detection
+from change_detection import compare_scenes, detect_change, load_index, preview_change
+
+
+def _image(path, color, patch=None):
+    img = Image.new("RGB", (128, 128), color)
+    if patch:
+        img.paste(patch, (0, 0, 64, 64))
+    img.save(path)
+    return str(path)
+
+
+def test_uniform_brightness_shift_is_not_change():
+    scene = np.full((8, 8, 3), 0.4, dtype=np.float32)
+    stats = compare_scenes(scene, scene + 0.3)
+    assert stats["changed_pct"] == 0.0
+
+
+def test_first_scene_then_same_then_changed(tmp_path):
+    first = _image(tmp_path / "a.png", (90, 90, 90))
+    result = detect_change("Gevra Mine", first, scene_id="S2_1")
+    assert result["first_seen"] and result["changed"]
+    assert load_index()["gevra_mine"]["scene_id"] == "S2_1"
+
+    again = detect_change("Gevra Mine", first, scene_id="S2_1")
+    assert again["same_scene"] and not again["changed"]
+
+    dug = _image(tmp_path / "b.png", (90, 90, 90), patch=(230, 160, 200))
+    changed = detect_change("Gevra Mine", dug, scene_id="S2_2")
+    assert not changed["first_seen"]
+    assert changed["changed_pct"] >= 20 and changed["changed"]
+
+
+def test_preview_leaves_the_baseline_alone(tmp_path):
+    base = _image(tmp_path / "a.png", (90, 90, 90))
+    detect_change("Mundra", base, scene_id="S2_1")
+    cached = np.load(f"{change_detection.SCENE_CACHE_DIR}/mundra.npy")
+
+    dug = _image(tmp_path / "b.png", (90, 90, 90), patch=(230, 160, 200))
+    assert preview_change("Mundra", dug, scene_id="S2_2")["changed"]
+    assert np.array_equal(np.load(f"{change_detection.SCENE_CACHE_DIR}/mundra.npy"), cached)
+    assert load_index()["mundra"]["scene_id"] == "S2_1"
@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import feature_store
+from feature_store import COL, COLUMNS, MARKET_TZ, is_fresh, last_boundary
+
+
+def ist(*args):
+    return datetime(*args, tzinfo=MARKET_TZ)
+
+
+@pytest.fixture
+def computed(monkeypatch):
+    """compute_features stand-in: price = position in the request, records each request"""
+    calls = []
+
+    def fake(tickers):
+        calls.append(list(tickers))
+        matrix = np.full((len(tickers), len(COLUMNS)), np.nan, dtype=np.float32)
+        matrix[:, COL["price"]] = np.arange(len(tickers)) + 100
+        return matrix, "2026-10-16"
+
+    monkeypatch.setattr(feature_store, "compute_features", fake)
+    return calls
+
+
+@pytest.mark.parametrize("now, boundary", [
+    (ist(2026, 10, 14, 12, 0), ist(2026, 10, 14, 9, 15)),    # Mid-session -> today's open
+    (ist(2026, 10, 14, 15, 30), ist(2026, 10, 14, 9, 15)),   # Close not settled yet
+    (ist(2026, 10, 14, 18, 0), ist(2026, 10, 14, 15, 45)),   # Evening -> today's close
+    (ist(2026, 10, 14, 7, 0), ist(2026, 10, 13, 15, 45)),    # Pre-open -> yesterday's close
+    (ist(2026, 10, 19, 8, 0), ist(2026, 10, 16, 15, 45)),    # Monday pre-open -> Friday's close
+    (ist(2026, 10, 18, 12, 0), ist(2026, 10, 16, 15, 45)),   # Sunday -> Friday's close
+])
+def test_last_boundary(now, boundary):
+    assert last_boundary(now) == boundary
+
+
+def test_last_boundary_converts_other_timezones():
+    utc_evening = datetime.fromisoformat("2026-10-14T11:00:00+00:00")   # 16:30 IST
+    assert last_boundary(utc_evening) == ist(2026, 10, 14, 15, 45)
+
+
+def test_is_fresh_follows_session_phase():
+    built_after_close = {"built": "2026-10-14T16:10:00+05:30"}
+    assert is_fresh(built_after_close, now=ist(2026, 10, 15, 8, 30))
+    assert not is_fresh(built_after_close, now=ist(2026, 10, 15, 9, 30))   # New session opened
+    built_midday = {"built": "2026-10-14T13:00:00+05:30"}
+    assert not is_fresh(built_midday, now=ist(2026, 10, 14, 18, 0))       # Lacks the close
+    assert is_fresh(built_midday, now=ist(2026, 10, 14, 15, 0))
+    assert not is_fresh(None) and not is_fresh({})
+
+
+def test_materialize_appends_missing_then_rebuilds_when_stale(computed, monkeypatch):
+    index = feature_store.materialize(["TCS"])
+    assert index["tickers"] == ["TCS.NS"] and computed == [["TCS.NS"]]
+
+    index = feature_store.materialize(["TCS", "INFY"])
+    assert computed[-1] == ["INFY.NS"]   # Only the missing ticker is computed
+    assert feature_store.read_ticker("INFY")["price"] == 100
+    assert feature_store.read_ticker("TCS")["price"] == 100
+
+    assert feature_store.materialize(["INFY"]) == index and len(computed) == 2
+
+    monkeypatch.setattr(feature_store, "is_fresh", lambda index=None, now=None: False)
+    index = feature_store.materialize(["WIPRO"])
+    assert index["tickers"] == ["INFY.NS", "TCS.NS", "WIPRO.NS"]   # Rebuild keeps what was there
+    assert computed[-1] == index["tickers"]
+
+
+def test_update_in_place_and_append(computed):
+    feature_store.materialize(["TCS"])
+    assert feature_store.update("TCS", confluence=2, pe=None, bogus=1)
+    row = feature_store.read_ticker("TCS.NS")
+    assert row["confluence"] == 2 and row["pe"] is None and row["price"] == 100
+
+    assert feature_store.update("infy", sat_change_pct=4.5)
+    index, matrix = feature_store.read_all()
+    assert index["tickers"] == ["TCS.NS", "INFY.NS"] and matrix.shape == (2, len(COLUMNS))
+    assert feature_store.read_ticker("INFY")["sat_change_pct"] == 4.5
+
+
+def test_update_without_usable_store():
+    assert not feature_store.update("TCS", confluence=1)
+    feature_store._save(
+        {"built": "2026-10-14T16:00:00+05:30", "columns": COLUMNS, "tickers": ["TCS.NS", "INFY.NS"]},
+        np.zeros((1, len(COLUMNS))))
+    assert not feature_store.update("WIPRO", confluence=1)   # Matrix/index mismatch: left for a rebuild
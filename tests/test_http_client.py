@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+import requests
+from urllib3.exceptions import NewConnectionError
+
+import http_client
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, name=""):
+        self.status_code = status_code
+        self.headers = {}
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """Plays back a script: each item is a response, an exception, or a callable returning one"""
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.calls.append(method)
+            step = self.script.pop(0)
+        if callable(step): step = step()
+        if isinstance(step, BaseException): raise step
+        return step
+
+
+@pytest.fixture
+def session(monkeypatch):
+    fake = FakeSession()
+    monkeypatch.setattr(http_client, "session_for", lambda url: fake)
+    monkeypatch.setattr(http_client, "_backoff", lambda attempt, response=None: 0)
+    http_client.reset_stats()
+    return fake
+
+
+def test_retries_503_and_closes_discarded_response(session):
+    busy, ok = FakeResponse(503), FakeResponse(200)
+    session.script = [busy, ok]
+    assert http_client.get("https://example.com/x") is ok
+    assert busy.closed and not ok.closed
+    stats = http_client.latency_stats()["example.com"]
+    assert stats["requests"] == 2 and stats["errors"] == 1
+
+
+def test_gives_up_after_max_retries(session):
+    session.script = [FakeResponse(502) for _ in range(3)]
+    response = http_client.get("https://example.com/x", retries=2)
+    assert response.status_code == 502 and not response.closed
+    assert len(session.calls) == 3
+
+
+def test_post_is_not_retried_on_server_error_or_read_failure(session):
+    session.script = [FakeResponse(503)]
+    assert http_client.post("https://example.com/x").status_code == 503
+    session.script = [requests.ReadTimeout("slow")]
+    with pytest.raises(requests.ReadTimeout):
+        http_client.post("https://example.com/x")
+    assert session.calls == ["POST", "POST"]
+
+
+def test_post_retried_when_connection_never_opened(session):
+    refused = requests.ConnectionError(type("E", (), {"reason": NewConnectionError(None, "refused")})())
+    ok = FakeResponse(200)
+    session.script = [refused, ok]
+    assert http_client.post("https://example.com/x") is ok
+
+
+def test_post_retried_on_429(session):
+    ok = FakeResponse(200)
+    session.script = [FakeResponse(429), ok]
+    assert http_client.post("https://example.com/x") is ok
+
+
+def test_hedge_returns_fast_copy_and_closes_the_loser(session):
+    release = threading.Event()
+    slow, fast = FakeResponse(name="slow"), FakeResponse(name="fast")
+
+    def stuck():
+        release.wait(5)
+        return slow
+
+    session.script = [stuck, fast]
+    assert http_client.get("https://example.com/x", hedge_after=0.05) is fast
+    release.set()
+    deadline = time.time() + 5
+    while not slow.closed and time.time() < deadline:
+        time.sleep(0.01)
+    assert slow.closed and not fast.closed
+
+
+def test_hedge_not_fired_when_first_answers_in_time(session):
+    ok = FakeResponse(200)
+    session.script = [ok]
+    assert http_client.get("https://example.com/x", hedge_after=1.0) is ok
+    assert len(session.calls) == 1
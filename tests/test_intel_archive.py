@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import intel_archive
+from intel_archive import lookup, normalize_sentiment, quote_terms, record, search
+
+
+def test_normalize_sentiment():
+    assert normalize_sentiment("positive") == "BULLISH"
+    assert normalize_sentiment("Verdict: NEGATIVE, guidance cut") == "BEARISH"
+    assert normalize_sentiment("no idea") is None
+    assert normalize_sentiment(None) is None
+
+
+def test_quote_terms_escapes_fts_syntax():
+    assert quote_terms(["Q2-results", "steel's"]) == '"Q2-results" "steel\'s"'
+    assert quote_terms(['say "hi"']) == '"say ""hi"""'
+    assert quote_terms([]) is None
+
+
+def test_record_is_append_only_by_key():
+    first = record("news", "filing", "Order win", "Large order", ticker="TATASTEEL.NS", key="att-1")
+    again = record("news", "filing", "Changed", "Changed body", key="att-1")
+    assert first == again
+    entry = lookup("att-1")
+    assert entry["title"] == "Order win" and entry["ticker"] == "TATASTEEL" and entry["body"] == "Large order"
+    assert lookup("missing") is None
+
+
+def test_search_filters_and_quoted_text():
+    record("news", "filing", "Q2-results beat", "steel's margins up", ticker="TATASTEEL", sentiment="Positive",
+           ts=datetime(2026, 10, 1, 10))
+    record("news", "filing", "Q2 miss", "weak demand", ticker="HINDALCO", sentiment="BEARISH", ts=datetime(2026, 10, 2, 10))
+    record("gossip", "rumour", "Merger talk", "HINDALCO merger", ticker="HINDALCO", ts=datetime(2026, 10, 3, 10))
+
+    assert [e["title"] for e in search(text=quote_terms(["Q2-results", "steel's"]))] == ["Q2-results beat"]
+    assert [e["title"] for e in search(ticker="hindalco.ns")] == ["Merger talk", "Q2 miss"]
+    assert [e["title"] for e in search(sentiment="negative", source="news")] == ["Q2 miss"]
+    assert [e["title"] for e in search(since="2026-10-02", until="2026-10-03")] == ["Q2 miss"]
+    assert [e["title"] for e in search(text="merger OR beat")] == ["Merger talk", "Q2-results beat"]
+
+
+def test_labelled_titles_skip_local_model_labels():
+    record("news", "headline", "Gemini said", "", sentiment="BULLISH", analyst="gemini")
+    record("news", "headline", "Local said", "", sentiment="BEARISH", analyst="local")
+    assert intel_archive.labelled_titles("news") == [("Gemini said", "BULLISH")]
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from macro_bot import compute_regime_stats, regime_tag
+
+
+def test_change_uses_each_columns_own_last_two_bars():
+    days = pd.bdate_range("2026-09-01", periods=40)
+    panel = pd.DataFrame({"^NSEI": np.linspace(100, 139, 40), "INR=X": np.linspace(80, 83.9, 40)}, index=days)
+    panel.loc[days[-1], "^NSEI"] = np.nan            # Indian holiday: FX still trades
+    panel.loc[days[-1], "INR=X"] = 84.0
+
+    stats, _ = compute_regime_stats(panel)
+    assert stats.loc["^NSEI", "price"] == pytest.approx(138)
+    assert stats.loc["^NSEI", "change"] == pytest.approx((138 / 137 - 1) * 100)   # Not 0% from a filled row
+    assert stats.loc["INR=X", "change"] == pytest.approx((84.0 / 83.8 - 1) * 100)
+
+
+def test_single_bar_has_no_change_and_empty_column_no_price():
+    days = pd.bdate_range("2026-10-01", periods=30)
+    panel = pd.DataFrame({"GC=F": np.nan, "CL=F": np.nan}, index=days)
+    panel.loc[days[-1], "GC=F"] = 2400.0
+    stats, pairs = compute_regime_stats(panel)
+    assert stats.loc["GC=F", "price"] == 2400.0 and np.isnan(stats.loc["GC=F", "change"])
+    assert np.isnan(stats.loc["CL=F", "price"])
+    assert pairs == []
+
+
+def test_correlated_pairs_reported_once():
+    days = pd.bdate_range("2026-01-01", periods=80)
+    rng = np.random.default_rng(0)
+    base = 100 * np.cumprod(1 + rng.normal(0, 0.01, 80))
+    panel = pd.DataFrame({"A": base, "B": base * 2, "C": 100 * np.cumprod(1 + rng.normal(0, 0.01, 80))}, index=days)
+    _, pairs = compute_regime_stats(panel)
+    assert [(a, b) for a, b, _ in pairs] == [("A", "B")]
+    assert pairs[0][2] == pytest.approx(1.0)
+
+
+def test_regime_tag():
+    assert [regime_tag(z) for z in (2.5, 1.2, 0, -1.5, -2)] == \
+        ["STRETCHED HIGH", "ELEVATED", "NORMAL", "DEPRESSED", "STRETCHED LOW"]
@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import pytest
+
+from macro_calendar import (RELEASE_CALENDAR, due_queries, extract_value, is_due, last_release,
+                            record_results)
+
+FOMC = RELEASE_CALENDAR["3"]
+RBI_CREDIT = RELEASE_CALENDAR["11"]
+
+
+def entry(checked, released=None):
+    return {"checked": checked, "released": released}
+
+
+@pytest.mark.parametrize("schedule, now, expected", [
+    ({"kind": "daily"}, datetime(2026, 10, 18, 9), datetime(2026, 10, 16)),                 # Sunday -> Friday
+    ({"kind": "weekly", "weekday": 3}, datetime(2026, 10, 19, 9), datetime(2026, 10, 15)),
+    ({"kind": "monthly", "day": 28}, datetime(2026, 10, 19, 9), datetime(2026, 9, 28)),
+    ({"kind": "monthly", "day": 31}, datetime(2026, 3, 1, 9), datetime(2026, 2, 28)),       # Clamped to month end
+    ({"kind": "first_weekday", "weekday": 4}, datetime(2026, 10, 1, 9), datetime(2026, 9, 4)),
+    ({"kind": "quarterly", "months": [3, 6, 9, 12], "day": 25}, datetime(2026, 10, 19), datetime(2026, 9, 25)),
+    (FOMC, datetime(2026, 10, 19, 9), datetime(2026, 9, 16)),
+    (FOMC, datetime(2026, 10, 28, 9), datetime(2026, 10, 28)),
+])
+def test_last_release(schedule, now, expected):
+    assert last_release(schedule, now) == expected
+
+
+def test_meeting_calendar_runs_out():
+    assert last_release(FOMC, datetime(2027, 1, 15)) == datetime(2026, 12, 9)
+    assert last_release(FOMC, datetime(2027, 3, 1)) is None
+    assert last_release(FOMC, datetime(2024, 12, 1)) is None
+
+
+def test_release_due_until_captured_then_retried_within_grace():
+    iip = RELEASE_CALENDAR["8"]
+    now = datetime(2026, 10, 19, 9)
+    assert is_due(iip, None, now)
+    assert is_due(iip, entry("2026-09-20T09:00:00", "2026-08-28"), now)            # Not checked since Sep 28
+    assert not is_due(iip, entry("2026-09-29T09:00:00", "2026-09-28"), now)        # Have it
+    assert not is_due(iip, entry("2026-10-19T06:00:00", "2026-08-28"), now)        # Checked 3h ago
+    assert is_due(iip, entry("2026-10-01T09:00:00", "2026-08-28"), datetime(2026, 10, 2, 9))
+    assert not is_due(iip, entry("2026-10-10T09:00:00", "2026-08-28"), now)        # Past the grace window
+
+
+def test_fomc_waits_for_the_next_meeting():
+    captured = entry("2026-09-17T09:00:00", "2026-09-16")
+    assert not is_due(FOMC, captured, datetime(2026, 10, 19, 9))
+    assert is_due(FOMC, captured, datetime(2026, 10, 28, 21))
+
+
+def test_irregular_release_due_after_two_thirds_of_its_period():
+    captured = entry("2026-10-02T09:00:00", "2026-10-02")
+    assert not is_due(RBI_CREDIT, captured, datetime(2026, 10, 8, 9))
+    assert is_due(RBI_CREDIT, captured, datetime(2026, 10, 15, 9))
+    assert not is_due(RBI_CREDIT, entry("2026-10-15T07:00:00", "2026-10-02"), datetime(2026, 10, 15, 9))
+
+
+def test_due_queries_uses_the_store():
+    queries = ["8. India IIP growth latest", "99. Something live"]
+    store = {"8": entry("2026-09-29T09:00:00", "2026-09-28"),
+             "99": entry("2026-10-19T08:00:00", "2026-10-19")}
+    now = datetime(2026, 10, 19, 9)
+    assert due_queries(queries, store, now) == []
+    assert due_queries(queries, store, now, force=True) == queries
+
+
+def test_extract_and_record():
+    assert extract_value("GST mop-up rises 9% to Rs 1.87 lakh crore", unit="crore") == (1.87, "lakh crore")
+    assert extract_value("Forex reserves at 2026 high", unit="bn") == (None, None)
+
+    store = {}
+    now = datetime(2026, 10, 2, 9)
+    results = [{"title": "GST collections in September", "date": "1 day ago"},
+               {"title": "GST mop-up rises 9% to Rs 1.87 lakh crore", "date": "Oct 1, 2026", "link": "u"}]
+    assert record_results(store, "6. India GST collections latest month", results, now)
+    assert store["6"]["value"] == 1.87 and store["6"]["released"] == "2026-10-01"
+    assert not record_results(store, "6. India GST collections latest month", results, now)
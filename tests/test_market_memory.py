@@ -0,0 +1,61 @@
+import itertools
+
+import pytest
+
+import market_memory
+from market_memory import get_confluence_score, merge
+
+
+def stamped(ts, source, trend=None, **stocks):
+    mem = {"stock_sentiment": {}, "_meta": {}}
+    if trend:
+        mem["global_trend"] = trend
+        mem["_meta"]["global_trend"] = {"ts": ts, "source": source}
+    for ticker, value in stocks.items():
+        key = f"stock_sentiment/{ticker}.NS"
+        mem["stock_sentiment"][f"{ticker}.NS"] = value
+        mem["_meta"][key] = {"ts": ts, "source": source}
+    return mem
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    monkeypatch.setattr(market_memory, "REPO_OWNER", None)
+
+
+def test_merge_is_order_independent():
+    a = stamped("2026-10-19T04:00:00.000+00:00", "macro_bot", trend="BULLISH", TCS="POSITIVE")
+    b = stamped("2026-10-19T05:00:00.000+00:00", "news_bot", INFY="NEGATIVE", TCS="NEGATIVE")
+    c = stamped("2026-10-19T05:00:00.000+00:00", "gossip_bot", trend="BEARISH", INFY="POSITIVE")
+    results = [merge(*order) for order in itertools.permutations([a, b, c])]
+    assert all(r == results[0] for r in results)
+    assert results[0]["global_trend"] == "BEARISH"
+    assert results[0]["stock_sentiment"] == {"TCS.NS": "NEGATIVE", "INFY.NS": "NEGATIVE"}   # news_bot > gossip_bot on a tie
+
+
+def test_merge_adds_no_phantom_trend():
+    merged = merge(stamped("2026-10-19T05:00:00.000+00:00", "news_bot", TCS="POSITIVE"))
+    assert "global_trend" not in merged
+    assert "global_trend" not in merge({})
+
+
+def test_unstamped_values_lose_to_stamped_and_keep_existing():
+    legacy = {"global_trend": "BEARISH", "stock_sentiment": {"TCS.NS": "NEGATIVE"}}
+    fresh = stamped("2026-10-19T05:00:00.000+00:00", "macro_bot", trend="BULLISH")
+    assert merge(legacy, fresh)["global_trend"] == "BULLISH"
+    assert merge(fresh, legacy)["global_trend"] == "BULLISH"
+    assert merge(fresh, legacy)["stock_sentiment"] == {"TCS.NS": "NEGATIVE"}
+
+    other_legacy = {"global_trend": "NEUTRAL"}
+    assert merge(legacy, other_legacy)["global_trend"] == "BEARISH"
+    assert merge(other_legacy, legacy)["global_trend"] == "NEUTRAL"
+
+
+def test_local_updates_are_stamped_and_scored():
+    market_memory.update_global_trend("bullish", source="macro_bot")
+    market_memory.update_stock_sentiment("TCS", "positive", source="news_bot")
+    mem = market_memory.load_memory()
+    assert mem["global_trend"] == "BULLISH"
+    assert mem["_meta"]["stock_sentiment/TCS.NS"]["source"] == "news_bot"
+    assert get_confluence_score("TCS", mem=mem) == 100
+    assert get_confluence_score("INFY", mem=mem) == 70
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+import intel_archive
+import sentiment_model
+
+
+@pytest.fixture(autouse=True)
+def fresh_model(monkeypatch):
+    monkeypatch.setattr(sentiment_model, "_models", None)
+
+
+def _label(n, title, sentiment):
+    for i in range(n):
+        intel_archive.record("news", "headline", f"{title} {i}", "", sentiment=sentiment, analyst="gemini")
+
+
+def test_too_few_labels_is_not_saved():
+    _label(5, "order win", "BULLISH")
+    model = sentiment_model.load_model()
+    assert model["sources"] == {}
+    assert not os.path.exists(sentiment_model.MODEL_FILE)
+    assert sentiment_model.route("order win", "news")[2] == "llm"
+
+
+def test_trained_model_routes_confident_headlines_locally(monkeypatch):
+    monkeypatch.setattr(sentiment_model, "SHADOW_RATE", 0.0)
+    _label(40, "bags large order win", "BULLISH")
+    _label(40, "plant shut after fire", "BEARISH")
+    model = sentiment_model.load_model()
+    assert model["sources"]["news"]["examples"] == 80
+    assert os.path.exists(sentiment_model.MODEL_FILE)
+
+    label, confidence, decision = sentiment_model.route("Tata Steel bags large order win", "news")
+    assert label == "BULLISH" and confidence >= sentiment_model.CONFIDENCE and decision == "local"
+    assert sentiment_model.predict("Tata Steel plant shut after fire", "news")[0] == "BEARISH"
+    assert sentiment_model.predict("completely unrelated words", "news") == (None, 0.0)
+    assert sentiment_model.predict("order win", "gossip") == (None, 0.0)
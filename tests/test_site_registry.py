@@ -0,0 +1,58 @@
+import math
+import os
+
+from PIL import Image
+
+import site_registry
+from site_registry import crop_site, group_into_tiles, load_sites
+
+SITES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sites.json")
+VIS = {"bands": ["B4", "B3", "B2"], "min": 0, "max": 3000, "gamma": 1.4}
+
+
+def _site(roi, vis=VIS):
+    return {"roi": roi, "vis": vis}
+
+
+def test_real_registry_shares_only_close_neighbours():
+    sites = load_sites(SITES_FILE)
+    tiles = group_into_tiles(sites)
+    assert sum(len(t["sites"]) for t in tiles) == len(sites)
+    shared = [t for t in tiles if len(t["sites"]) > 1]
+    assert len(shared) == 1
+    assert any("ICD" in name for name in shared[0]["sites"])
+    assert any("Manesar" in name for name in shared[0]["sites"])
+    assert all(t["dimensions"] <= site_registry.MAX_TILE_PIXELS for t in tiles)
+
+
+def test_adjacent_sites_share_a_tile_at_native_density():
+    sites = {"a": _site([77.00, 28.00, 77.01, 28.01]), "b": _site([77.02, 28.00, 77.03, 28.01])}
+    (tile,) = group_into_tiles(sites)
+    assert tile["sites"] == ["a", "b"]
+    assert tile["bbox"] == [77.00, 28.00, 77.03, 28.01]
+    # 0.03 deg at ~10 m pixels, not 0.03 deg at 700 px per 0.01 deg
+    assert tile["dimensions"] == math.ceil(0.03 * site_registry.pixels_per_deg(sites["a"]["roi"]))
+
+
+def test_different_stretch_or_too_far_stays_split():
+    swir = {"bands": ["B12", "B11", "B4"], "min": 0, "max": 4000, "gamma": 1.3}
+    sites = {"a": _site([77.00, 28.00, 77.01, 28.01]),
+             "b": _site([77.02, 28.00, 77.03, 28.01], vis=swir),
+             "c": _site([77.60, 28.00, 77.61, 28.01])}
+    tiles = group_into_tiles(sites)
+    assert [t["sites"] for t in tiles] == [["a"], ["b"], ["c"]]
+    assert all(t["dimensions"] == site_registry.SITE_PIXELS for t in tiles)
+
+
+def test_gamma_alone_does_not_split():
+    sites = {"a": _site([77.00, 28.00, 77.01, 28.01]),
+             "b": _site([77.02, 28.00, 77.03, 28.01], vis={**VIS, "gamma": 1.0})}
+    assert len(group_into_tiles(sites)) == 1
+
+
+def test_crop_site_is_delivered_at_site_width(tmp_path):
+    tile = tmp_path / "tile.png"
+    Image.new("RGB", (300, 100), (120, 80, 40)).save(tile)
+    out = crop_site(str(tile), [77.00, 28.00, 77.03, 28.01], [77.00, 28.00, 77.01, 28.01], str(tmp_path / "site.jpg"))
+    with Image.open(out) as img:
+        assert img.size == (site_registry.SITE_PIXELS, site_registry.SITE_PIXELS)
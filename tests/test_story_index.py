@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import story_index
+from story_index import assign, band_keys, get_cluster, jaccard, members, tokens
+
+
+@pytest.fixture(autouse=True)
+def index(monkeypatch):
+    monkeypatch.setattr(story_index, "_conn", None)
+    yield
+    if story_index._conn is not None: story_index._conn.close()
+
+
+def test_tokens_drop_filler_and_stem():
+    assert tokens("Adani in talks to buy Jaypee's assets, sources say") == {"adani", "talk", "buy", "jaypee", "asset"}
+    assert tokens("") == set()
+
+
+def test_jaccard():
+    assert jaccard({"a", "b"}, {"b", "c"}) == 1 / 3
+    assert jaccard(set(), {"a"}) == 0.0
+
+
+def test_band_keys_are_stable_and_share_buckets_for_close_titles():
+    a = tokens("Tata Steel wins large railway order from Indian Railways")
+    b = tokens("Tata Steel wins large railway order from Railways: report")
+    assert band_keys(a) == band_keys(set(a))
+    assert len(band_keys(a)) == story_index.BANDS
+    assert set(band_keys(a)) & set(band_keys(b))
+    assert band_keys(set()) == []
+
+
+def test_rewordings_join_one_cluster():
+    first, status = assign("Adani in talks to buy Jaypee's cement assets", "news", link="l1", outlet="ET")
+    assert status == "new"
+    cluster, status = assign("Adani in talks to buy Jaypee cement assets, sources say", "news", link="l2", outlet="Mint")
+    assert (cluster, status) == (first, "joined")
+    assert get_cluster(first)["size"] == 2
+    assert [m["outlet"] for m in members(first)] == ["ET", "Mint"]
+
+    assert assign("Infosys cuts revenue guidance for the year", "news", link="l3")[1] == "new"
+    assert assign("Different headline, same URL", "news", link="l1") == (first, "seen")
+
+
+def test_matching_is_scoped_and_windowed():
+    old = datetime.now() - timedelta(days=story_index.WINDOW_DAYS + 1)
+    assign("Hindalco plans Novelis listing in New York", "news", link="a", scope="HINDALCO", ts=old)
+    assert assign("Hindalco plans Novelis listing in New York", "news", link="b", scope="HINDALCO")[1] == "new"
+    assert assign("Hindalco plans Novelis listing in New York", "news", link="c", scope="NOVELIS")[1] == "new"
+    assert assign("Hindalco plans Novelis listing in New York", "gossip", link="b", scope="HINDALCO")[1] == "new"
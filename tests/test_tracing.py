@@ -0,0 +1,53 @@
+import json
+import os
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture
+def run(monkeypatch):
+    monkeypatch.setattr(tracing, "atexit", type("A", (), {"register": staticmethod(lambda fn: None)}))
+    tracing.start_run("test")
+    yield tracing._run
+    tracing._run["bot"] = None
+
+
+def test_percentile_interpolates():
+    assert tracing._percentile([], 50) == 0.0
+    assert tracing._percentile([10], 95) == 10
+    assert tracing._percentile([1, 2, 3, 4], 50) == 2.5
+    assert tracing._percentile([4, 1, 3, 2], 100) == 4
+
+
+def test_span_records_errors_and_reraises(run):
+    with tracing.span("fetch", "ee", target="Mundra"):
+        pass
+    with pytest.raises(ValueError):
+        with tracing.span("fetch", "ee", target="Chakan"):
+            raise ValueError("boom")
+
+    ok, failed = run["spans"]
+    assert ok["ok"] and ok["target"] == "Mundra" and ok["ms"] >= 0
+    assert not failed["ok"] and failed["error"] == "ValueError"
+
+    summary = tracing.summarize()
+    assert summary["backends"]["ee"]["calls"] == 2
+    assert summary["backends"]["ee"]["errors"] == 1
+
+
+def test_flush_appends_and_keeps_cumulative_summary(run):
+    with tracing.span("fetch", "yfinance", ticker="TCS.NS"):
+        pass
+    tracing.flush()
+    with tracing.span("fetch", "yfinance", ticker="INFY.NS"):
+        pass
+    summary = tracing.flush()
+
+    with open(tracing.TRACE_FILE) as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["ticker"] for line in lines] == ["TCS.NS", "INFY.NS"]
+    assert summary["backends"]["yfinance"]["calls"] == 2
+    assert run["spans"] == []
+    assert os.path.exists(tracing.SUMMARY_FILE)
@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import traceback
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+# --- CONFIGURATION ---
+TRACE_DIR = os.environ.get("TRACE_DIR", "data/traces")
+TRACE_FILE = os.path.join(TRACE_DIR, "trace.jsonl")
+SUMMARY_FILE = os.path.join(TRACE_DIR, "last_run_summary.json")
+TRACE_MAX_BYTES = 5 * 1024 * 1024  # Rotate trace.jsonl past 5 MB
+PROFILE_ENABLED = os.environ.get("TRACE_PROFILE") == "1"
+PROFILE_INTERVAL = 0.005           # Sampler tick (seconds)
+
+_lock = threading.Lock()
+_run = {"bot": None, "run_id": None, "started": None, "spans": [], "flushed": [], "counters": Counter()}
+_providers = {}
+
+
+def start_run(bot):
+    """Every bot calls this once at startup. Summary is written when the process exits."""
+    if _run["bot"] == bot: return
+    _run.update(bot=bot, run_id=f"{bot}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}",
+                started=time.perf_counter(), spans=[], flushed=[], counters=Counter())
+    atexit.register(finish_run)
+
+
+def register_summary(name, fn):
+    """Lets other modules (e.g. http_client) add their own stats to the run summary"""
+    _providers[name] = fn
+
+
+def count(name, n=1):
+    with _lock:
+        _run["counters"][name] += n
+
+
+@contextmanager
+def span(stage, backend=None, profile=False, **attrs):
+    """
+    Times one unit of work. stage is one of fetch / indicator / llm / render /
+    send / persist; backend names the service (ee, yfinance, gemini, ...).
+    """
+    record = {"stage": stage, "backend": backend, **attrs}
+    sampler = _Sampler(f"{stage}.{backend or 'local'}") if (profile and PROFILE_ENABLED) else None
+    if sampler: sampler.start()
+    t0 = time.perf_counter()
+    try:
+        yield record
+        record.setdefault("ok", True)
+    except BaseException as e:
+        record["ok"] = False
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record["ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        if sampler: sampler.stop()
+        record["ts"] = datetime.now().isoformat(timespec="milliseconds")
+        with _lock:
+            _run["spans"].append(record)
+
+
+def traced(stage, backend=None, profile=False):
+    """Decorator form of span()"""
+    def wrap(fn):
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            with span(stage, backend, profile=profile, fn=fn.__name__):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered: return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return round(ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo), 2)
+
+
+def summarize(spans=None):
+    spans = _run["spans"] if spans is None else spans
+    by_backend = defaultdict(list)
+    by_stage = defaultdict(float)
+    errors = Counter()
+    for s in spans:
+        key = s.get("backend") or "local"
+        by_backend[key].append(s["ms"])
+        by_stage[s["stage"]] += s["ms"]
+        if not s.get("ok", True): errors[key] += 1
+
+    backends = {
+        name: {"calls": len(ms), "errors": errors[name], "total_ms": round(sum(ms), 1),
+               "p50_ms": _percentile(ms, 50), "p95_ms": _percentile(ms, 95)}
+        for name, ms in by_backend.items()
+    }
+    slowest = sorted(spans, key=lambda s: -s["ms"])[:5]
+    extra = {}
+    for name, fn in _providers.items():
+        try: extra[name] = fn()
+        except Exception as e: extra[name] = {"error": str(e)}
+    return {
+        "bot": _run["bot"], "run_id": _run["run_id"],
+        "wall_ms": round((time.perf_counter() - _run["started"]) * 1000, 1) if _run["started"] else None,
+        "stages_ms": {k: round(v, 1) for k, v in sorted(by_stage.items(), key=lambda kv: -kv[1])},
+        "backends": dict(sorted(backends.items(), key=lambda kv: -kv[1]["total_ms"])),
+        "slowest": [{k: s.get(k) for k in ("stage", "backend", "ms", "target", "ticker", "symbol") if s.get(k) is not None}
+                    for s in slowest],
+        "counters": dict(_run["counters"]),
+        **extra,
+    }
+
+
+def flush():
+    """
+    Appends the spans recorded so far to the JSONL trace and rewrites the summary,
+    without ending the run. Long-running bots call it periodically so a killed job
+    still leaves its traces behind. Returns the summary of the flushed spans.
+    """
+    if not _run["bot"]: return None
+    with _lock:
+        spans, _run["spans"] = _run["spans"], []
+        _run["flushed"] += spans
+    summary = summarize(_run["flushed"])   # Whole run so far, not just this batch
+    try:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        if os.path.exists(TRACE_FILE) and os.path.getsize(TRACE_FILE) > TRACE_MAX_BYTES:
+            os.replace(TRACE_FILE, TRACE_FILE + ".1")
+        with open(TRACE_FILE, "a") as f:
+            for s in spans:
+                f.write(json.dumps({"run_id": _run["run_id"], "bot": _run["bot"], **s}) + "\n")
+        with open(SUMMARY_FILE, "w") as f:
+            json.dump(summary, f, indent=4)
+    except Exception as e:
+        print(f"⚠️ Trace write failed: {e}")
+    return summary
+
+
+def finish_run():
+    """Flushes spans to the JSONL trace and prints the per-run summary"""
+    if not _run["bot"]: return
+    summary = flush()
+
+    print(f"\n⏱️ [TRACE] {summary['bot']} finished in {(summary['wall_ms'] or 0) / 1000:.1f}s")
+    for name, b in summary["backends"].items():
+        print(f"   {name:<11} {b['calls']:>4} calls | p50 {b['p50_ms']:>8.1f} ms | p95 {b['p95_ms']:>8.1f} ms"
+              f" | total {b['total_ms'] / 1000:>6.1f}s | errors {b['errors']}")
+    for host, h in (summary.get("http") or {}).items():
+        if "p50_ms" not in h: continue
+        print(f"   🌐 {host:<32} {h['requests']:>4} req | p50 {h['p50_ms']:>7.1f} ms | p95 {h['p95_ms']:>7.1f} ms | errors {h['errors']}")
+    for s in summary["slowest"][:3]:
+        label = s.get("target") or s.get("ticker") or s.get("symbol") or ""
+        print(f"   🐢 {s['stage']}/{s.get('backend') or 'local'} {label} {s['ms'] / 1000:.2f}s")
+    _run["bot"] = None
+
+
+# ==========================================
+# OPTIONAL SAMPLING PROFILER (TRACE_PROFILE=1)
+# ==========================================
+class _Sampler:
+    """Samples the calling thread's stack on a timer. Output is collapsed-stack format (flamegraph.pl / speedscope)."""
+    def __init__(self, name):
+        self.name = name
+        self.target = threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(PROFILE_INTERVAL):
+            frame = sys._current_frames().get(self.target)
+            if frame is None: continue
+            stack = traceback.extract_stack(frame)
+            self.stacks[";".join(f"{os.path.basename(f.filename)}:{f.name}" for f in stack)] += 1
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        if not self.stacks: return
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        path = os.path.join(TRACE_DIR, f"profile_{self.name}.folded")
+        with open(path, "a") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+        leaves = Counter()
+        for stack, n in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += n
+        total = sum(leaves.values())
+        top = ", ".join(f"{leaf} {n * 100 // total}%" for leaf, n in leaves.most_common(3))
+        print(f"   🔬 [PROFILE] {self.name}: {total} samples -> {top}")
@@ -0,0 +1,137 @@
+import os
+import time
+import threading
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+import http_client
+import tracing
+from indicators import rsi_frame, RSI_LENGTH
+
+# --- CONFIGURATION ---
+UNIVERSE_URL = "https://archives.nseindia.com/content/equities/EQUITY_L.csv"
+UNIVERSE_DIR = "data/universe"
+UNIVERSE_FILE = os.path.join(UNIVERSE_DIR, "EQUITY_L.csv")
+UNIVERSE_MAX_AGE_DAYS = 7                 # The listing barely changes; refresh weekly
+UNIVERSE_PERIOD = "3mo"                   # Enough bars for RSI-14 and 1-month return
+CHUNK_SIZE = int(os.environ.get("UNIVERSE_CHUNK", "100"))            # Symbols per batched download
+FETCH_WORKERS = int(os.environ.get("UNIVERSE_FETCH_WORKERS", "1"))   # Fetch threads (downloads are serialized, see fetch_chunk)
+SCAN_PROCESSES = int(os.environ.get("UNIVERSE_PROCESSES", str(os.cpu_count() or 1)))
+
+# yf.download keeps its results and errors in module-level dicts, so two calls
+# at once can mix up each other's frames. It already threads inside one call.
+_download_lock = threading.Lock()
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def load_universe(max_age_days=UNIVERSE_MAX_AGE_DAYS):
+    """All NSE EQ-series symbols as yfinance tickers. The listing is cached in data/universe."""
+    fresh = os.path.exists(UNIVERSE_FILE) and time.time() - os.path.getmtime(UNIVERSE_FILE) < max_age_days * 86400
+    if not fresh:
+        try:
+            with tracing.span("fetch", "nse", call="equity_list"):
+                response = http_client.get(UNIVERSE_URL, headers=HEADERS, timeout=(5, 20))
+            if response.status_code == 200 and b"SYMBOL" in response.content[:200]:
+                os.makedirs(UNIVERSE_DIR, exist_ok=True)
+                with open(UNIVERSE_FILE + ".tmp", "wb") as f:
+                    f.write(response.content)
+                os.replace(UNIVERSE_FILE + ".tmp", UNIVERSE_FILE)
+        except Exception as e:
+            print(f"⚠️ Universe refresh failed, using cached list: {e}")
+    if not os.path.exists(UNIVERSE_FILE): return []
+
+    df = pd.read_csv(UNIVERSE_FILE)
+    df.columns = [c.strip() for c in df.columns]
+    if "SERIES" in df: df = df[df["SERIES"].astype(str).str.strip() == "EQ"]
+    return sorted({f"{s.strip()}.NS" for s in df["SYMBOL"].astype(str)})
+
+
+def fetch_chunk(tickers):
+    """One batched request per chunk -> (closes, volumes, seconds)"""
+    t0 = time.perf_counter()
+    with _download_lock, tracing.span("fetch", "yfinance", tickers=len(tickers)):
+        df = yf.download(tickers, period=UNIVERSE_PERIOD, interval="1d", progress=False, threads=True)
+    if df.empty: return pd.DataFrame(), pd.DataFrame(), time.perf_counter() - t0
+    closes, volumes = df["Close"], df["Volume"]
+    if isinstance(closes, pd.Series):
+        closes, volumes = closes.to_frame(tickers[0]), volumes.to_frame(tickers[0])
+    closes = closes.dropna(axis=1, how="all")
+    return closes, volumes.reindex(columns=closes.columns), time.perf_counter() - t0
+
+
+def score_chunk(tickers, closes, volumes, rsi_buy, rsi_sell):
+    """
+    Process-pool worker. Takes plain arrays (cheap to pickle) for one chunk
+    and returns one metrics row per symbol plus the seconds it took.
+    """
+    t0 = time.perf_counter()
+    closes = pd.DataFrame(closes, columns=tickers).ffill()
+    volumes = pd.DataFrame(volumes, columns=tickers)
+    rsi = rsi_frame(closes, RSI_LENGTH).iloc[-1]
+    price = closes.iloc[-1]
+    ret_1d = closes.pct_change(1, fill_method=None).iloc[-1] * 100
+    ret_1m = closes.pct_change(21, fill_method=None).iloc[-1] * 100
+    vol_ratio = volumes.iloc[-1] / volumes.tail(20).mean()
+
+    rows = []
+    for t in tickers:
+        if np.isnan(rsi[t]) or not price[t] > 0: continue
+        signal = "OVERSOLD" if rsi[t] < rsi_buy else "OVERBOUGHT" if rsi[t] > rsi_sell else None
+        rows.append({"ticker": t, "price": float(price[t]), "rsi": float(rsi[t]),
+                     "ret_1d": float(ret_1d[t]), "ret_1m": float(ret_1m[t]),
+                     "vol_ratio": float(vol_ratio[t]) if np.isfinite(vol_ratio[t]) else 0.0, "signal": signal})
+    return rows, time.perf_counter() - t0
+
+
+def rank_signals(rows, top_n):
+    """Merged ranking: most extreme RSI first, unusual volume breaks ties"""
+    oversold = sorted((r for r in rows if r["signal"] == "OVERSOLD"), key=lambda r: (r["rsi"], -r["vol_ratio"]))
+    overbought = sorted((r for r in rows if r["signal"] == "OVERBOUGHT"), key=lambda r: (-r["rsi"], -r["vol_ratio"]))
+    return oversold[:top_n], overbought[:top_n]
+
+
+def scan_universe(tickers, rsi_buy, rsi_sell, chunk_size=CHUNK_SIZE):
+    """
+    Sharded scan: chunks download one after another on a fetch thread and each
+    finished chunk goes straight to a process pool for the indicators.
+    Returns (rows, stats) where stats has per-stage symbols and busy seconds.
+    """
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+    stats = {"symbols": len(tickers), "chunks": len(chunks), "failed": 0,
+             "fetch": {"symbols": 0, "busy_s": 0.0}, "indicator": {"symbols": 0, "busy_s": 0.0}}
+    rows = []
+    if not chunks: return rows, stats
+
+    processes = max(1, min(SCAN_PROCESSES, len(chunks)))
+    with ProcessPoolExecutor(max_workers=processes) as cpu_pool:
+        cpu_pool.submit(int).result()  # Start the workers before any fetch threads exist
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as io_pool:
+            fetches = {io_pool.submit(fetch_chunk, chunk): chunk for chunk in chunks}
+            scoring = []
+            for future in as_completed(fetches):
+                try:
+                    closes, volumes, took = future.result()
+                except Exception as e:
+                    print(f"⚠️ Chunk failed ({len(fetches[future])} symbols): {e}")
+                    stats["failed"] += len(fetches[future])
+                    continue
+                stats["fetch"]["symbols"] += closes.shape[1]
+                stats["fetch"]["busy_s"] += took
+                if closes.empty: continue
+                scoring.append(cpu_pool.submit(score_chunk, list(closes.columns), closes.values,
+                                               volumes.values, rsi_buy, rsi_sell))
+
+        for future in as_completed(scoring):
+            chunk_rows, took = future.result()
+            rows.extend(chunk_rows)
+            stats["indicator"]["symbols"] += len(chunk_rows)
+            stats["indicator"]["busy_s"] += took
+    stats["processes"] = processes
+    tracing.count("universe_symbols", len(rows))
+    return rows, stats